@@ -19,6 +19,7 @@ from reportlab.pdfbase.ttfonts import TTFont
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from video_agent import VideoSearchAgent, format_results
+from video_agent import FetchedBatch, FilterDone, ScoredBatch, FinalRanking
 
 # 页面配置
 st.set_page_config(
@@ -269,15 +270,33 @@ if search_button and search_query:
         status_text = st.empty()
         
         status_text.text("⏳ 连接 YouTube Data API...")
-        progress_bar.progress(20)
+        progress_bar.progress(10)
         
-        status_text.text("🔎 正在筛选欧美区爆款视频...")
-        progress_bar.progress(50)
-        
-        results = st.session_state.agent.search(search_query, top_n=10)
-        
-        status_text.text("🤖 AI 正在深度解析...")
-        progress_bar.progress(80)
+        # 按搜索事件推进进度，先到的平台结果立即显示
+        results = []
+        preview = st.empty()
+        fetched_count = 0
+        platforms_done = 0
+        for event in st.session_state.agent.search_stream(search_query, top_n=10):
+            if isinstance(event, FetchedBatch):
+                fetched_count += len(event.videos)
+                platforms_done += 1
+                if event.timed_out:
+                    status_text.text(f"⏱️ {event.platform} 响应超时，先用其余平台的结果（累计 {fetched_count} 个）...")
+                else:
+                    status_text.text(f"📡 {event.platform} 返回 {len(event.videos)} 个视频（累计 {fetched_count} 个）...")
+                progress_bar.progress(min(10 + 20 * platforms_done, 50))
+                if event.videos:
+                    preview.caption(" · ".join(v['title'][:40] for v in event.videos[:5]))
+            elif isinstance(event, FilterDone):
+                status_text.text(f"🔎 正在筛选欧美区爆款视频... 保留 {len(event.videos)}/{event.total} 个")
+                progress_bar.progress(55)
+            elif isinstance(event, ScoredBatch):
+                status_text.text(f"🤖 AI 正在深度解析 {len(event.videos)} 个高相关视频...")
+                progress_bar.progress(80)
+            elif isinstance(event, FinalRanking):
+                results = event.videos
+        preview.empty()
         
         st.session_state.current_results = results
         st.session_state.current_step = 'REPORT'
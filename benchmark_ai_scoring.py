@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+AI 相关性评分吞吐基准测试 - 对比单个 prompt 评分全部候选与按 token 预算分批并发评分（本地假模型）
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import StubResponse, make_ranker
+
+from video_agent.analyzers import ModelCaller, CircuitBreaker
+
+BASE_LATENCY = 0.3  # 每次调用的固定延迟（秒）
+PER_VIDEO_LATENCY = 0.02  # 每个视频的输出生成时间（秒）
+MAX_OUTPUT_ITEMS = 80  # 超过该数量的输出被截断（模拟输出 token 上限）
+
+
+class LatencyModel:
+    """假模型：延迟随视频数线性增长，输出项过多时 JSON 被截断"""
+
+    model_name = 'models/bench'
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        ids = [int(m) for m in re.findall(r'^(\d+)\. \[', prompt, re.M)]
+        time.sleep(BASE_LATENCY + PER_VIDEO_LATENCY * len(ids))
+        text = json.dumps([{'id': i, 'score': 70 + i % 30, 'reason': 'ok', 'hook': 'h'} for i in ids])
+        if len(ids) > MAX_OUTPUT_ITEMS:
+            text = text[:len(text) * MAX_OUTPUT_ITEMS // len(ids)]
+        return StubResponse(text)
+
+
+def make_videos(count: int):
+    return [
+        {
+            'platform': 'YouTube',
+            'video_id': f'vid{i}',
+            'title': f'How I use AI coding assistants to ship features faster, part {i}',
+            'description': 'A long description about prompts, refactoring, code review and testing workflows ' * 3,
+            'author': f'channel{i % 50}',
+            'views': 100000 + i * 1000,
+            'days_ago': i % 60,
+        }
+        for i in range(count)
+    ]
+
+
+def run(label: str, count: int, batch_tokens: int, parallelism: int):
+    caller = ModelCaller(deadline_seconds=None, max_retries=0, hedge=False,
+                         breaker=CircuitBreaker(failure_threshold=0), max_workers=16)
+    ranker = make_ranker(LatencyModel(), caller=caller, score_batch_tokens=batch_tokens,
+                         score_parallelism=parallelism)
+    videos = make_videos(count)
+
+    start = time.perf_counter()
+    ranker.score_relevance(videos, 'AI coding', target_count=count)
+    elapsed = time.perf_counter() - start
+
+    scored = sum(1 for v in videos if 'ai_score' in v)
+    print(f"{count:>6}  {label:<18} 调用: {ranker.model.calls:>3}   用时: {elapsed:>6.2f}s   "
+          f"已评分: {scored:>4}/{count:<4}   吞吐: {scored / elapsed:>7.1f} 视频/秒")
+
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [30, 150, 500]
+
+    print("=" * 100)
+    print(f"📊 AI 评分吞吐基准测试（假模型: {BASE_LATENCY}s + {PER_VIDEO_LATENCY}s/视频，"
+          f"超过 {MAX_OUTPUT_ITEMS} 项输出被截断）")
+    print("=" * 100)
+    for count in sizes:
+        run("单 prompt", count, batch_tokens=10 ** 9, parallelism=1)
+        run("分批并发 (x4)", count, batch_tokens=6000, parallelism=4)
+        run("分批并发 (x8)", count, batch_tokens=3000, parallelism=8)
+        print("-" * 100)
+
+
+if __name__ == '__main__':
+    main()
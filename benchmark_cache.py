@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+缓存性能基准测试 - 对比每次新建连接、线程本地持久连接与内存 LRU 层的 get/set 吞吐量
+"""
+import os
+import sys
+import tempfile
+import time
+import logging
+
+sys.path.insert(0, '.')
+
+from video_agent.cache import CacheManager
+
+# 模拟一次真实搜索缓存的结果（10 个视频）
+SAMPLE_RESULTS = [
+    {
+        'platform': 'YouTube',
+        'video_id': f'vid{i}',
+        'title': f'Sample video {i} about AI coding',
+        'description': 'A tutorial on AI-assisted coding ' * 5,
+        'views': 100000 + i * 1000,
+        'days_ago': i,
+        'tags': ['ai', 'coding']
+    }
+    for i in range(10)
+]
+
+
+def run(label: str, ops: int = 2000, **cache_kwargs):
+    """对一种缓存配置执行 set/get 计时"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = CacheManager(os.path.join(tmp_dir, 'bench.db'), expiry_hours=1, **cache_kwargs)
+        topics = [f"topic {i % 100}" for i in range(ops)]
+
+        start = time.perf_counter()
+        for topic in topics:
+            cache.set(topic, SAMPLE_RESULTS)
+        set_ops = ops / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for topic in topics:
+            cache.get(topic)
+        get_ops = ops / (time.perf_counter() - start)
+
+        cache.close()
+
+    print(f"{label:<36} set: {set_ops:>10,.0f} ops/s   get: {get_ops:>10,.0f} ops/s")
+    return set_ops, get_ops
+
+
+def main():
+    # 关闭缓存命中日志，避免 I/O 干扰计时
+    logging.basicConfig(level=logging.WARNING)
+
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 80)
+    print(f"📊 CacheManager 基准测试 ({ops} 次操作)")
+    print("=" * 80)
+
+    before = run("每次新建连接 (旧实现, FULL, 无WAL)", ops,
+                 persistent=False, synchronous='FULL', wal=False, memory_size=0)
+    run("持久连接 (FULL, 无WAL)", ops,
+        persistent=True, synchronous='FULL', wal=False, memory_size=0)
+    after = run("持久连接 + WAL (NORMAL)", ops, memory_size=0)
+    tiered = run("内存 LRU + 持久连接 + WAL (默认)", ops)
+
+    print("-" * 80)
+    print(f"SQLite 层提升: set x{after[0] / before[0]:.1f}, get x{after[1] / before[1]:.1f}")
+    print(f"内存层命中提升: get x{tiered[1] / before[1]:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Prompt token 报告 - 同一批输入下，对比旧版评分/排序 prompt 与紧凑 prompt 的估算 token 数
+"""
+import sys
+
+sys.path.insert(0, '.')
+
+from video_agent.analyzers.prompts import (
+    estimate_tokens, format_video_line, format_rank_line, scoring_prompt, ranking_prompt
+)
+
+TOPIC = 'AI coding tools'
+CANDIDATES = 30  # RULE_FILTER_COUNT
+SCORED = 15  # AI_FILTER_COUNT
+TOP_N = 10
+
+# 旧版 prompt（改动前 ai_ranker.py 中的写法），仅用于对比
+LEGACY_SCORE_CRITERIA = """评分标准：
+- 90-100分：完全相关，内容直接匹配主题，值得深度学习
+- 70-89分：高度相关，涉及主题核心方面，有参考价值
+- 50-69分：中度相关，部分内容相关
+- 30-49分：弱相关，仅标题提及
+- 0-29分：不相关或标题党"""
+
+
+def legacy_scoring_prompt(videos, topic):
+    video_texts = []
+    for i, video in enumerate(videos):
+        video_text = f"{i+1}. [{video['platform']}] {video['title'][:100]}\n"
+        video_text += f"   作者: {video['author']}\n"
+        video_text += f"   描述: {video['description'][:150]}\n"
+        video_text += f"   播放量: {video['views']:,} | {video['days_ago']}天前\n"
+        video_texts.append(video_text)
+    return f"""
+你是一个自媒体内容分析专家。请深度分析以下真实YouTube视频与主题"{topic}"的相关性。
+
+⚠️ 重要：这些都是真实存在的视频，有真实的播放量和作者信息。请基于这些真实数据进行分析。
+
+{LEGACY_SCORE_CRITERIA}
+
+视频列表（真实YouTube数据）：
+{chr(10).join(video_texts)}
+
+请输出JSON数组，每个视频包含：
+- id: 视频序号（1开始）
+- score: 相关性评分（0-100）
+- reason: 简短理由（15字内）
+- hook: 这个视频的核心吸引点/钩子（15字内，如"7天涨粉10万"）
+
+只输出JSON，不要其他文字：
+[{{"id": 1, "score": 85, "reason": "完整教程覆盖核心要点", "hook": "从0到100万粉丝实战"}}, ...]
+"""
+
+
+def legacy_ranking_prompt(videos, topic, top_n):
+    video_texts = []
+    for i, video in enumerate(videos):
+        video_text = f"{i+1}. [{video['platform']}] {video['title'][:80]}\n"
+        video_text += f"   作者: @{video['author']}\n"
+        video_text += f"   播放量: {video['views']:,} | {video['days_ago']}天前\n"
+        video_text += f"   相关性: {video.get('ai_score', 'N/A')}\n"
+        video_texts.append(video_text)
+    return f"""
+你是一个视频推荐专家，擅长分析爆款视频的运营逻辑和可复制性。
+从以下视频中选出最好的{top_n}个，推荐给对"{topic}"感兴趣的欧美自媒体创作者。
+
+⚠️ 重要：这些都是真实存在的视频，有真实的播放量和作者信息。请基于这些真实数据进行分析，不要编造信息。
+
+选择标准：
+1. 相关性：内容与主题高度匹配，且是欧美创作者的视频
+2. 质量：播放量、互动率显示受欢迎程度
+3. 时效性：较新的视频优先（但不是唯一标准）
+4. 多样性：尽量覆盖主题的不同角度和风格
+5. 深度分析：提取视频的"钩子文本"、"可复制性评分"、"关键学习点"和"成功原因"
+
+候选视频：
+{chr(10).join(video_texts)}
+
+请输出JSON数组，每个视频包含：
+- rank: 最终排名（1到{top_n}）
+- id: 视频序号（1开始）
+- reason: 简短的推荐理由（15字内）
+- hookText: 视频最吸引人的"钩子文本"或核心卖点（20字内）
+- replicabilityScore: 可复制性评分（1-10分，10分表示非常容易复制，1分表示非常难）
+- keyLearningPoints: 视频中可以学习到的关键技巧或策略（20字内，用逗号分隔）
+- reasonForSuccess: 视频成为爆款的主要原因（30字内）
+
+只输出JSON数组，不要其他文字：
+[{{"rank": 1, "id": 1, "reason": "标题吸引，内容实用", "hookText": "7天涨粉10万实战方法", "replicabilityScore": 8, "keyLearningPoints": "前3秒钩子,清晰框架,强CTA", "reasonForSuccess": "真实案例+详细步骤+可执行建议"}}, ...]
+"""
+
+
+def make_videos(count: int):
+    """模拟 YouTube 候选：描述含链接、章节时间戳、订阅号召和标签"""
+    tools = ['Cursor', 'Copilot', 'Claude', 'ChatGPT', 'Windsurf', 'Aider']
+    videos = []
+    for i in range(count):
+        tool = tools[i % len(tools)]
+        description = (
+            f"🔥 Get 20% off with code CODE{i} → https://sponsor.example.com/{i}\n"
+            f"In this video I build a full-stack app with {tool} and compare how it handles refactoring, "
+            f"tests and multi-file edits. We also look at prompt patterns that cut review time in half.\n"
+            f"00:00 Intro\n01:12 Setup\n05:40 Refactoring demo\n12:03 Verdict\n"
+            f"Subscribe for weekly AI coding videos! Follow me on Twitter https://x.com/dev{i}\n"
+            f"#ai #coding #{tool.lower()} #programming"
+        )
+        videos.append({
+            'platform': 'YouTube',
+            'video_id': f'vid{i}',
+            'title': f'I Built an App with {tool} in 1 Hour (AI Coding Tools Compared) #{i}',
+            'description': description,
+            'author': f'DevChannel{i}',
+            'views': 120000 + i * 37311,
+            'days_ago': i % 60,
+        })
+    return videos
+
+
+def main():
+    videos = make_videos(CANDIDATES)
+    scored = [dict(v, ai_score=95 - i, hook_text='1小时做完整应用') for i, v in enumerate(videos[:SCORED])]
+
+    rows = [
+        ("评分 prompt", legacy_scoring_prompt(videos, TOPIC),
+         scoring_prompt(TOPIC, [format_video_line(i, v) for i, v in enumerate(videos)])),
+        ("排序 prompt", legacy_ranking_prompt(scored, TOPIC, TOP_N),
+         ranking_prompt(TOPIC, TOP_N, [format_rank_line(i, v) for i, v in enumerate(scored)])),
+    ]
+
+    print("=" * 80)
+    print(f"📏 Prompt token 报告（主题: {TOPIC}，{CANDIDATES} 个候选 → {SCORED} 个评分 → Top {TOP_N}）")
+    print("=" * 80)
+    total_before = total_after = 0
+    for label, before, after in rows:
+        b, a = estimate_tokens(before), estimate_tokens(after)
+        total_before += b
+        total_after += a
+        print(f"{label:<12} 旧版: {b:>6} tokens   紧凑: {a:>6} tokens   减少 {1 - a / b:>5.0%}")
+    print("-" * 80)
+    print(f"{'每个主题合计':<10} 旧版: {total_before:>6} tokens   紧凑: {total_after:>6} tokens   "
+          f"减少 {1 - total_after / total_before:>5.0%}")
+
+    print("\n示例视频行（紧凑）:")
+    print(format_video_line(0, videos[0]))
+
+
+if __name__ == '__main__':
+    main()
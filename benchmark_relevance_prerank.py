@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+本地相关性预排序基准测试 - 对比有无预排序时送入模型的视频数和调用次数，以及预排序本身的耗时（本地假模型）
+"""
+import json
+import logging
+import re
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import StubResponse, make_ranker
+
+from video_agent.analyzers import ModelCaller, CircuitBreaker, RelevancePreRanker
+
+TOPIC = 'AI coding tools'
+
+
+class CountingModel:
+    """假模型：统计调用次数和送入的视频数"""
+    
+    model_name = 'models/bench'
+    
+    def __init__(self):
+        self.calls = 0
+        self.videos = 0
+    
+    def generate_content(self, prompt, **kwargs):
+        ids = [int(m) for m in re.findall(r'^(\d+)\. \[', prompt, re.M)]
+        self.calls += 1
+        self.videos += len(ids)
+        return StubResponse(json.dumps([{'id': i, 'score': 75, 'reason': 'ok', 'hook': 'h'} for i in ids]))
+
+
+def make_videos(count: int):
+    """模拟宽泛搜索返回的候选：约 1/3 切题、1/3 沾边、1/3 明显无关"""
+    on_topic = [
+        ('I tested every AI coding tool so you don\'t have to', 'Cursor, Copilot and Aider compared on real coding tasks.',
+         ['ai', 'coding', 'tools']),
+        ('Best AI tools for coding in 2024', 'My favourite AI coding assistants ranked.', ['ai tools', 'programming']),
+    ]
+    borderline = [
+        ('My developer productivity setup', 'Keyboard, terminal, dotfiles and one AI assistant I use daily.',
+         ['setup', 'developer']),
+        ('Building a SaaS in a weekend', 'Live coding a Stripe integration from scratch.', ['saas', 'startup']),
+    ]
+    off_topic = [
+        ('Easy 15 minute pasta', 'Weeknight dinner with garlic, chilli and lemon.', ['cooking', 'recipe']),
+        ('Full body gym workout', 'Push, pull and legs in one session.', ['fitness', 'gym']),
+        ('Tokyo travel vlog', 'Street food, temples and night markets.', ['travel', 'japan']),
+    ]
+    pools = [on_topic, borderline, off_topic]
+    videos = []
+    for i in range(count):
+        pool = pools[i % 3]
+        title, description, tags = pool[(i // 3) % len(pool)]
+        videos.append({
+            'platform': 'YouTube', 'video_id': f'vid{i}', 'title': f'{title} #{i}',
+            'description': description + ' Subscribe for more! https://example.com', 'tags': tags,
+            'author': f'channel{i % 40}', 'views': 200000 + i * 1000, 'days_ago': i % 60,
+        })
+    return videos
+
+
+def run(label: str, count: int, pre_ranker):
+    caller = ModelCaller(deadline_seconds=None, max_retries=0, hedge=False, breaker=CircuitBreaker(failure_threshold=0))
+    ranker = make_ranker(CountingModel(), caller=caller, pre_ranker=pre_ranker)
+    videos = make_videos(count)
+    
+    start = time.perf_counter()
+    ranker.score_relevance(videos, TOPIC, target_count=15)
+    elapsed = time.perf_counter() - start
+    
+    print(f"{count:>6}  {label:<10} 模型调用: {ranker.model.calls:>3}   送入模型: {ranker.model.videos:>5}/{count:<5}   "
+          f"用时: {elapsed * 1000:>7.1f} ms")
+
+
+def main():
+    logging.basicConfig(level=logging.CRITICAL)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [30, 300, 3000]
+    
+    print("=" * 90)
+    print(f"🔎 本地相关性预排序基准测试（主题: {TOPIC}）")
+    print("=" * 90)
+    for count in sizes:
+        run("无预排序", count, None)
+        run("预排序", count, RelevancePreRanker(miss_threshold=0.03, hit_threshold=0.5))
+        print("-" * 90)
+    
+    pre_ranker = RelevancePreRanker()
+    for count in (1000, 10000):
+        videos = make_videos(count)
+        start = time.perf_counter()
+        pre_ranker.similarities(videos, TOPIC)
+        print(f"相似度计算 {count:>6} 个候选: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+规则筛选基准测试 - 对比逐条遍历字典的旧实现与列式向量化实现（1k / 100k / 1M 候选）
+"""
+import logging
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from video_agent.analyzers.rule_filter import RuleFilter, to_columns
+
+MIN_VIEWS = 100000
+MAX_DAYS_AGO = 60
+TARGET_COUNT = 30
+
+
+def make_videos(count: int, seed: int = 42):
+    """生成模拟候选视频（播放量取整到千，制造大量并列）"""
+    rng = random.Random(seed)
+    return [
+        {
+            'platform': 'YouTube' if i % 3 else 'Instagram',
+            'video_id': f'vid{i}',
+            'title': f'Sample video {i}',
+            'views': rng.randrange(0, 2000) * 1000,
+            'likes': rng.randrange(0, 50000),
+            'days_ago': rng.randrange(0, 120),
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_filter(videos, min_views, max_days_ago, target_count):
+    """旧实现：逐条检查、为每个被过滤的视频格式化日志字符串、全量排序"""
+    logger = logging.getLogger('legacy')
+    filtered = []
+    for video in videos:
+        if video['views'] < min_views:
+            logger.debug(f"❌ 播放量不足: {video['title'][:50]} ({video['views']:,} < {min_views:,})")
+            continue
+        if video['days_ago'] > max_days_ago:
+            logger.debug(f"❌ 发布时间过久: {video['title'][:50]} ({video['days_ago']}天 > {max_days_ago}天)")
+            continue
+        filtered.append(video)
+    if len(filtered) > target_count:
+        filtered = sorted(filtered, key=lambda x: x['views'], reverse=True)[:target_count]
+    return filtered
+
+
+def timed(func, repeat: int):
+    """返回最短耗时（毫秒）和最后一次的结果"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def run(count: int):
+    videos = make_videos(count)
+    rule_filter = RuleFilter(min_views=MIN_VIEWS, max_days_ago=MAX_DAYS_AGO)
+    repeat = 5 if count <= 100000 else 2
+
+    legacy_ms, expected = timed(lambda: legacy_filter(videos, MIN_VIEWS, MAX_DAYS_AGO, TARGET_COUNT), repeat)
+    new_ms, actual = timed(lambda: rule_filter.filter(videos, 'bench', TARGET_COUNT), repeat)
+
+    # 拆开列构建和筛选本身：列式批次已就绪时（如来自目录查询）只需后者
+    convert_ms, columns = timed(lambda: to_columns(videos, fields=('views', 'days_ago')), repeat)
+    columnar_ms, _ = timed(lambda: rule_filter.filter_columns(columns, TARGET_COUNT), repeat)
+
+    assert [v['video_id'] for v in actual] == [v['video_id'] for v in expected], "结果与旧实现不一致"
+
+    print(f"{count:>10,}   旧实现: {legacy_ms:>9.2f} ms   列式(含转换): {new_ms:>9.2f} ms "
+          f"(x{legacy_ms / new_ms:>5.1f})   其中列构建: {convert_ms:>8.2f} ms   "
+          f"仅筛选: {columnar_ms:>8.2f} ms (x{legacy_ms / columnar_ms:>6.1f})")
+
+
+def main():
+    # 关闭 INFO 日志，避免 I/O 干扰计时（DEBUG 关闭时新实现不构造逐条日志字符串）
+    logging.basicConfig(level=logging.WARNING)
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 100000, 1000000]
+
+    print("=" * 100)
+    print(f"📊 RuleFilter 基准测试 (播放量≥{MIN_VIEWS:,}, ≤{MAX_DAYS_AGO}天, 取前 {TARGET_COUNT})")
+    print("=" * 100)
+    for count in sizes:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+视频记录内存基准测试 - 对比每个视频一个字典与 __slots__ 的 Video 记录（字节/视频）
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '.')
+
+from video_agent.video import Video
+
+
+def make_fields(i: int) -> dict:
+    """模拟 YouTubeFetcher._parse_video 的输出字段（每个视频独立的字符串）"""
+    video_id = f'vid{i:08d}'
+    return {
+        'platform': 'YouTube',
+        'video_id': video_id,
+        'title': f'Sample video {i} about AI coding',
+        'description': f'A tutorial on AI-assisted coding, part {i}',
+        'url': f'https://www.youtube.com/watch?v={video_id}',
+        'thumbnail': f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg',
+        'views': 100000 + i,
+        'likes': 1000 + i,
+        'comments': 10 + i,
+        'author': f'channel{i % 500}',
+        'author_url': f'https://www.youtube.com/channel/UC{i % 500:08d}',
+        'published_at': '2024-01-01T00:00:00',
+        'days_ago': i % 60,
+        'tags': ['ai', 'coding'],
+        'duration': 'PT10M',
+        'audio_language': 'en',
+        'language': 'en',
+    }
+
+
+def measure(label: str, build, count: int):
+    """返回每个视频占用的字节数（tracemalloc 统计，含字段值）"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    videos = [build(make_fields(i)) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    container = sys.getsizeof(videos[0])
+    print(f"{label:<22} 总计: {current / count:>8.0f} 字节/视频   容器本身: {container:>4} 字节   "
+          f"构建: {elapsed * 1000:>7.0f} ms")
+    del videos
+    return current / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("=" * 90)
+    print(f"📊 视频记录内存基准测试 ({count:,} 个视频)")
+    print("=" * 90)
+
+    before = measure("dict（旧实现）", lambda fields: fields, count)
+    after = measure("Video (__slots__)", Video.from_dict, count)
+
+    print("-" * 90)
+    print(f"每个视频节省 {before - after:.0f} 字节 ({(1 - after / before):.0%})，"
+          f"{count:,} 个视频共节省 {(before - after) * count / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试 AI 评分的缓存：相同 prompt 不重复调用模型，已评分的 (视频, 主题) 不再送入模型，
+评分持久保存后进程重启仍可增量评分（本地假模型）
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import ScoringModel, make_ranker, make_videos
+
+from video_agent.cache import ScoreStore
+
+
+def test_identical_rank_prompt_hits_response_cache():
+    """相同候选和主题的精细排序只调用一次模型"""
+    model = ScoringModel()
+    ranker = make_ranker(model)
+    videos = make_videos(8)
+    for video in videos:
+        video.update(ai_score=80, ai_reason='ok', hook_text='h')
+
+    first = ranker.rank_top_n(videos, 'AI coding', top_n=3)
+    second = ranker.rank_top_n(videos, 'AI coding', top_n=3)
+
+    assert model.kinds == ['rank']
+    assert [v['video_id'] for v in first] == [v['video_id'] for v in second]
+    assert ranker.cache_stats()['responses']['hits'] == 1
+    print("✅ 相同排序 prompt 命中响应缓存")
+
+
+def test_scored_videos_are_not_rescored():
+    """已评分的视频不再送入模型，主题按标准化后的形式匹配，只为新视频调用模型"""
+    model = ScoringModel()
+    ranker = make_ranker(model)
+    ranker.score_relevance(make_videos(5), 'AI coding', target_count=10)
+
+    videos = make_videos(8)
+    ranker.score_relevance(videos, '  ai   Coding ', target_count=10)
+
+    assert model.calls == 2
+    assert model.titles[5:] == ['AI coding video 5', 'AI coding video 6', 'AI coding video 7']
+    assert all(v['ai_score'] == 80 for v in videos)
+    print("✅ 第二次评分只送入 3 个新视频")
+
+
+def test_scores_are_per_topic():
+    """同一视频换一个主题需要重新评分"""
+    model = ScoringModel()
+    ranker = make_ranker(model)
+    ranker.score_relevance(make_videos(3), 'AI coding', target_count=10)
+    ranker.score_relevance(make_videos(3), 'fitness tips', target_count=10)
+
+    assert model.calls == 2
+    assert len(model.titles) == 6
+    print("✅ 评分按主题区分")
+
+
+def test_score_store_survives_restart():
+    """新的 AIRanker（模拟进程重启）从持久评分存储读取已有评分，只为新视频调用模型"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'cache.db')
+        make_ranker(ScoringModel(score=77), score_store=ScoreStore(cache_file)).score_relevance(
+            make_videos(4), 'AI coding', target_count=10)
+
+        model = ScoringModel(score=50)
+        videos = make_videos(6)
+        make_ranker(model, score_store=ScoreStore(cache_file)).score_relevance(videos, 'AI coding', target_count=10)
+
+    assert model.titles == ['AI coding video 4', 'AI coding video 5']
+    assert [v['ai_score'] for v in videos] == [77, 77, 77, 77, 50, 50]
+    print("✅ 重启后复用 4 个持久评分，只评分 2 个新视频")
+
+
+def test_expired_stored_scores_are_rescored():
+    """超过有效期的持久评分不再使用"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'cache.db')
+        ttl_hours = 0.05 / 3600
+        make_ranker(ScoringModel(), score_store=ScoreStore(cache_file), score_ttl_hours=ttl_hours).score_relevance(
+            make_videos(3), 'AI coding', target_count=10)
+        time.sleep(0.1)
+
+        model = ScoringModel()
+        make_ranker(model, score_store=ScoreStore(cache_file), score_ttl_hours=ttl_hours).score_relevance(
+            make_videos(3), 'AI coding', target_count=10)
+
+    assert len(model.titles) == 3
+    print("✅ 过期评分重新送入模型")
+
+
+if __name__ == '__main__':
+    print("🧪 测试 AI 评分缓存\n")
+    test_identical_rank_prompt_hits_response_cache()
+    test_scored_videos_are_not_rescored()
+    test_scores_are_per_topic()
+    test_score_store_survives_restart()
+    test_expired_stored_scores_are_rescored()
+    print("\n✅ 全部通过")
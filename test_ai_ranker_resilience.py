@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+测试 Gemini 调用的截止时间、抖动重试、对冲请求和熔断（使用本地假模型，可注入延迟和错误）
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from google.api_core import exceptions as google_exceptions
+
+from test_stubs import StubModel, make_ranker, make_videos
+
+from video_agent.analyzers import ModelCaller, CircuitBreaker, ModelUnavailableError, ModelTimeoutError
+
+
+def _caller(**kwargs) -> ModelCaller:
+    options = dict(deadline_seconds=2, max_retries=2, backoff_base=0.01, backoff_cap=0.05,
+                   hedge=False, breaker=CircuitBreaker(failure_threshold=0))
+    options.update(kwargs)
+    return ModelCaller(**options)
+
+
+def test_deadline_bounds_slow_call():
+    """模型响应慢于截止时间时按时返回超时"""
+    caller = _caller(deadline_seconds=0.3)
+    model = StubModel(latencies=[2.0])
+
+    start = time.monotonic()
+    try:
+        caller.generate(model, 'prompt')
+        raise AssertionError("应抛出 ModelTimeoutError")
+    except ModelTimeoutError:
+        pass
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.6
+    assert caller.stats()['timeouts'] == 1
+    print(f"✅ 截止时间: {elapsed:.2f}s 后放弃")
+
+
+def test_retries_transient_errors():
+    """限流/服务端错误按抖动退避重试"""
+    caller = _caller()
+    model = StubModel(errors=[google_exceptions.ServiceUnavailable('busy'),
+                              google_exceptions.TooManyRequests('slow down'), None], text='ok')
+
+    assert caller.generate(model, 'prompt') == 'ok'
+    assert model.calls == 3
+    assert caller.stats()['retries'] == 2
+    print(f"✅ 重试: {model.calls} 次调用后成功")
+
+
+def test_does_not_retry_bad_requests():
+    """参数错误不重试"""
+    caller = _caller()
+    model = StubModel(errors=[google_exceptions.InvalidArgument('bad prompt')])
+
+    try:
+        caller.generate(model, 'prompt')
+        raise AssertionError("应抛出 InvalidArgument")
+    except google_exceptions.InvalidArgument:
+        pass
+
+    assert model.calls == 1
+    print("✅ 参数错误不重试")
+
+
+def test_hedged_request_beats_slow_primary():
+    """首个请求慢于对冲等待时间时，对冲请求先返回"""
+    caller = _caller(hedge=True, hedge_delay_seconds=0.1)
+    model = StubModel(latencies=[1.5, 0.05], text='fast')
+
+    start = time.monotonic()
+    assert caller.generate(model, 'prompt') == 'fast'
+    elapsed = time.monotonic() - start
+
+    stats = caller.stats()
+    assert elapsed < 0.5
+    assert stats['hedges'] == 1 and stats['hedge_wins'] == 1
+    print(f"✅ 对冲: {elapsed:.2f}s 返回（首个请求需 1.5s）")
+
+
+def test_hedge_delay_tracks_p95():
+    """样本充足后对冲等待时间取近期延迟的 p95"""
+    caller = _caller(hedge=True, hedge_delay_seconds=5, hedge_min_samples=20)
+    model = StubModel(latencies=[0.01] * 19 + [0.2])
+
+    for _ in range(20):
+        caller.generate(model, 'prompt')
+
+    delay = caller.hedge_delay()
+    assert 0.15 <= delay < 1
+    print(f"✅ p95 对冲等待: {delay:.3f}s")
+
+
+def test_circuit_breaker_short_circuits():
+    """连续失败后熔断，熔断期间不调用模型；到期后探测成功即恢复"""
+    caller = _caller(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.3))
+    model = StubModel(errors=[google_exceptions.ServiceUnavailable('down')] * 2 + [None], text='ok')
+
+    for _ in range(2):
+        try:
+            caller.generate(model, 'prompt')
+        except google_exceptions.ServiceUnavailable:
+            pass
+
+    start = time.monotonic()
+    try:
+        caller.generate(model, 'prompt')
+        raise AssertionError("应抛出 ModelUnavailableError")
+    except ModelUnavailableError:
+        pass
+    assert time.monotonic() - start < 0.05
+    assert model.calls == 2
+    assert caller.stats()['breaker'] == 'open'
+
+    time.sleep(0.35)
+    assert caller.generate(model, 'prompt') == 'ok'
+    assert caller.stats()['breaker'] == 'closed'
+    print("✅ 熔断: 断开期间跳过模型调用，探测成功后恢复")
+
+
+def test_ranker_falls_back_immediately_when_open():
+    """熔断期间 AIRanker 立即降级为播放量排序"""
+    caller = _caller(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    ranker = make_ranker(StubModel(latencies=[0.2], errors=[google_exceptions.ServiceUnavailable('down')]),
+                         caller=caller)
+
+    ranker.score_relevance(make_videos(5), 'topic a', target_count=3)
+
+    start = time.monotonic()
+    results = ranker.score_relevance(make_videos(5), 'topic b', target_count=3)
+    elapsed = time.monotonic() - start
+
+    assert [v['video_id'] for v in results] == ['yo4', 'yo3', 'yo2']
+    assert ranker.model.calls == 1
+    assert elapsed < 0.05
+    print(f"✅ 熔断降级: {elapsed * 1000:.1f} ms 返回播放量排序")
+
+
+if __name__ == '__main__':
+    print("🧪 测试 Gemini 调用可靠性\n")
+    test_deadline_bounds_slow_call()
+    test_retries_transient_errors()
+    test_does_not_retry_bad_requests()
+    test_hedged_request_beats_slow_primary()
+    test_hedge_delay_tracks_p95()
+    test_circuit_breaker_short_circuits()
+    test_ranker_falls_back_immediately_when_open()
+    print("\n✅ 全部通过")
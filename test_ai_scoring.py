@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+测试大候选集分批评分：按 token 预算切分、并发评分、失败批次按播放量补位（本地假模型）
+"""
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import ScoringModel, make_ranker, make_videos
+
+from video_agent import config
+
+
+def test_batch_budget_defaults_to_config():
+    """未指定 score_batch_tokens 时使用 AI_SCORE_BATCH_TOKENS"""
+    ranker = make_ranker()
+    assert ranker.score_batch_tokens == config.AI_SCORE_BATCH_TOKENS
+    print(f"✅ 默认批次预算 {ranker.score_batch_tokens} tokens")
+
+
+def test_failed_chunk_is_backfilled():
+    """多批并发评分，一批失败时其余批次的评分保留，失败批次的视频按播放量补位"""
+    model = ScoringModel(delay=0.3, fail_when=lambda prompt: '] AI coding video 5 |' in prompt)
+    ranker = make_ranker(model, score_parallelism=4)
+    videos = make_videos(200, description='word ' * 200)
+    chunks = ranker._chunk_videos(videos)
+    failed_ids = {v['video_id'] for chunk in chunks if any(v['video_id'] == 'yo5' for v in chunk) for v in chunk}
+
+    start = time.monotonic()
+    results = ranker.score_relevance(videos, 'topic', target_count=len(videos))
+    elapsed = time.monotonic() - start
+
+    assert len(chunks) >= 3
+    assert model.calls == len(chunks)
+    # 并发评分：总耗时明显小于逐批串行
+    assert elapsed < 0.3 * len(chunks) * 0.75
+
+    scored = [v for v in results if 'ai_score' in v]
+    backfill = [v for v in results if 'ai_score' not in v]
+    assert len(scored) == len(videos) - len(failed_ids)
+    assert {v['video_id'] for v in backfill} == failed_ids
+    assert results[-len(backfill):] == backfill
+    assert [v['views'] for v in backfill] == sorted((v['views'] for v in backfill), reverse=True)
+    print(f"✅ {len(chunks)} 批并发评分 {elapsed:.2f}s，失败批次 {len(backfill)} 个视频按播放量补位")
+
+
+if __name__ == '__main__':
+    print("🧪 测试分批评分\n")
+    test_batch_budget_defaults_to_config()
+    test_failed_chunk_is_backfilled()
+    print("\n✅ 全部通过")
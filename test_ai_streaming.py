@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+测试流式 JSON 输出的增量解析：逐项应用评分、跳过损坏元素、保留中断响应的已收到部分（本地假模型）
+"""
+import json
+import random
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import IsolatedAgent, StreamingModel, make_ranker, make_videos
+
+from video_agent import config
+from video_agent.analyzers.json_stream import JSONArrayStreamParser, parse_json_array
+
+
+def _score_chunks(count: int):
+    """每个评分一个片段，外加代码块标记"""
+    items = [json.dumps({'id': i + 1, 'score': 90, 'reason': 'ok', 'hook': 'h'}) for i in range(count)]
+    return ['```json\n['] + [item + (',' if i < count - 1 else '') for i, item in enumerate(items)] + [']\n```']
+
+
+def test_parser_handles_arbitrary_splits():
+    """任意切分的片段都能解析出相同的元素，字符串里的逗号和括号不影响切分"""
+    data = [{'id': i, 'reason': '含,逗号]和"引号"{'} for i in range(20)] + [1, 'x', [1, 2], None]
+    text = '说明文字 ```json\n' + json.dumps(data, ensure_ascii=False) + '\n```'
+    rng = random.Random(7)
+    for _ in range(50):
+        parser = JSONArrayStreamParser()
+        items, pos = [], 0
+        while pos < len(text):
+            step = rng.randint(1, 9)
+            items += parser.feed(text[pos:pos + step])
+            pos += step
+        assert items == data and parser.finished
+    print("✅ 任意切分解析一致")
+
+
+def test_malformed_element_is_skipped():
+    """单个损坏或缺字段的元素被跳过，其余评分照常应用"""
+    text = ('[{"id": 1, "score": 90, "reason": "ok"}, {"id": 2, "score": 9O, "reason": "bad"}, '
+            '{"id": 3, "reason": "no score"}, {"id": 4, "score": 80, "reason": "ok"}]')
+    ranker = make_ranker(StreamingModel([text]), streaming=True)
+    videos = make_videos(4)
+    
+    results = ranker.score_relevance(videos, 'topic', target_count=10)
+    
+    assert [v['video_id'] for v in results] == ['yo0', 'yo3']
+    assert 'ai_score' not in videos[1] and 'ai_score' not in videos[2]
+    print("✅ 损坏元素被跳过，其余 2 个评分保留")
+
+
+def test_stray_closing_brace_fails_whole_response():
+    """顶层多余的 '}' 不会被当作数组结束：解析报错，排序走降级逻辑且不写入缓存"""
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"id": 1}') == []
+    try:
+        parser.feed('}}, {"id": 2}]')
+        raise AssertionError("应抛出 ValueError")
+    except ValueError:
+        pass
+    assert parser.malformed and not parser.finished
+    assert parser.feed(']') == []
+    
+    text = '[{"id": 2, "rank": 1, "reason": "ok"}}, {"id": 1, "rank": 2, "reason": "ok"}]'
+    model = StreamingModel([text[:20], text[20:]])
+    ranker = make_ranker(model, streaming=True)
+    videos = make_videos(5)
+    for video in videos:
+        video['ai_score'] = 80
+    
+    first = ranker.rank_top_n(videos, 'topic', top_n=3)
+    second = ranker.rank_top_n(videos, 'topic', top_n=3)
+    
+    assert len(first) == len(second) == 3
+    assert all('combined_score' in v and 'final_rank' not in v for v in first)
+    assert model.calls == 2
+    print("✅ 结构损坏的响应整体降级，未写入缓存")
+
+
+def test_truncated_stream_keeps_received_scores():
+    """流式响应中途断开时，已到达的评分仍然有效（不降级为播放量排序）"""
+    ranker = make_ranker(StreamingModel(_score_chunks(10), fail_after=6), streaming=True)
+    videos = make_videos(10)
+    
+    results = ranker.score_relevance(videos, 'topic', target_count=10)
+    
+    scored = [v['video_id'] for v in videos if 'ai_score' in v]
+    assert scored == ['yo0', 'yo1', 'yo2', 'yo3', 'yo4']
+    assert len(results) == 5
+    print(f"✅ 响应中断: 保留已收到的 {len(scored)} 个评分")
+
+
+def test_first_score_arrives_before_response_ends():
+    """流式模式下第一个评分在响应结束前就已应用"""
+    model = StreamingModel(_score_chunks(10), delay=0.05)
+    ranker = make_ranker(model, streaming=True)
+    first_at = []
+    start = time.monotonic()
+    
+    ranker.generate_json('prompt', 'score', on_item=lambda item: first_at.append(time.monotonic() - start))
+    total = time.monotonic() - start
+    
+    assert len(first_at) == 10
+    assert first_at[0] < total / 3
+    print(f"✅ 首个评分 {first_at[0]:.2f}s，完整响应 {total:.2f}s")
+
+
+def test_complete_response_is_cached():
+    """完整且无无效元素的响应写入缓存，缓存命中时同样逐项回调"""
+    model = StreamingModel(_score_chunks(3))
+    ranker = make_ranker(model, streaming=True)
+    
+    first = ranker.generate_json('prompt', 'score')
+    replayed = []
+    second = ranker.generate_json('prompt', 'score', on_item=replayed.append)
+    
+    assert first == second == replayed
+    assert model.calls == 1
+    try:
+        parse_json_array('no array here')
+        raise AssertionError("应抛出 ValueError")
+    except ValueError:
+        pass
+    print("✅ 完整响应缓存命中")
+
+
+def test_default_config_hedges_streamed_calls():
+    """默认配置（流式 + 对冲）下，首个片段迟迟不到的请求会被对冲，先产出片段的请求胜出"""
+    assert config.GEMINI_STREAMING and config.GEMINI_HEDGE_ENABLED
+    model = StreamingModel(_score_chunks(5), stalls=[3.0])
+    with IsolatedAgent(model=model, GEMINI_HEDGE_DELAY_SECONDS=0.2) as agent:
+        start = time.monotonic()
+        results = agent.ai_ranker.score_relevance(make_videos(5), 'topic', target_count=5)
+        elapsed = time.monotonic() - start
+        stats = agent.ai_ranker.caller.stats()
+    
+    assert model.calls == 2
+    assert stats['hedges'] == 1 and stats['hedge_wins'] == 1
+    assert elapsed < 2.0
+    assert [v['ai_score'] for v in results] == [90] * 5
+    print(f"✅ 流式调用对冲: {elapsed:.2f}s 得到 {len(results)} 个评分（原请求卡住 3s）")
+
+
+if __name__ == '__main__':
+    print("🧪 测试流式 JSON 输出解析\n")
+    test_parser_handles_arbitrary_splits()
+    test_malformed_element_is_skipped()
+    test_stray_closing_brace_fails_whole_response()
+    test_truncated_stream_keeps_received_scores()
+    test_first_score_arrives_before_response_ends()
+    test_complete_response_is_cached()
+    test_default_config_hedges_streamed_calls()
+    print("\n✅ 全部通过")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+测试异步 Agent：多个主题在同一事件循环上并发搜索、每个上游的并发上限，
+以及超时被放弃的获取在真正结束前继续占用并发名额（本地假模型和假获取器）
+"""
+import asyncio
+import dataclasses
+import sys
+import threading
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, ScoringModel, make_video, make_videos
+
+from video_agent import AsyncVideoSearchAgent
+
+FETCH_SECONDS = 0.8
+TIMEOUT_SECONDS = 0.2
+
+
+class InFlight:
+    """记录获取器同时进行的调用数的延迟函数"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, topic):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.current -= 1
+        return 0.0
+
+
+def _topic_videos(topic):
+    # 标题带主题名，便于核对结果归属
+    return make_videos(4, title=f'{topic} clip')
+
+
+def test_topics_search_concurrently():
+    """三个主题同时搜索，总耗时接近单个主题；获取失败的主题返回空列表，不影响其他主题"""
+    in_flight = InFlight(0.4)
+
+    def videos(topic):
+        if topic == 'broken':
+            raise RuntimeError('upstream down')
+        return _topic_videos(topic)
+
+    youtube = FakeFetcher(videos, delay=in_flight)
+    with IsolatedAgent(youtube=youtube, agent_class=AsyncVideoSearchAgent) as agent:
+        start = time.monotonic()
+        try:
+            results = asyncio.run(agent.asearch_many(['alpha', 'beta', 'broken'], top_n=3))
+        finally:
+            agent.close()
+        elapsed = time.monotonic() - start
+
+    assert in_flight.peak == 3
+    assert elapsed < 0.4 * 3 * 0.7
+    assert [len(results[topic]) for topic in ('alpha', 'beta', 'broken')] == [3, 3, 0]
+    assert all(v['title'] == 'alpha clip' for v in results['alpha'])
+    print(f"✅ 3 个主题并发搜索 {elapsed:.2f}s")
+
+
+def test_upstream_limit_is_respected():
+    """YouTube 并发上限为 1 时，多个主题的 YouTube 请求逐个进行"""
+    in_flight = InFlight(0.1)
+    youtube = FakeFetcher(_topic_videos, delay=in_flight)
+    with IsolatedAgent(youtube=youtube, agent_class=AsyncVideoSearchAgent) as agent:
+        agent.limits['youtube'] = 1
+        try:
+            results = asyncio.run(agent.asearch_many(['alpha', 'beta', 'gamma'], top_n=3))
+        finally:
+            agent.close()
+
+    assert in_flight.peak == 1
+    assert len(youtube.calls) == 3 and all(len(v) == 3 for v in results.values())
+    print("✅ 每个上游的并发上限生效")
+
+
+def test_gemini_limit_covers_every_model_request():
+    """Gemini 上限为 2：三个主题各自并行分批评分，同时进行的模型请求仍不超过 2 个"""
+    words = ['python', 'fitness', 'cooking', 'travel', 'guitar', 'garden', 'camera', 'chess']
+
+    def videos(topic):
+        return [make_video(i, title=f'{topic} {words[i]} {words[(i + 3) % 8]} guide') for i in range(8)]
+
+    model = ScoringModel(delay=0.05)
+    youtube = FakeFetcher(videos)
+    with IsolatedAgent(youtube=youtube, model=model, agent_class=AsyncVideoSearchAgent, use_cache=False,
+                       agent_kwargs={'gemini_concurrency': 2}) as agent:
+        agent.ai_ranker.score_batch_tokens = 150
+        try:
+            results = asyncio.run(agent.asearch_many(['alpha', 'beta', 'gamma'], top_n=3))
+        finally:
+            agent.close()
+
+    assert model.kinds.count('score') > 3
+    assert model.peak_in_flight == 2
+    assert all(len(v) == 3 for v in results.values())
+    print(f"✅ {model.calls} 次模型请求，同时进行不超过 2 个")
+
+
+def test_timed_out_fetch_keeps_its_slot():
+    """YouTube 并发上限为 1：获取超时后仍在后台运行，结束前不会开始新的 YouTube 请求，结束后名额释放"""
+    youtube = FakeFetcher(lambda topic: [], delay=FETCH_SECONDS)
+    with IsolatedAgent(youtube=youtube, agent_class=AsyncVideoSearchAgent) as agent:
+        agent.limits['youtube'] = 1
+        agent.fetcher_plugins = [
+            dataclasses.replace(plugin, timeout_seconds=TIMEOUT_SECONDS) if plugin.name == 'youtube' else plugin
+            for plugin in agent.fetcher_plugins
+        ]
+
+        async def run():
+            # 三次获取都在第一次的阻塞调用结束前超时
+            for i in range(3):
+                await agent._afetch_from_all_platforms(f'topic {i}')
+            during = list(youtube.calls)
+            await asyncio.sleep(FETCH_SECONDS)
+            await agent._afetch_from_all_platforms('topic after')
+            return during
+
+        try:
+            during = asyncio.run(run())
+        finally:
+            agent.close()
+
+    assert during == ['topic 0']
+    assert youtube.calls == ['topic 0', 'topic after']
+    print("✅ 超时被放弃的获取结束前不占用额外并发，结束后名额释放")
+
+
+if __name__ == '__main__':
+    print("🧪 测试异步 Agent\n")
+    test_topics_search_concurrently()
+    test_upstream_limit_is_respected()
+    test_gemini_limit_covers_every_model_request()
+    test_timed_out_fetch_keeps_its_slot()
+    print("\n✅ 全部通过")
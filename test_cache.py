@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+测试缓存层：线程本地 SQLite 连接的释放、内存 LRU 层
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, '.')
+
+from video_agent.cache import CacheManager, LRUCache
+
+
+def _open_fds() -> int:
+    return len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else -1
+
+
+def test_connections_released_when_threads_exit():
+    """短生命周期线程结束后其连接随之关闭，连接数和文件描述符不随线程数增长"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, 'cache.db'), memory_size=0)
+        cache.set('topic', [{'video_id': 'v1'}])
+        fds_before = _open_fds()
+        
+        def work():
+            assert cache.get('topic') == [{'video_id': 'v1'}]
+        
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        
+        assert cache.open_connections() == 1  # 只剩主线程的连接
+        if fds_before >= 0:
+            assert _open_fds() <= fds_before + 2
+        
+        cache.close()
+        assert cache.open_connections() == 0
+    print("✅ 50 个线程结束后只保留 1 个连接")
+
+
+def test_concurrent_threads_keep_own_connections():
+    """并发线程各用各的连接，线程结束后全部释放"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, 'cache.db'), memory_size=0)
+        baseline = cache.open_connections()  # 主线程建表时打开的连接
+        barrier = threading.Barrier(8)
+        counts = []
+        
+        def work(i):
+            cache.set(f'topic{i}', [{'video_id': str(i)}])
+            barrier.wait()
+            counts.append(cache.open_connections())
+            barrier.wait()
+        
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert max(counts) == baseline + 8
+        assert cache.open_connections() == baseline
+        assert cache.get('topic3') == [{'video_id': '3'}]
+        cache.close()
+    print("✅ 并发线程的连接在线程结束后释放")
+
+
+def test_memory_tier_serves_repeat_reads():
+    """重复读取由内存层返回，不访问 SQLite；返回的是副本，修改不影响缓存"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'cache.db')
+        cache = CacheManager(cache_file)
+        cache.set('AI coding', [{'video_id': 'v1'}])
+        
+        # 绕过缓存直接删除磁盘上的行：之后的命中只能来自内存层
+        with sqlite3.connect(cache_file) as conn:
+            conn.execute('DELETE FROM video_cache')
+        
+        first = cache.get('ai coding')
+        first.append({'video_id': 'injected'})
+        assert cache.get('AI coding') == [{'video_id': 'v1'}]
+        assert cache.memory.stats()['hits'] == 2
+        
+        cache.delete('AI coding')
+        assert cache.get('AI coding') is None
+        cache.close()
+    print("✅ 内存层命中不访问 SQLite，删除时两级同时失效")
+
+
+def test_sqlite_hit_fills_memory_tier():
+    """内存层关闭或被清空时从 SQLite 读取，并回填内存层"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, 'cache.db'))
+        cache.set('topic', [{'video_id': 'v1'}])
+        cache.memory.clear()
+        
+        assert cache.get('topic') == [{'video_id': 'v1'}]
+        assert len(cache.memory) == 1
+        cache.close()
+        
+        disabled = CacheManager(os.path.join(directory, 'cache.db'), memory_size=0)
+        assert disabled.get('topic') == [{'video_id': 'v1'}]
+        assert len(disabled.memory) == 0
+        disabled.close()
+    print("✅ SQLite 命中回填内存层")
+
+
+def test_mutating_results_does_not_change_cache():
+    """修改 set 的输入或 get / get_stale 返回的视频字典，不影响之后的内存层和 SQLite 命中"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(os.path.join(directory, 'cache.db'))
+        results = [{'video_id': 'v1', 'views': 10}]
+        cache.set('topic', results)
+        results[0]['views'] = -1
+        
+        cache.get('topic')[0]['ai_score'] = 99  # 内存层命中
+        cache.get_stale('topic')[0][0]['description'] = ''
+        cache.memory.clear()
+        cache.get('topic')[0]['views'] = 0  # SQLite 命中并回填内存层
+        
+        assert cache.get('topic') == [{'video_id': 'v1', 'views': 10}]
+        assert cache.get_stale('topic') == ([{'video_id': 'v1', 'views': 10}], False)
+        cache.close()
+    print("✅ 调用方修改结果不影响缓存")
+
+
+def test_lru_evicts_least_recent_and_expired():
+    """超出条目上限时淘汰最久未使用的条目，过期条目视为未命中"""
+    lru = LRUCache(max_size=2, ttl_seconds=None)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.get('a')
+    lru.set('c', 3)
+    assert lru.get('b') is None and lru.get('a') == 1 and lru.get('c') == 3
+    
+    lru.set('short', 4, ttl_seconds=0.05)
+    time.sleep(0.06)
+    assert lru.get('short') is None
+    assert lru.stats()['misses'] == 2
+    print("✅ LRU 按最近使用和 TTL 淘汰")
+
+
+if __name__ == '__main__':
+    print("🧪 测试缓存层\n")
+    test_connections_released_when_threads_exit()
+    test_concurrent_threads_keep_own_connections()
+    test_memory_tier_serves_repeat_reads()
+    test_sqlite_hit_fills_memory_tier()
+    test_mutating_results_does_not_change_cache()
+    test_lru_evicts_least_recent_and_expired()
+    print("\n✅ 全部通过")
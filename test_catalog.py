@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+测试本地视频目录：去重写入、按索引列查询，以及获取结果自动入库（本地假获取器）
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, make_video, make_videos
+
+from video_agent.analyzers import RuleFilter
+from video_agent.catalog import VideoCatalog
+
+
+def _catalog_videos():
+    return [
+        make_video(0, views=500000, days_ago=5),
+        make_video(1, views=900000, days_ago=90),
+        make_video(2, platform='Instagram', views=150000, days_ago=2),
+        make_video(3, views=50000, days_ago=1),
+    ]
+
+
+def test_upsert_keeps_one_row_per_video():
+    """同一视频重复写入只保留一行，统计数据取最新，字典外的字段原样取回"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        videos = _catalog_videos()
+        videos[0]['duration'] = 'PT10M'
+        catalog.upsert(videos)
+        catalog.upsert([dict(videos[0], views=600000)])
+
+        assert catalog.count() == 4
+        stored = catalog.query(platform='YouTube', min_views=550000, max_days_ago=60)
+        catalog.close()
+
+    assert [(v['video_id'], v['views'], v['duration'], v['days_ago']) for v in stored] == [('yo0', 600000, 'PT10M', 5)]
+    print("✅ 重复写入更新统计数据")
+
+
+def test_query_filters_and_orders():
+    """平台、播放量、发布时间、作者条件组合查询，按播放量降序"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        catalog.upsert(_catalog_videos())
+
+        recent = catalog.query(min_views=100000, max_days_ago=60)
+        youtube = catalog.query(platform='YouTube', order_by='published_at')
+        by_author = catalog.query(author='author1')
+        counted = catalog.count(platform='YouTube', max_days_ago=60)
+        with catalog._connection() as conn:
+            plan = ' '.join(row[-1] for row in conn.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM videos WHERE platform = ? AND views >= ?', ('YouTube', 1)))
+        catalog.close()
+
+    assert [v['video_id'] for v in recent] == ['yo0', 'in2']
+    assert [v['video_id'] for v in youtube] == ['yo3', 'yo0', 'yo1']
+    assert [v['video_id'] for v in by_author] == ['yo1']
+    assert counted == 2
+    assert 'USING INDEX' in plan
+    print("✅ 组合条件查询走索引")
+
+
+def test_rule_filter_matches_in_memory_filter():
+    """目录上的规则筛选与内存中的规则筛选结果一致"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        videos = _catalog_videos()
+        catalog.upsert(videos)
+        rule_filter = RuleFilter(min_views=100000, max_days_ago=60)
+
+        from_catalog = rule_filter.filter_catalog(catalog, target_count=10)
+        in_memory = rule_filter.filter(videos, 'topic', target_count=10)
+        catalog.close()
+
+    assert sorted(v['video_id'] for v in from_catalog) == sorted(v['video_id'] for v in in_memory)
+    print("✅ 目录规则筛选与内存筛选一致")
+
+
+def test_fetched_videos_are_catalogued():
+    """获取器的输出自动写入目录"""
+    youtube = FakeFetcher(make_videos(5))
+    instagram = FakeFetcher(make_videos(3, platform='Instagram'))
+    with IsolatedAgent(youtube=youtube, instagram=instagram) as agent:
+        agent._fetch_from_all_platforms('AI coding')
+        counts = (agent.catalog.count(), agent.catalog.count(platform='Instagram'))
+
+    assert counts == (8, 3)
+    print("✅ 获取结果已入库")
+
+
+if __name__ == '__main__':
+    print("🧪 测试本地视频目录\n")
+    test_upsert_keeps_one_row_per_video()
+    test_query_filters_and_orders()
+    test_rule_filter_matches_in_memory_filter()
+    test_fetched_videos_are_catalogued()
+    print("\n✅ 全部通过")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试近似重复检测：跨平台搬运和重复上传合并为一个候选，缩略图相近的视频按 dHash 合并
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+import numpy as np
+from PIL import Image
+
+from video_agent.analyzers import NearDuplicateDetector, RuleFilter
+
+
+def _video(platform: str, video_id: str, title: str, views: int):
+    return {'platform': platform, 'video_id': video_id, 'title': title, 'description': '',
+            'url': f'https://example.com/{video_id}', 'author': 'a', 'views': views, 'days_ago': 1}
+
+
+def test_cross_platform_copies_collapse():
+    """Shorts / Reels / 搬运副本合并，保留播放量最高的一份并记录其余副本"""
+    videos = [
+        _video('YouTube', 'yt1', 'I built a full app with Cursor in 1 hour #shorts', 500000),
+        _video('Instagram', 'ig1', 'I built a full app with Cursor in 1 hour 🚀 #ai #coding', 800000),
+        _video('YouTube', 'yt2', 'I BUILT A FULL APP WITH CURSOR IN 1 HOUR (reupload)', 300000),
+        _video('YouTube', 'yt3', 'Cursor vs Copilot: which AI editor wins?', 400000),
+    ]
+    
+    results = NearDuplicateDetector().dedupe(videos)
+    
+    assert [v['video_id'] for v in results] == ['ig1', 'yt3']
+    assert [c['video_id'] for c in results[0]['duplicates']] == ['yt1', 'yt2']
+    print("✅ 3 个副本合并为 1 个")
+
+
+def test_similar_but_distinct_titles_are_kept():
+    """只差一个关键词的不同视频、过短的通用标题和占位标题不合并"""
+    videos = [
+        _video('YouTube', 'a', 'How I use ChatGPT for coding in 2024', 300000),
+        _video('YouTube', 'b', 'How I use ChatGPT for cooking in 2024', 300000),
+        _video('YouTube', 'c', 'Morning routine', 300000),
+        _video('YouTube', 'd', 'Morning routine', 300000),
+        _video('Instagram', 'e', 'Video by alice', 300000),
+        _video('Instagram', 'f', 'Video by alice', 300000),
+    ]
+    
+    results = NearDuplicateDetector().dedupe(videos)
+    
+    assert len(results) == 6
+    print("✅ 不同内容保持独立")
+
+
+def test_cached_thumbnails_match():
+    """标题不同但本地缓存的缩略图相近时合并"""
+    rng = np.random.default_rng(0)
+    base = (rng.random((90, 160)) * 255).astype(np.uint8)
+    other = (rng.random((90, 160)) * 255).astype(np.uint8)
+    with tempfile.TemporaryDirectory() as directory:
+        Image.fromarray(base).save(os.path.join(directory, 'youtube_yt1.jpg'))
+        # 重新编码 + 轻微亮度变化，模拟另一平台转码后的缩略图
+        Image.fromarray(np.clip(base.astype(int) + 8, 0, 255).astype(np.uint8)).resize((320, 180)).save(
+            os.path.join(directory, 'instagram_ig1.jpg'), quality=70)
+        Image.fromarray(other).save(os.path.join(directory, 'youtube_yt2.jpg'))
+        videos = [
+            _video('YouTube', 'yt1', 'Watch till the end', 500000),
+            _video('Instagram', 'ig1', 'wait for it 😂', 200000),
+            _video('YouTube', 'yt2', 'Something else entirely', 100000),
+        ]
+        
+        results = NearDuplicateDetector(thumbnail_dir=directory).dedupe(videos)
+    
+    assert [v['video_id'] for v in results] == ['yt1', 'yt2']
+    print("✅ 缩略图 dHash 匹配")
+
+
+def test_candidate_budget_spent_on_distinct_content():
+    """去重后规则筛选的固定名额全部用于不同内容"""
+    videos = []
+    for i in range(10):
+        title = f'Viral clip number {i} everyone is talking about'
+        videos += [_video(platform, f'{platform}{i}', title, 1000000 - i * 1000)
+                   for platform in ('YouTube', 'Instagram', 'TikTok')]
+    
+    rule_filter = RuleFilter(min_views=0, max_days_ago=60)
+    before = rule_filter.filter(videos, 'topic', target_count=6)
+    after = rule_filter.filter(NearDuplicateDetector().dedupe(videos), 'topic', target_count=6)
+    
+    assert len({v['title'] for v in before}) == 2
+    assert len({v['title'] for v in after}) == 6
+    print("✅ 6 个名额: 去重前 2 个不同内容，去重后 6 个")
+
+
+def test_ineligible_original_does_not_hide_eligible_copy():
+    """发布过久的原视频播放量更高，但保留的一份取自满足规则的搬运副本"""
+    from test_stubs import IsolatedAgent
+    
+    original = _video('YouTube', 'yt1', 'I built a full app with Cursor in 1 hour', 900000)
+    original['days_ago'] = 365
+    reupload = _video('Instagram', 'ig1', 'I built a full app with Cursor in 1 hour #reels', 300000)
+    
+    with IsolatedAgent() as agent:
+        results = agent.rule_filter.filter(agent._dedupe([original, reupload]), 'topic', target_count=10)
+    
+    assert [v['video_id'] for v in results] == ['ig1']
+    assert [c['video_id'] for c in results[0]['duplicates']] == ['yt1']
+    print("✅ 不达标的原视频不会挡住达标的副本")
+
+
+if __name__ == '__main__':
+    print("🧪 测试近似重复检测\n")
+    test_cross_platform_copies_collapse()
+    test_similar_but_distinct_titles_are_kept()
+    test_cached_thumbnails_match()
+    test_candidate_budget_spent_on_distinct_content()
+    test_ineligible_original_does_not_hide_eligible_copy()
+    print("\n✅ 全部通过")
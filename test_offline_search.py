@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试本地目录的全文检索与离线搜索：BM25 排序、词干匹配、索引随标题更新，
+以及 OFFLINE_SEARCH=first / only 时不请求平台（本地假模型和假获取器）
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, ScoringModel, make_video, make_videos
+
+from video_agent import FetchedBatch, FinalRanking
+from video_agent.catalog import VideoCatalog
+
+
+def _library():
+    return [
+        make_video(0, title='Cooking pasta at home', description='a python coding detour'),
+        make_video(1, title='Python coding for beginners'),
+        make_video(2, title='Learn to code in Python', views=900000),
+        make_video(3, title='Morning yoga', tags=['python']),
+        make_video(4, title='Garden tour', days_ago=400),
+    ]
+
+
+def test_title_match_outranks_description_match():
+    """标题命中排在标签和描述命中之前；coding 与 code 词干相同"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        catalog.upsert(_library())
+        python_hits = catalog.search('python')
+        code_hits = catalog.search('code')
+        catalog.close()
+
+    assert {v['video_id'] for v in python_hits[:2]} == {'yo1', 'yo2'}
+    assert [v['video_id'] for v in python_hits[2:]] == ['yo3', 'yo0']
+    assert all(a['fts_score'] >= b['fts_score'] for a, b in zip(python_hits, python_hits[1:]))
+    assert {v['video_id'] for v in code_hits} == {'yo0', 'yo1', 'yo2'}
+    print("✅ BM25 按字段权重排序，词干匹配生效")
+
+
+def test_filters_and_index_updates():
+    """检索结果同样受播放量和发布时间约束；标题更新后索引随之更新"""
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        catalog.upsert(_library())
+        popular = catalog.search('python', min_views=100000)
+        recent = catalog.search('garden', max_days_ago=60)
+
+        catalog.upsert([make_video(3, title='Evening stretching')])
+        old_title = catalog.search('yoga')
+        new_title = catalog.search('stretching')
+        catalog.close()
+
+    assert [v['video_id'] for v in popular] == ['yo2']
+    assert recent == []
+    assert old_title == [] and [v['video_id'] for v in new_title] == ['yo3']
+    print("✅ 检索带规则条件，标题更新后索引同步")
+
+
+def test_stats_refresh_does_not_rewrite_index():
+    """只刷新播放量时全文索引不被重写；文本变化时才更新"""
+    def index_blocks(catalog):
+        with catalog._connection() as conn:
+            return conn.execute('SELECT rowid, block FROM videos_fts_data ORDER BY rowid').fetchall()
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = VideoCatalog(os.path.join(directory, 'catalog.db'))
+        catalog.upsert(_library())
+        before = index_blocks(catalog)
+        catalog.upsert([dict(v, views=v['views'] * 2, likes=99) for v in _library()])
+        after_refresh = index_blocks(catalog)
+        catalog.upsert([make_video(3, title='Evening stretching')])
+        after_edit = index_blocks(catalog)
+        catalog.close()
+
+    assert after_refresh == before
+    assert after_edit != before
+    print("✅ 刷新播放量不重写全文索引")
+
+
+def test_search_offline_does_not_fetch():
+    """离线搜索只查本地目录：不请求平台，英文主题也不调用模型"""
+    model = ScoringModel()
+    youtube = FakeFetcher(make_videos(5))
+    with IsolatedAgent(youtube=youtube, model=model) as agent:
+        agent.catalog.upsert(_library())
+        results = agent.search_offline('python coding', top_n=2)
+
+    assert len(results) == 2 and {v['video_id'] for v in results} <= {'yo0', 'yo1', 'yo2', 'yo3'}
+    assert 'fts_score' in results[0]
+    assert youtube.calls == [] and model.calls == 0
+    print("✅ 离线搜索不请求平台、不调用模型")
+
+
+def test_offline_first_skips_fetchers_when_catalog_suffices():
+    """OFFLINE_SEARCH=first：目录候选充足时只产出 Catalog 批次，不足时照常请求平台"""
+    youtube = FakeFetcher(make_videos(5))
+    with IsolatedAgent(youtube=youtube, use_cache=False,
+                       OFFLINE_SEARCH='first', OFFLINE_MIN_CANDIDATES=3) as agent:
+        agent.catalog.upsert(_library())
+        enough = list(agent.search_stream('python', top_n=2))
+        fetched_before = list(youtube.calls)
+        scarce = list(agent.search_stream('garden', top_n=2))
+
+    batches = [e for e in enough if isinstance(e, FetchedBatch)]
+    assert [b.platform for b in batches] == ['Catalog'] and len(batches[0].videos) == 4
+    assert fetched_before == []
+    assert len(enough[-1].videos) == 2
+    assert youtube.calls == ['garden']
+    assert {e.platform for e in scarce if isinstance(e, FetchedBatch)} == {'YouTube', 'Instagram'}
+    print("✅ 目录候选充足时跳过平台请求")
+
+
+def test_offline_only_answers_from_catalog():
+    """OFFLINE_SEARCH=only：search_stream 只产出一个来自目录的 FinalRanking"""
+    youtube = FakeFetcher(make_videos(5))
+    with IsolatedAgent(youtube=youtube, use_cache=False, OFFLINE_SEARCH='only') as agent:
+        agent.catalog.upsert(_library())
+        events = list(agent.search_stream('yoga', top_n=5))
+
+    assert len(events) == 1 and isinstance(events[0], FinalRanking)
+    assert [v['video_id'] for v in events[0].videos] == ['yo3']
+    assert youtube.calls == []
+    print("✅ 纯离线模式只查本地目录")
+
+
+if __name__ == '__main__':
+    print("🧪 测试离线搜索\n")
+    test_title_match_outranks_description_match()
+    test_filters_and_index_updates()
+    test_stats_refresh_does_not_rewrite_index()
+    test_search_offline_does_not_fetch()
+    test_offline_first_skips_fetchers_when_catalog_suffices()
+    test_offline_only_answers_from_catalog()
+    print("\n✅ 全部通过")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试 prompt 压缩：描述摘要去掉链接、时间戳、号召和重复句并限制 token，
+排序 prompt 不重发描述，prompt token 按调用类型统计（本地假模型）
+"""
+import sys
+
+sys.path.insert(0, '.')
+
+from test_stubs import ScoringModel, make_ranker, make_video, make_videos
+
+from video_agent.analyzers.prompts import (
+    compact_description, estimate_tokens, format_count, format_rank_line, format_video_line
+)
+
+NOISY_DESCRIPTION = """Learn how to refactor a legacy Django app with Copilot.
+https://example.com/course
+00:00 Intro
+02:15 Setup
+Don't forget to subscribe and turn on notifications!
+Use code SAVE20 for 20% off.
+We compare pytest fixtures against unittest mocks.
+Learn how to refactor a legacy Django app with Copilot.
+#ai #coding #python"""
+
+
+def test_description_keeps_only_informative_sentences():
+    """链接、章节时间戳、订阅/优惠码号召、纯标签和重复句都被去掉，保留句子按原顺序"""
+    summary = compact_description(NOISY_DESCRIPTION, title='AI coding tutorial', max_tokens=40)
+
+    assert summary == ('Learn how to refactor a legacy Django app with Copilot. '
+                       'We compare pytest fixtures against unittest mocks.')
+    assert compact_description(NOISY_DESCRIPTION, max_tokens=0) == ''
+    assert compact_description('', 'title') == ''
+    print("✅ 描述摘要只保留有信息量的句子")
+
+
+def test_description_respects_token_budget():
+    """摘要（含拼接空格和省略号）不超过 token 上限；第一句就超出时按字符截断"""
+    long_sentence = 'Detailed walkthrough of ' + ' '.join(f'topic{i}' for i in range(80))
+    description = '\n'.join(f'Sentence {i} covers keyword{i} and concept{i}.' for i in range(30))
+
+    for max_tokens in (5, 20, 21, 40):
+        assert estimate_tokens(compact_description(description, max_tokens=max_tokens)) <= max_tokens
+    for max_tokens in (1, 5, 10):
+        truncated = compact_description(long_sentence, max_tokens=max_tokens)
+        assert truncated.endswith('…') and estimate_tokens(truncated) <= max_tokens
+    print("✅ 摘要受 token 上限约束")
+
+
+def test_video_and_rank_lines():
+    """评分行带紧凑数量和描述摘要；排序行只带评分和钩子，不重发描述"""
+    video = make_video(0, title='AI coding ' * 20, views=1234567, description=NOISY_DESCRIPTION)
+    video.update(ai_score=88, hook_text='10 分钟上手')
+
+    line = format_video_line(0, video)
+    header, summary = line.split('\n')
+    assert header.startswith('1. [YouTube] AI coding') and '| 1.2M | 3天' in header
+    assert len(video['title'][:100]) == 100 and 'https://' not in line and 'subscribe' not in line
+    assert summary.strip().startswith('Learn how to refactor')
+    assert '\n' not in format_video_line(0, make_video(1))
+
+    rank_line = format_rank_line(4, video)
+    assert rank_line.startswith('5. [YouTube]') and rank_line.endswith('| 88 | 10 分钟上手')
+    assert 'Django' not in rank_line
+    assert [format_count(v) for v in (999, 15400, 2_500_000)] == ['999', '15K', '2.5M']
+    print("✅ 评分行和排序行格式正确")
+
+
+def test_prompt_tokens_are_tracked_and_bounded():
+    """按调用类型统计 prompt token；长描述对评分 prompt 的影响受摘要上限约束"""
+    def score_tokens(description_tokens):
+        ranker = make_ranker(ScoringModel(), description_tokens=description_tokens)
+        videos = make_videos(10, description=NOISY_DESCRIPTION * 20)
+        ranker.score_relevance(videos, 'AI coding', target_count=10)
+        ranker.rank_top_n(videos, 'AI coding', top_n=3)
+        return ranker.prompt_token_stats()
+
+    without = score_tokens(0)
+    capped = score_tokens(40)
+
+    assert without['score']['calls'] == 1 and without['rank']['calls'] == 1
+    assert without['score']['per_call'] == without['score']['tokens']
+    assert 0 < capped['score']['tokens'] - without['score']['tokens'] <= 10 * (40 + 2)
+    assert capped['rank']['tokens'] == without['rank']['tokens']
+    print(f"✅ 评分 prompt {without['score']['tokens']} → {capped['score']['tokens']} tokens（10 个长描述）")
+
+
+if __name__ == '__main__':
+    print("🧪 测试 prompt 压缩\n")
+    test_description_keeps_only_informative_sentences()
+    test_description_respects_token_budget()
+    test_video_and_rank_lines()
+    test_prompt_tokens_are_tracked_and_bounded()
+    print("\n✅ 全部通过")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+测试本地相关性预排序：明显无关的视频不送入模型，只有模糊的一段调用 AI 评分（本地假模型）
+"""
+import sys
+
+sys.path.insert(0, '.')
+
+from test_stubs import make_ranker, make_video
+
+from video_agent.analyzers import RelevancePreRanker
+
+
+def _videos():
+    return [
+        make_video(0, title='AI coding tools', description='AI coding tools', tags=['ai', 'coding', 'tools']),
+        make_video(1, title='Cursor review after one month', description='Is this AI editor worth it for coding?'),
+        make_video(2, title='Easy pasta recipe', description='Dinner in 15 minutes', tags=['cooking']),
+        make_video(3, title='Morning gym routine', description='Leg day workout', tags=['fitness']),
+    ]
+
+
+def test_clear_misses_are_not_sent_to_model():
+    """明显无关的视频直接剪除，明显相关的直接保留，只有模糊的一段调用模型"""
+    ranker = make_ranker(pre_ranker=RelevancePreRanker(miss_threshold=0.03, hit_threshold=0.5))
+    videos = _videos()
+    
+    results = ranker.score_relevance(videos, 'AI coding tools', target_count=10)
+    
+    assert ranker.model.titles == ['Cursor review after one month']
+    assert [v['video_id'] for v in results] == ['yo0', 'yo1']
+    assert videos[2]['ai_score'] < 30 and videos[3]['ai_score'] < 30
+    assert ranker.cache_stats()['pre_rank'] == {'hits': 1, 'ambiguous': 1, 'misses': 2}
+    print("✅ 4 个候选只有 1 个送入模型")
+
+
+def test_no_shared_terms_sends_everything():
+    """主题与所有候选都没有共同词时（如语言不同）不做预判"""
+    ranker = make_ranker(pre_ranker=RelevancePreRanker())
+    videos = _videos()
+    
+    ranker.score_relevance(videos, '人工智能编程', target_count=10)
+    
+    assert len(ranker.model.titles) == 4
+    print("✅ 无共同词时全部交给模型")
+
+
+def test_multi_topic_scoring_uses_pre_ranker():
+    """多主题合并评分同样只把模糊的 (视频, 主题) 组合送入模型"""
+    ranker = make_ranker(pre_ranker=RelevancePreRanker(miss_threshold=0.03, hit_threshold=0.5))
+    
+    results = ranker.score_relevance_many({'AI coding tools': _videos(), 'pasta recipe': _videos()},
+                                          target_count=10)
+    
+    assert [v['video_id'] for v in results['AI coding tools']] == ['yo0', 'yo1']
+    assert [v['video_id'] for v in results['pasta recipe']] == ['yo2']
+    assert len(ranker.model.titles) == 1
+    print(f"✅ 多主题: 8 个组合中 {len(ranker.model.titles)} 个送入模型")
+
+
+def test_disabled_pre_ranker_scores_everything():
+    """未配置预排序器时行为不变"""
+    ranker = make_ranker()
+    
+    ranker.score_relevance(_videos(), 'AI coding tools', target_count=10)
+    
+    assert len(ranker.model.titles) == 4
+    print("✅ 关闭预排序时全部评分")
+
+
+if __name__ == '__main__':
+    print("🧪 测试本地相关性预排序\n")
+    test_clear_misses_are_not_sent_to_model()
+    test_no_shared_terms_sends_everything()
+    test_multi_topic_scoring_uses_pre_ranker()
+    test_disabled_pre_ranker_scores_everything()
+    print("\n✅ 全部通过")
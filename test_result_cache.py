@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试结果缓存的快速路径：缓存命中时不翻译、不请求平台；过期结果先返回再在后台刷新（本地假模型和假获取器）
+"""
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, ScoringModel, make_video, make_videos
+
+from video_agent import config
+
+
+def _expire(agent, topic: str):
+    """把主题的缓存条目改为 1 小时前过期，并清空内存层"""
+    expired = (datetime.now() - timedelta(hours=1)).isoformat()
+    with sqlite3.connect(config.CACHE_FILE) as conn:
+        conn.execute('UPDATE video_cache SET expires_at = ? WHERE query_key = ?',
+                     (expired, agent.cache._make_key(topic)))
+    agent.cache.memory.clear()
+
+
+def _wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.02)
+
+
+def test_cache_hit_skips_translation_and_network():
+    """中文搜索词缓存命中时直接返回：不调用模型翻译，也不请求任何平台"""
+    model = ScoringModel()
+    youtube = FakeFetcher(make_videos(5))
+    with IsolatedAgent(youtube=youtube, model=model) as agent:
+        agent.cache.set('自媒体运营', [make_video(0)])
+        results = agent.search('自媒体运营', top_n=5)
+
+    assert [v['video_id'] for v in results] == ['yo0']
+    assert model.calls == 0 and youtube.calls == []
+    print("✅ 缓存命中不等待翻译和网络")
+
+
+def test_stale_result_returned_then_refreshed():
+    """过期结果立即返回，后台只刷新一次，刷新完成后缓存为新结果"""
+    youtube = FakeFetcher(make_videos(3, title='fresh video'), delay=0.5)
+    with IsolatedAgent(youtube=youtube, CACHE_STALE_WHILE_REVALIDATE=True) as agent:
+        agent.cache.set('AI coding', [make_video(9, title='old video')])
+        _expire(agent, 'AI coding')
+
+        start = time.monotonic()
+        first = agent.search('AI coding', top_n=5)
+        second = agent.search('AI coding', top_n=5)
+        elapsed = time.monotonic() - start
+
+        _wait_until(lambda: not agent._refreshing)
+        refreshed = agent.cache.get('AI coding')
+
+    assert elapsed < 0.3
+    assert [v['title'] for v in first] == [v['title'] for v in second] == ['old video']
+    assert youtube.calls == ['AI coding']
+    assert {v['title'] for v in refreshed} == {'fresh video'}
+    print(f"✅ 过期结果 {elapsed * 1000:.0f} ms 返回，后台刷新 1 次")
+
+
+def test_stale_disabled_refetches():
+    """关闭 stale-while-revalidate 时过期结果不再使用"""
+    youtube = FakeFetcher(make_videos(3, title='fresh video'))
+    with IsolatedAgent(youtube=youtube, CACHE_STALE_WHILE_REVALIDATE=False) as agent:
+        agent.cache.set('AI coding', [make_video(9, title='old video')])
+        _expire(agent, 'AI coding')
+        results = agent.search('AI coding', top_n=5)
+
+    assert {v['title'] for v in results} == {'fresh video'}
+    print("✅ 未启用时过期结果重新搜索")
+
+
+def test_close_waits_for_refresh_and_stops_workers():
+    """关闭 Agent 时等待后台刷新写完缓存，获取、评分和刷新线程全部退出"""
+    prefixes = ('fetch-', 'ai-score', 'model-call', 'refresh-', 'youtube-details')
+    before = set(threading.enumerate())
+    youtube = FakeFetcher(make_videos(3, title='fresh video'), delay=0.3)
+    with IsolatedAgent(youtube=youtube, CACHE_STALE_WHILE_REVALIDATE=True) as agent:
+        agent.cache.set('AI coding', [make_video(9, title='old video')])
+        _expire(agent, 'AI coding')
+        agent.search('AI coding', top_n=5)
+        refresh_threads = list(agent._refresh_threads)
+
+    assert refresh_threads and not any(t.is_alive() for t in refresh_threads)
+    assert youtube.calls == ['AI coding']
+    assert not [t.name for t in set(threading.enumerate()) - before if t.name.startswith(prefixes)]
+    print("✅ 关闭时等待后台刷新，工作线程全部退出")
+
+
+if __name__ == '__main__':
+    print("🧪 测试结果缓存快速路径\n")
+    test_cache_hit_skips_translation_and_network()
+    test_stale_result_returned_then_refreshed()
+    test_stale_disabled_refetches()
+    test_close_waits_for_refresh_and_stops_workers()
+    print("\n✅ 全部通过")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+测试向量化规则筛选：与逐条筛选加稳定排序的结果一致、播放量相同时保持原顺序、过滤统计和按平台筛选
+"""
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '.')
+
+from test_stubs import make_video
+
+from video_agent.analyzers import RuleFilter
+from video_agent.analyzers.rule_filter import to_columns, top_k_by_views
+
+
+def _naive_filter(videos, min_views, max_days_ago, target_count):
+    """逐条判断规则，超出目标数量时按播放量稳定降序截取"""
+    passed = [v for v in videos if v['views'] >= min_views and v['days_ago'] <= max_days_ago]
+    if len(passed) > target_count:
+        passed = sorted(passed, key=lambda v: v['views'], reverse=True)[:target_count]
+    return passed
+
+
+def _random_videos(count, seed):
+    rng = random.Random(seed)
+    return [
+        make_video(i, platform=rng.choice(['YouTube', 'Instagram']),
+                   views=rng.choice([0, 50000, 200000, 200000, 500000, 1000000]) + rng.randrange(3),
+                   days_ago=rng.randrange(120))
+        for i in range(count)
+    ]
+
+
+def test_matches_naive_filter():
+    """多组随机数据上与逐条筛选的结果（含顺序）完全一致"""
+    rule_filter = RuleFilter(min_views=200000, max_days_ago=60)
+    for seed in range(20):
+        videos = _random_videos(300, seed)
+        for target_count in (0, 1, 10, 50, 1000):
+            expected = _naive_filter(videos, 200000, 60, target_count)
+            actual = rule_filter.filter(videos, 'topic', target_count=target_count)
+            assert [v['video_id'] for v in actual] == [v['video_id'] for v in expected], (seed, target_count)
+    print("✅ 与逐条筛选结果一致")
+
+
+def test_ties_keep_original_order():
+    """播放量相同的视频在截断边界上保留靠前的，并保持原顺序"""
+    views = np.array([5, 9, 5, 7, 5, 9, 1])
+    selected = top_k_by_views(views, np.arange(len(views)), 4)
+    assert selected.tolist() == [1, 5, 3, 0]
+    assert top_k_by_views(views, np.array([0, 2, 4]), 2).tolist() == [0, 2]
+    assert top_k_by_views(views, np.arange(len(views)), 0).tolist() == []
+    print("✅ 同播放量保持原顺序")
+
+
+def test_stats_and_platform_filter():
+    """过滤统计与逐条计数一致；按平台筛选只保留该平台"""
+    videos = [
+        make_video(0, views=100, days_ago=1),
+        make_video(1, views=300000, days_ago=90),
+        make_video(2, views=100, days_ago=90),
+        make_video(3, platform='Instagram', views=400000, days_ago=3),
+        make_video(4, views=250000, days_ago=5),
+        {'platform': 'YouTube', 'video_id': 'missing', 'title': 'no stats'},
+    ]
+    rule_filter = RuleFilter(min_views=200000, max_days_ago=60)
+    columns = to_columns(videos)
+
+    selected, stats = rule_filter.filter_columns(columns, target_count=10)
+    youtube, _ = rule_filter.filter_columns(columns, target_count=10, platform='YouTube')
+
+    assert selected.tolist() == [3, 4]
+    assert stats == {'views': 3, 'time': 1, 'passed': 2}
+    assert youtube.tolist() == [4]
+    assert rule_filter.passes(videos).tolist() == [False, False, False, True, True, False]
+    print("✅ 过滤统计与按平台筛选正确")
+
+
+def test_columns_fill_missing_fields():
+    """缺字段或值为 None 的视频按缺失值补齐，其余列不受影响"""
+    videos = [make_video(0, views=300000, days_ago=2), dict(make_video(1), views=None),
+              {'video_id': 'bare', 'days_ago': 4}]
+    columns = to_columns(videos)
+    
+    assert columns['views'].tolist() == [300000, 0, 0]
+    assert columns['days_ago'].tolist() == [2, videos[1]['days_ago'], 4]
+    assert columns['platform'].tolist() == ['YouTube', 'YouTube', '']
+    assert columns['views'].dtype == np.int64
+    print("✅ 缺失字段按默认值补齐")
+
+
+if __name__ == '__main__':
+    print("🧪 测试向量化规则筛选\n")
+    test_matches_naive_filter()
+    test_ties_keep_original_order()
+    test_stats_and_platform_filter()
+    test_columns_fill_missing_fields()
+    print("\n✅ 全部通过")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+测试多主题批量搜索：每个主题都有结果产出，最后完成的主题无候选时已缓冲的主题仍会评分（本地假获取器和假模型）
+"""
+import sys
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, ScoringModel, make_video
+
+
+def _videos_for(topic):
+    # slow 主题的视频全部超过发布时间上限，规则筛选后为空；各主题视频ID不同（避免跨主题合并）
+    offset = sum(map(ord, topic)) * 10
+    return [make_video(offset + i, days_ago=999 if topic == 'slow' else 3) for i in range(5)]
+
+
+def test_empty_last_topic_flushes_buffered_batch():
+    """最后完成的主题规则筛选后为空时，之前缓冲的主题仍然评分并产出"""
+    youtube = FakeFetcher(_videos_for, delay=lambda topic: 0.3 if topic == 'slow' else 0.0)
+    model = ScoringModel()
+    with IsolatedAgent(youtube=youtube, model=model, use_cache=False, SEARCH_MANY_TOPICS_PER_BATCH=4) as agent:
+        results = dict(agent.search_many(['alpha', 'beta', 'slow'], top_n=3))
+
+    assert set(results) == {'alpha', 'beta', 'slow'}
+    assert len(results['alpha']) == 3 and len(results['beta']) == 3
+    assert results['slow'] == []
+    assert 'score' in model.kinds
+    print("✅ 最后一个主题为空时缓冲的主题照常产出")
+
+
+def test_every_topic_is_yielded_once():
+    """批次大小小于主题数时，每个主题恰好产出一次"""
+    youtube = FakeFetcher(_videos_for)
+    with IsolatedAgent(youtube=youtube, use_cache=False, SEARCH_MANY_TOPICS_PER_BATCH=2) as agent:
+        topics = [topic for topic, _ in agent.search_many(['a', 'b', 'c', 'slow', 'd'], top_n=2)]
+
+    assert sorted(topics) == ['a', 'b', 'c', 'd', 'slow']
+    print("✅ 5 个主题各产出一次")
+
+
+if __name__ == '__main__':
+    print("🧪 测试多主题批量搜索\n")
+    test_empty_last_topic_flushes_buffered_batch()
+    test_every_topic_is_yielded_once()
+    print("\n✅ 全部通过")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+测试 search_stream 的进度事件：先完成的平台先产出、事件顺序、缓存命中、获取失败与超时（本地假模型和假获取器）
+"""
+import dataclasses
+import sys
+import time
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, make_videos
+
+from video_agent import FetchedBatch, FilterDone, FinalRanking, ScoredBatch
+
+
+def _kinds(events):
+    return [type(event).__name__ for event in events]
+
+
+def test_events_arrive_in_pipeline_order():
+    """快的平台先产出，随后是筛选、评分和最终排序；首个事件不等慢的平台"""
+    youtube = FakeFetcher(make_videos(6), delay=0.4)
+    instagram = FakeFetcher(make_videos(4, platform='Instagram'))
+    with IsolatedAgent(youtube=youtube, instagram=instagram) as agent:
+        start = time.monotonic()
+        events = []
+        first_at = None
+        for event in agent.search_stream('AI coding', top_n=3):
+            if first_at is None:
+                first_at = time.monotonic() - start
+            events.append(event)
+
+    assert _kinds(events) == ['FetchedBatch', 'FetchedBatch', 'FilterDone', 'ScoredBatch', 'FinalRanking']
+    assert [e.platform for e in events[:2]] == ['Instagram', 'YouTube']
+    assert first_at < 0.3
+    assert all(e.topic == 'AI coding' for e in events)
+    assert events[2].total == 10
+    assert len(events[-1].videos) == 3 and not events[-1].from_cache
+    print(f"✅ 首个事件 {first_at * 1000:.0f} ms，事件顺序正确")
+
+
+def test_cache_hit_yields_only_final_ranking():
+    """缓存命中时只产出 FinalRanking(from_cache=True)"""
+    youtube = FakeFetcher(make_videos(6))
+    with IsolatedAgent(youtube=youtube) as agent:
+        list(agent.search_stream('AI coding', top_n=3))
+        events = list(agent.search_stream('AI coding', top_n=3))
+
+    assert len(events) == 1 and isinstance(events[0], FinalRanking)
+    assert events[0].from_cache and len(events[0].videos) == 3
+    assert len(youtube.calls) == 1
+    print("✅ 缓存命中只产出最终结果")
+
+
+def test_failed_and_timed_out_platforms_are_reported():
+    """获取失败和超过截止时间的平台各产出一个带标记的 FetchedBatch，其余平台照常排序"""
+    youtube = FakeFetcher(make_videos(6), delay=1.0)
+    instagram = FakeFetcher([], error=RuntimeError('login required'))
+    with IsolatedAgent(youtube=youtube, instagram=instagram, use_cache=False) as agent:
+        agent.fetcher_plugins = [
+            dataclasses.replace(plugin, timeout_seconds=0.2) if plugin.name == 'youtube' else plugin
+            for plugin in agent.fetcher_plugins
+        ]
+        events = list(agent.search_stream('AI coding', top_n=3))
+
+    batches = {e.platform: e for e in events if isinstance(e, FetchedBatch)}
+    assert 'login required' in batches['Instagram'].error
+    assert batches['YouTube'].timed_out and batches['YouTube'].videos == []
+    assert isinstance(events[-1], FinalRanking) and events[-1].videos == []
+    assert not any(isinstance(e, (FilterDone, ScoredBatch)) for e in events)
+    print("✅ 失败和超时的平台被标记，搜索照常结束")
+
+
+if __name__ == '__main__':
+    print("🧪 测试流式搜索事件\n")
+    test_events_arrive_in_pipeline_order()
+    test_cache_hit_yields_only_final_ranking()
+    test_failed_and_timed_out_platforms_are_reported()
+    print("\n✅ 全部通过")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试阶段缓存：同一获取输入只请求一次平台，调整筛选参数后重跑不重新获取（本地假获取器）
+"""
+import sys
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, make_videos
+
+from video_agent import config
+
+
+def _views_videos():
+    return make_videos(10, views=None)  # 播放量 1000 ~ 10000
+
+
+def test_rerun_hits_stage_cache():
+    """第二次获取同一主题直接读阶段缓存"""
+    youtube = FakeFetcher(_views_videos())
+    with IsolatedAgent(youtube=youtube) as agent:
+        first = agent._fetch_from_all_platforms('topic')
+        second = agent._fetch_from_all_platforms('topic')
+    
+    assert len(youtube.calls) == 1
+    assert [v['video_id'] for v in first] == [v['video_id'] for v in second]
+    print("✅ 阶段缓存命中，平台只请求一次")
+
+
+def test_topic_spacing_shares_stage_entry():
+    """大小写和空白不同的同一主题共用阶段缓存和结果缓存的键"""
+    youtube = FakeFetcher(_views_videos())
+    with IsolatedAgent(youtube=youtube) as agent:
+        agent._fetch_from_all_platforms('AI coding')
+        agent._fetch_from_all_platforms('  ai   Coding ')
+        result_keys = {agent.cache._make_key(t) for t in ('AI coding', 'ai  coding', ' AI\tcoding ')}
+    
+    assert youtube.calls == ['AI coding']
+    assert result_keys == {'ai_coding'}
+    print("✅ 主题空白不同仍命中阶段缓存")
+
+
+def test_changing_min_views_reuses_stage():
+    """调整 MIN_VIEWS 不改变 YouTube 的阶段缓存键，阈值在读出缓存后应用；Instagram 按新门槛重新获取"""
+    youtube = FakeFetcher(_views_videos())
+    instagram = FakeFetcher(make_videos(4, platform='Instagram', views=50000))
+    with IsolatedAgent(youtube=youtube, instagram=instagram) as agent:
+        all_videos = agent._fetch_from_all_platforms('topic')
+        config.MIN_VIEWS = 5000
+        filtered = agent._fetch_from_all_platforms('topic')
+    
+    assert len(youtube.calls) == 1 and len(instagram.calls) == 2
+    assert len(all_videos) == 14
+    assert sorted(v['views'] for v in filtered if v['platform'] == 'YouTube') == [5000, 6000, 7000, 8000, 9000, 10000]
+    print("✅ 调整 MIN_VIEWS 后复用阶段缓存")
+
+
+def test_changing_page_yield_reuses_stage():
+    """调整 YOUTUBE_MIN_PAGE_YIELD 只影响分页，不改变阶段缓存键"""
+    youtube = FakeFetcher(_views_videos())
+    with IsolatedAgent(youtube=youtube, YOUTUBE_MIN_PAGE_YIELD=0.1) as agent:
+        agent._fetch_from_all_platforms('topic')
+        config.YOUTUBE_MIN_PAGE_YIELD = 0.5
+        agent._fetch_from_all_platforms('topic')
+    
+    assert len(youtube.calls) == 1
+    print("✅ 调整 YOUTUBE_MIN_PAGE_YIELD 后复用阶段缓存")
+
+
+def test_instagram_fetch_applies_view_floor():
+    """Instagram 获取器在内部应用 MIN_VIEWS（凑够数量即停止扫描，不能事后再过滤）"""
+    instagram = FakeFetcher(make_videos(3, platform='Instagram'))
+    received = {}
+    search = instagram.search_videos
+    
+    def spy(topic, **kwargs):
+        received.update(kwargs)
+        return search(topic, **kwargs)
+    
+    instagram.search_videos = spy
+    with IsolatedAgent(instagram=instagram, MIN_VIEWS=200000) as agent:
+        agent._fetch_from_all_platforms('topic')
+    
+    assert received['min_views'] == 200000
+    print("✅ Instagram 获取器内应用播放量门槛")
+
+
+if __name__ == '__main__':
+    print("🧪 测试阶段缓存\n")
+    test_rerun_hits_stage_cache()
+    test_topic_spacing_shares_stage_entry()
+    test_changing_min_views_reuses_stage()
+    test_changing_page_yield_reuses_stage()
+    test_instagram_fetch_applies_view_floor()
+    print("\n✅ 全部通过")
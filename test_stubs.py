@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+测试共用的本地替身：假模型、假获取器、视频工厂和隔离的 Agent（不访问任何真实 API）
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '.')
+
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+os.environ.setdefault('YOUTUBE_API_KEY', 'test-key')
+
+from video_agent import config
+
+
+class StubResponse:
+    """模型响应（非流式），也用作流式响应的单个片段"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def make_video(i: int, platform: str = 'YouTube', title: str = None, views: int = None,
+               days_ago: int = 3, description: str = '', tags=()) -> dict:
+    """
+    构造一个假视频
+
+    Args:
+        i: 序号（决定 video_id 和默认播放量）
+        platform: 平台
+        title: 标题（默认 "AI coding video {i}"）
+        views: 播放量（默认 1000 * (i + 1)）
+        days_ago: 发布天数（同时决定 published_at）
+        description: 描述
+        tags: 标签
+
+    Returns:
+        视频字典
+    """
+    video_id = f'{platform[:2].lower()}{i}'
+    published_at = datetime.utcnow() - timedelta(days=days_ago, hours=1)
+    return {
+        'platform': platform, 'video_id': video_id,
+        'title': title if title is not None else f'AI coding video {i}',
+        'description': description, 'url': f'https://example.com/{video_id}', 'thumbnail': '',
+        'views': views if views is not None else 1000 * (i + 1), 'likes': 10, 'comments': 1,
+        'author': f'author{i}', 'author_url': '', 'published_at': published_at.isoformat(timespec='seconds'),
+        'days_ago': days_ago, 'tags': list(tags)
+    }
+
+
+def make_videos(count: int, platform: str = 'YouTube', **kwargs) -> list:
+    """构造 count 个假视频"""
+    return [make_video(i, platform, **kwargs) for i in range(count)]
+
+
+class StubModel:
+    """
+    可注入延迟和错误的假模型：按调用顺序取延迟和错误（列表用完后重复最后一项）
+
+    latencies: 每次调用的延迟（秒）
+    errors: 每次调用抛出的异常（None 表示成功）
+    """
+
+    model_name = 'models/stub'
+
+    def __init__(self, latencies=(0.0,), errors=(None,), text='[]'):
+        self.latencies = list(latencies)
+        self.errors = list(errors)
+        self.text = text
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        time.sleep(self.latencies[min(index, len(self.latencies) - 1)])
+        error = self.errors[min(index, len(self.errors) - 1)]
+        if error is not None:
+            raise error
+        return StubResponse(self.text)
+
+
+class StreamingModel:
+    """
+    假流式模型：把响应文本按片段逐个产出，片段之间有延迟
+
+    fail_after: 产出该数量的片段后抛出异常（模拟连接中断），None 表示不中断
+    stalls: 按调用顺序，首个片段之前的等待时间（列表用完后为 0）
+    """
+
+    model_name = 'models/stream-stub'
+
+    def __init__(self, chunks, delay: float = 0.0, fail_after=None, stalls=()):
+        self.chunks = chunks
+        self.delay = delay
+        self.fail_after = fail_after
+        self.stalls = list(stalls)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        stall = self.stalls[index] if index < len(self.stalls) else 0.0
+        if not stream:
+            time.sleep(stall)
+            return StubResponse(''.join(self.chunks))
+        return self._stream(stall)
+
+    def _stream(self, stall: float = 0.0):
+        from google.api_core import exceptions as google_exceptions
+        time.sleep(stall)
+        for i, chunk in enumerate(self.chunks):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise google_exceptions.ServiceUnavailable('stream reset')
+            time.sleep(self.delay)
+            yield StubResponse(chunk)
+
+
+class ScoringModel:
+    """
+    按 prompt 内容作答的假模型：评分（单主题 / 多主题）、精细排序和批量翻译
+
+    - 评分：每个视频给 score（默认 80），记录送入的标题
+    - 排序：按候选顺序给出名次
+    - 翻译：返回 "english {序号}"
+    fail_when: 可选的 prompt 判定函数，返回 True 时该次调用抛出 ServiceUnavailable
+    peak_in_flight: 同时进行的调用数峰值
+    """
+
+    model_name = 'models/scoring-stub'
+
+    def __init__(self, score: int = 80, fail_when=None, delay: float = 0.0):
+        self.score = score
+        self.fail_when = fail_when
+        self.delay = delay
+        self.calls = 0
+        self.kinds = []
+        self.titles = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if self.fail_when is not None and self.fail_when(prompt):
+            from google.api_core import exceptions as google_exceptions
+            with self._lock:
+                self.calls += 1
+            raise google_exceptions.ServiceUnavailable('stub failure')
+        lines = re.findall(r'^(\d+)\. \[[^\]]*\] (.*?) \|.*?(?:评估: (T[\d, T]+))?$', prompt, re.M)
+        if '中文搜索词' in prompt:
+            kind = 'translate'
+            count = len(re.findall(r'^\d+\. ', prompt, re.M))
+            items = [{'id': i + 1, 'keyword': f'english {i + 1}'} for i in range(count)]
+        elif '选出最好的' in prompt:
+            kind = 'rank'
+            items = [{'rank': r + 1, 'id': int(i), 'reason': 'r'} for r, (i, _, _) in enumerate(lines)]
+        else:
+            kind = 'score'
+            items = []
+            for i, _, targets in lines:
+                base = {'id': int(i), 'score': self.score, 'reason': 'ok', 'hook': 'h'}
+                if targets:
+                    items += [dict(base, topic=int(t.strip()[1:])) for t in targets.split(',')]
+                else:
+                    items.append(base)
+        with self._lock:
+            self.calls += 1
+            self.kinds.append(kind)
+            if kind == 'score':
+                self.titles += [title for _, title, _ in lines]
+        return StubResponse(json.dumps(items))
+
+
+class FakeFetcher:
+    """
+    假获取器：返回固定视频列表，可注入延迟和错误
+
+    videos: 每次返回的视频（按主题返回时传入 callable(topic) -> list）
+    """
+
+    def __init__(self, videos, delay: float = 0.0, error: Exception = None):
+        self.videos = videos
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    def search_videos(self, topic, max_results=50, days_ago=60, min_views=0, **kwargs):
+        self.calls.append(topic)
+        time.sleep(self.delay if not callable(self.delay) else self.delay(topic))
+        if self.error is not None:
+            raise self.error
+        videos = self.videos(topic) if callable(self.videos) else self.videos
+        return [dict(v) for v in videos]
+
+
+def make_ranker(model=None, **kwargs):
+    """
+    构造使用假模型的 AIRanker（默认不重试、不对冲、不熔断）
+
+    Args:
+        model: 假模型
+        **kwargs: 其余 AIRanker 参数
+    """
+    from video_agent.analyzers import AIRanker, ModelCaller, CircuitBreaker
+    kwargs.setdefault('caller', ModelCaller(deadline_seconds=5, max_retries=0, hedge=False,
+                                            breaker=CircuitBreaker(failure_threshold=0)))
+    ranker = AIRanker('test-key', **kwargs)
+    ranker.model = model if model is not None else ScoringModel()
+    return ranker
+
+
+class IsolatedAgent:
+    """
+    在临时目录中构造 VideoSearchAgent（缓存、目录数据库都在临时目录），退出时关闭 Agent 并恢复配置
+
+    agent_class: 要构造的 Agent 类（默认 VideoSearchAgent，也可传入 AsyncVideoSearchAgent）
+    agent_kwargs: 额外传给 Agent 构造函数的参数（如 gemini_concurrency）
+
+    用法：
+        with IsolatedAgent(youtube=FakeFetcher(...), RULE_FILTER_COUNT=10) as agent:
+            ...
+    """
+
+    def __init__(self, youtube=None, instagram=None, model=None, use_cache: bool = True,
+                 agent_class=None, agent_kwargs=None, **overrides):
+        self.agent_class = agent_class
+        self.agent_kwargs = agent_kwargs or {}
+        self.youtube = youtube if youtube is not None else FakeFetcher([])
+        self.instagram = instagram if instagram is not None else FakeFetcher([])
+        self.model = model if model is not None else ScoringModel()
+        self.use_cache = use_cache
+        self.overrides = overrides
+        self._saved = {}
+
+    def __enter__(self):
+        from video_agent import VideoSearchAgent
+        agent_class = self.agent_class or VideoSearchAgent
+        self._dir = tempfile.TemporaryDirectory()
+        overrides = dict(
+            CACHE_FILE=os.path.join(self._dir.name, 'cache.db'),
+            CATALOG_FILE=os.path.join(self._dir.name, 'catalog.db'),
+            GEMINI_API_KEY=config.GEMINI_API_KEY or 'test-key',
+            YOUTUBE_API_KEY=config.YOUTUBE_API_KEY or 'test-key',
+            ENABLED_FETCHERS=['youtube', 'instagram'],
+            MIN_VIEWS=0,
+            YOUTUBE_INCREMENTAL_REFRESH=False,
+        )
+        overrides.update(self.overrides)
+        for key, value in overrides.items():
+            self._saved[key] = getattr(config, key)
+            setattr(config, key, value)
+        self.agent = agent_class(use_cache=self.use_cache, **self.agent_kwargs)
+        for fetcher in (self.agent.youtube_fetcher, self.agent.instagram_fetcher):
+            if hasattr(fetcher, 'close'):
+                fetcher.close()  # 被替换的真实获取器
+        self.agent.youtube_fetcher = self.youtube
+        self.agent.instagram_fetcher = self.instagram
+        self.agent.ai_ranker.model = self.model
+        return self.agent
+
+    def __exit__(self, *exc):
+        # 先等后台刷新和获取结束、释放线程池和连接，再删除临时目录
+        self.agent.close()
+        for key, value in self._saved.items():
+            setattr(config, key, value)
+        self._dir.cleanup()
+        return False
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+测试翻译缓存：未缓存的中文搜索词合并为一次模型调用，写法不同的同一搜索词命中缓存（本地假模型）
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+from test_stubs import IsolatedAgent, ScoringModel
+
+from video_agent.cache import TranslationCache, normalize_query
+
+
+def test_batch_translation_is_one_call():
+    """多个中文搜索词一次翻译，英文搜索词原样返回"""
+    model = ScoringModel()
+    with IsolatedAgent(model=model) as agent:
+        translations = agent.translate_many(['自媒体运营', '视频剪辑教程', 'AI tools'])
+
+    assert model.kinds == ['translate']
+    assert translations == {'自媒体运营': 'english 1', '视频剪辑教程': 'english 2', 'AI tools': 'AI tools'}
+    print("✅ 2 个中文搜索词一次模型调用")
+
+
+def test_fuzzy_variants_hit_cache():
+    """空格、全角和标点不同的写法命中同一条翻译，单个翻译也复用批量翻译的结果"""
+    model = ScoringModel()
+    with IsolatedAgent(model=model) as agent:
+        agent.translate_many(['自媒体运营', '视频剪辑教程'])
+        variants = agent.translate_many([' 自媒体 运营！', '视频剪辑教程？'])
+        single = agent._translate_to_english('自媒体运营。')
+
+    assert model.calls == 1
+    assert variants == {' 自媒体 运营！': 'english 1', '视频剪辑教程？': 'english 2'}
+    assert single == 'english 1'
+    print("✅ 不同写法命中翻译缓存")
+
+
+def test_translations_persist():
+    """翻译写入 SQLite，新的缓存实例（模拟进程重启）仍能读取"""
+    assert normalize_query(' ＡＩ 工具，推荐 ') == normalize_query('ai工具推荐')
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'cache.db')
+        first = TranslationCache(cache_file)
+        first.set('AI工具推荐', 'best AI tools')
+        first.close()
+
+        second = TranslationCache(cache_file)
+        assert second.get_many(['ＡＩ 工具推荐', '健身训练']) == {'ＡＩ 工具推荐': 'best AI tools'}
+        second.close()
+    print("✅ 翻译缓存跨实例保留")
+
+
+if __name__ == '__main__':
+    print("🧪 测试翻译缓存\n")
+    test_batch_translation_is_one_call()
+    test_fuzzy_variants_hit_cache()
+    test_translations_persist()
+    print("\n✅ 全部通过")
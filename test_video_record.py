@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+测试紧凑视频记录：字典接口与普通字典一致、追加字段、序列化往返，
+以及获取器产出 Video 时搜索结果和缓存仍是普通字典（本地假模型和假获取器）
+"""
+import json
+import sys
+
+sys.path.insert(0, '.')
+
+from test_stubs import FakeFetcher, IsolatedAgent, make_video, make_videos
+
+from video_agent.video import Video, json_default, to_dicts, to_videos
+
+
+def test_behaves_like_dict():
+    """读写、删除、in、get、update、len 和迭代顺序与同样内容的字典一致"""
+    fields = make_video(0)
+    video, plain = Video(**fields), dict(fields)
+    for record in (video, plain):
+        record['ai_score'] = 90
+        record.update(views=5, final_rank=1)
+        del record['thumbnail']
+        record.setdefault('hook_text', 'h')
+
+    assert dict(video) == plain and video == plain
+    assert list(video) == list(plain) and len(video) == len(plain)
+    assert 'thumbnail' not in video and 'ai_score' in video
+    assert video.get('duration') is None and video.get('missing', 1) == 1
+    try:
+        video['duration']
+        raise AssertionError('未设置的字段应抛出 KeyError')
+    except KeyError:
+        pass
+    assert not hasattr(video, '__dict__')
+    print("✅ 字典接口与普通字典一致")
+
+
+def test_copy_and_serialization_round_trip():
+    """copy 互不影响；to_dict / JSON / to_videos / to_dicts 往返后内容不变"""
+    video = Video(**make_video(1, tags=['ai']))
+    video['ai_reason'] = 'ok'
+    clone = video.copy()
+    clone['ai_reason'] = 'changed'
+    clone['views'] = 0
+
+    assert video['ai_reason'] == 'ok' and video['views'] == 2000
+    assert Video.from_json(video.to_json()) == video
+    assert json.loads(json.dumps([video], default=json_default)) == [video.to_dict()]
+    plain = make_video(2)
+    videos = to_videos([video, plain])
+    assert videos[0] is video and isinstance(videos[1], Video)
+    dicts = to_dicts(videos)
+    assert all(type(d) is dict for d in dicts) and dicts == [video.to_dict(), plain]
+    print("✅ 拷贝和序列化往返正确")
+
+
+def test_pipeline_returns_plain_dicts():
+    """获取器产出 Video 时，搜索结果和缓存条目都是带追加字段的普通字典"""
+    youtube = FakeFetcher([Video(**v) for v in make_videos(5)])
+    with IsolatedAgent(youtube=youtube) as agent:
+        results = agent.search('AI coding', top_n=3)
+        cached = agent.cache.get('AI coding')
+
+    assert len(results) == 3
+    assert all(type(v) is dict and 'ai_score' in v for v in results)
+    assert [v['video_id'] for v in cached] == [v['video_id'] for v in results]
+    print("✅ 搜索结果和缓存为普通字典")
+
+
+if __name__ == '__main__':
+    print("🧪 测试紧凑视频记录\n")
+    test_behaves_like_dict()
+    test_copy_and_serialization_round_trip()
+    test_pipeline_returns_plain_dicts()
+    print("\n✅ 全部通过")
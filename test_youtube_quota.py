@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+测试 YouTube 配额记账、按预算降级与增量刷新（使用本地假 API 服务器，不消耗真实配额）
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, '.')
+
+from video_agent.cache import QuotaLedger
+from video_agent.fetchers.youtube import YouTubeFetcher, QuotaExhaustedError, QUOTA_COSTS
+
+
+class FakeYouTubeAPI:
+    """
+    本地假 YouTube Data API：search.list 分页返回 total 个视频，videos.list 返回详情
+
+    fail_page_token: 该 pageToken 的 search.list 请求返回 500（模拟翻页途中的服务端错误）
+    """
+
+    def __init__(self, total: int = 200, quota_exceeded: bool = False, fail_page_token: str = None):
+        self.total = total
+        self.quota_exceeded = quota_exceeded
+        self.fail_page_token = fail_page_token
+        self.calls = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                api.calls.append(url.path)
+
+                if api.quota_exceeded:
+                    body = {'error': {'code': 403, 'message': 'quota', 'errors': [{'reason': 'quotaExceeded'}]}}
+                    return self._send(403, body)
+
+                if url.path.endswith('/search'):
+                    if api.fail_page_token is not None and query.get('pageToken', [None])[0] == api.fail_page_token:
+                        return self._send(500, {'error': {'code': 500, 'message': 'backend error'}})
+                    start = int(query.get('pageToken', ['0'])[0])
+                    end = min(start + int(query['maxResults'][0]), api.total)
+                    body = {'items': [{'id': {'videoId': f'v{i}'}} for i in range(start, end)]}
+                    if end < api.total:
+                        body['nextPageToken'] = str(end)
+                elif url.path.endswith('/videos'):
+                    body = {'items': [
+                        {
+                            'id': video_id,
+                            'snippet': {
+                                'title': f'Video {video_id}',
+                                'publishedAt': '2024-01-01T00:00:00Z',
+                                'channelTitle': 'channel'
+                            },
+                            'statistics': {'viewCount': '500000'}
+                        }
+                        for video_id in query['id'][0].split(',')
+                    ]}
+                else:
+                    return self._send(404, {})
+                self._send(200, body)
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+
+    def count(self, kind: str) -> int:
+        """某类调用（search / videos）的次数"""
+        return sum(1 for path in self.calls if path.endswith('/' + kind))
+
+    def close(self):
+        self.server.shutdown()
+
+
+def _make_fetcher(api: FakeYouTubeAPI, ledger: QuotaLedger, low_watermark: int = 0) -> YouTubeFetcher:
+    return YouTubeFetcher('test-key', api_endpoint=api.url,
+                          quota_ledger=ledger, quota_low_watermark=low_watermark)
+
+
+def _temp_ledger(daily_limit: int) -> QuotaLedger:
+    cache_file = os.path.join(tempfile.mkdtemp(), 'quota.db')
+    return QuotaLedger(cache_file, daily_limit=daily_limit)
+
+
+def test_ledger_records_costs():
+    """每次调用按类型记账"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(10000)
+    try:
+        videos = _make_fetcher(api, ledger).search_videos('ai coding', max_results=150)
+
+        usage = ledger.usage()
+        assert len(videos) == 150
+        assert usage['search.list'] == {'units': 3 * QUOTA_COSTS['search.list'], 'calls': 3}
+        assert usage['videos.list'] == {'units': 3 * QUOTA_COSTS['videos.list'], 'calls': 3}
+        assert ledger.remaining() == 10000 - 303
+        print(f"✅ 记账: {usage}, 剩余 {ledger.remaining()}")
+    finally:
+        api.close()
+
+
+def test_budget_limits_pages():
+    """剩余配额只够两页时最多翻两页"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(250)
+    try:
+        videos = _make_fetcher(api, ledger).search_videos('ai coding', max_results=150)
+
+        assert api.count('search') == 2
+        assert len(videos) == 100
+        print(f"✅ 预算限制翻页: {api.count('search')} 页, 剩余 {ledger.remaining()}")
+    finally:
+        api.close()
+
+
+def test_low_watermark_single_page():
+    """剩余配额低于水位线时只取一页"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(1000)
+    try:
+        videos = _make_fetcher(api, ledger, low_watermark=2000).search_videos('ai coding', max_results=150)
+
+        assert api.count('search') == 1
+        assert len(videos) == 50
+        print(f"✅ 低水位单页: {len(videos)} 个视频")
+    finally:
+        api.close()
+
+
+def test_exhausted_budget_raises_without_calling_api():
+    """剩余配额不足一页时不发请求，直接抛出 QuotaExhaustedError"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(100)
+    try:
+        try:
+            _make_fetcher(api, ledger).search_videos('ai coding', max_results=50)
+            raise AssertionError("应抛出 QuotaExhaustedError")
+        except QuotaExhaustedError:
+            pass
+
+        assert api.calls == []
+        print("✅ 配额不足时不调用 API")
+    finally:
+        api.close()
+
+
+def test_upstream_quota_error_marks_exhausted():
+    """上游返回 quotaExceeded 时账本记为耗尽"""
+    api = FakeYouTubeAPI(total=200, quota_exceeded=True)
+    ledger = _temp_ledger(10000)
+    try:
+        try:
+            _make_fetcher(api, ledger).search_videos('ai coding', max_results=50)
+            raise AssertionError("应抛出 QuotaExhaustedError")
+        except QuotaExhaustedError:
+            pass
+
+        assert ledger.remaining() == 0
+        print("✅ 上游配额错误后剩余配额为 0")
+    finally:
+        api.close()
+
+
+def test_page_error_keeps_fetched_pages():
+    """第 2 页请求失败时停止翻页，返回第 1 页的视频"""
+    api = FakeYouTubeAPI(total=200, fail_page_token='50')
+    ledger = _temp_ledger(10000)
+    try:
+        videos = _make_fetcher(api, ledger).search_videos('ai coding', max_results=150)
+
+        assert api.count('search') == 2
+        assert [v['video_id'] for v in videos] == [f'v{i}' for i in range(50)]
+        print(f"✅ 翻页失败时保留已获取的 {len(videos)} 个视频")
+    finally:
+        api.close()
+
+
+def test_detail_executor_is_reused():
+    """多次获取详情复用同一个线程池，close() 后关闭"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(10000)
+    try:
+        before = set(threading.enumerate())
+        fetcher = _make_fetcher(api, ledger)
+        video_ids = [f'v{i}' for i in range(200)]
+        for _ in range(5):
+            assert len(fetcher.get_video_details(video_ids)) == 200
+
+        workers = [t for t in set(threading.enumerate()) - before if t.name.startswith('youtube-details')]
+        assert 0 < len(workers) <= fetcher.max_detail_workers
+        fetcher.close()
+        try:
+            fetcher.get_video_details(video_ids)
+            raise AssertionError("关闭后应拒绝新任务")
+        except RuntimeError:
+            pass
+        print(f"✅ 5 次获取详情共用 {len(workers)} 个线程")
+    finally:
+        api.close()
+
+
+def test_refresh_known_videos_is_cheap():
+    """刷新已知视频只调用 videos.list，配额约为完整搜索的 1/100"""
+    api = FakeYouTubeAPI(total=200)
+    ledger = _temp_ledger(10000)
+    try:
+        fetcher = _make_fetcher(api, ledger)
+        videos = fetcher.search_videos('ai coding', max_results=150)
+        full_cost = ledger.used()
+
+        refreshed = fetcher.refresh_videos([v['video_id'] for v in videos], days_ago=100000)
+        refresh_cost = ledger.used() - full_cost
+
+        assert [v['video_id'] for v in refreshed] == [v['video_id'] for v in videos]
+        assert api.count('search') == 3
+        assert refresh_cost == 3
+        assert full_cost / refresh_cost >= 100
+        print(f"✅ 增量刷新: 完整搜索 {full_cost} 配额, 刷新 {refresh_cost} 配额")
+    finally:
+        api.close()
+
+
+if __name__ == '__main__':
+    print("🧪 测试 YouTube 配额记账\n")
+    test_ledger_records_costs()
+    test_budget_limits_pages()
+    test_low_watermark_single_page()
+    test_exhausted_budget_raises_without_calling_api()
+    test_upstream_quota_error_marks_exhausted()
+    test_page_error_keeps_fetched_pages()
+    test_detail_executor_is_reused()
+    test_refresh_known_videos_is_cheap()
+    print("\n✅ 全部通过")
@@ -5,7 +5,13 @@ __version__ = '1.0.0'
 __author__ = 'Video Agent Team'
 
 from .agent import VideoSearchAgent, format_results
+from .async_agent import AsyncVideoSearchAgent
 from .config import validate_config
+from .events import SearchEvent, FetchedBatch, FilterDone, ScoredBatch, FinalRanking
+from .video import Video
 
-__all__ = ['VideoSearchAgent', 'format_results', 'validate_config']
+__all__ = [
+    'VideoSearchAgent', 'AsyncVideoSearchAgent', 'format_results', 'validate_config',
+    'SearchEvent', 'FetchedBatch', 'FilterDone', 'ScoredBatch', 'FinalRanking', 'Video'
+]
 
@@ -1,18 +1,26 @@
 """
 视频搜索 Agent 主程序
 """
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
+import functools
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import re
+import threading
+import time
 
-from .fetchers import YouTubeFetcher, InstagramFetcher
-from .analyzers import RuleFilter, AIRanker
-from .cache import CacheManager
+from .fetchers import QuotaExhaustedError, FetcherPlugin, get_fetcher_plugin
+from .analyzers import RuleFilter, AIRanker, ModelCaller, CircuitBreaker, RelevancePreRanker, NearDuplicateDetector
+from .cache import CacheManager, StageCache, ScoreStore, TranslationCache, QuotaLedger, TopicCatalog
+from .catalog import VideoCatalog
+from .video import to_dicts, to_videos
+from .events import SearchEvent, FetchedBatch, FilterDone, ScoredBatch, FinalRanking
 from . import config
 
 logger = logging.getLogger(__name__)
 
+_TIMED_OUT = '超过截止时间，已跳过（使用其余平台的结果）'
+
 
 class VideoSearchAgent:
     """视频搜索 Agent"""
@@ -27,28 +35,116 @@ class VideoSearchAgent:
         # 验证配置
         config.validate_config()
         
-        # 初始化组件
-        self.youtube_fetcher = YouTubeFetcher(config.YOUTUBE_API_KEY)
-        self.instagram_fetcher = InstagramFetcher(
-            config.INSTAGRAM_USERNAME,
-            config.INSTAGRAM_PASSWORD
-        )
+        sqlite_options = {
+            'persistent': config.CACHE_PERSISTENT_CONNECTION,
+            'synchronous': config.CACHE_SQLITE_SYNCHRONOUS,
+            'wal': config.CACHE_SQLITE_WAL
+        }
+        
+        # YouTube 配额账本（与缓存开关无关，始终记账）
+        self.quota_ledger = None
+        if config.YOUTUBE_QUOTA_DAILY_LIMIT > 0:
+            self.quota_ledger = QuotaLedger(
+                config.CACHE_FILE,
+                daily_limit=config.YOUTUBE_QUOTA_DAILY_LIMIT,
+                **sqlite_options
+            )
+        
+        # 本地视频目录：保存所有获取到的视频（离线语料，与缓存开关无关）
+        self.catalog = None
+        if config.CATALOG_ENABLED:
+            self.catalog = VideoCatalog(config.CATALOG_FILE, **sqlite_options)
+        
+        # 初始化组件：按 ENABLED_FETCHERS 创建获取器插件
+        self.fetcher_plugins = [get_fetcher_plugin(name) for name in config.ENABLED_FETCHERS]
+        self.fetchers = {plugin.name: plugin.create(self) for plugin in self.fetcher_plugins}
         self.rule_filter = RuleFilter(
             min_views=config.MIN_VIEWS,
             max_days_ago=config.MAX_DAYS_AGO
         )
-        self.ai_ranker = AIRanker(config.GEMINI_API_KEY)
+        # 近似重复检测：同一内容的多份副本只占一个候选名额
+        self.deduper = NearDuplicateDetector(
+            title_distance=config.DEDUPE_TITLE_DISTANCE,
+            thumbnail_distance=config.DEDUPE_THUMBNAIL_DISTANCE,
+            thumbnail_dir=config.THUMBNAIL_CACHE_DIR
+        ) if config.DEDUPE_ENABLED else None
         
         # 缓存管理
         self.use_cache = use_cache and config.CACHE_ENABLED
+        score_store = None
         if self.use_cache:
             self.cache = CacheManager(
                 config.CACHE_FILE,
-                config.CACHE_EXPIRY_HOURS
+                config.CACHE_EXPIRY_HOURS,
+                memory_size=config.CACHE_MEMORY_SIZE,
+                memory_ttl_seconds=config.CACHE_MEMORY_TTL_SECONDS,
+                **sqlite_options
             )
+            # 阶段缓存：保存各平台原始获取结果，调整筛选参数后无需重新请求
+            self.stage_cache = StageCache(config.CACHE_FILE, **sqlite_options)
+            # 评分存储：主题刷新时只为新视频调用模型
+            score_store = ScoreStore(config.CACHE_FILE, **sqlite_options)
+            # 翻译缓存：相同（模糊标准化后）的中文搜索词不再调用模型
+            self.translation_cache = TranslationCache(config.CACHE_FILE, **sqlite_options)
+            # 主题已知视频：增量刷新时只更新统计数据
+            self.topic_catalog = TopicCatalog(config.CACHE_FILE, **sqlite_options)
+        
+        # 每个获取器一个线程池（整个 Agent 生命周期复用），线程数即该获取器的并发上限
+        self._platform_executors = {
+            plugin.name: ThreadPoolExecutor(max_workers=plugin.concurrency, thread_name_prefix=f'fetch-{plugin.name}')
+            for plugin in self.fetcher_plugins
+        }
+        
+        # 正在后台刷新的主题及其线程（stale-while-revalidate），close() 时等待刷新结束
+        self._refreshing = set()
+        self._refresh_threads = set()
+        self._refresh_lock = threading.Lock()
+        
+        self.ai_ranker = AIRanker(
+            config.GEMINI_API_KEY,
+            response_cache_size=config.AI_RESPONSE_CACHE_SIZE,
+            score_cache_size=config.AI_SCORE_CACHE_SIZE,
+            score_ttl_hours=config.AI_SCORE_CACHE_TTL_HOURS,
+            score_store=score_store,
+            caller=ModelCaller(
+                deadline_seconds=config.GEMINI_DEADLINE_SECONDS,
+                max_retries=config.GEMINI_MAX_RETRIES,
+                hedge=config.GEMINI_HEDGE_ENABLED,
+                hedge_delay_seconds=config.GEMINI_HEDGE_DELAY_SECONDS,
+                breaker=CircuitBreaker(config.GEMINI_BREAKER_FAILURES, config.GEMINI_BREAKER_RESET_SECONDS),
+                max_workers=config.GEMINI_CONCURRENCY * 2,
+                max_in_flight=config.GEMINI_CONCURRENCY
+            ),
+            score_batch_tokens=config.AI_SCORE_BATCH_TOKENS,
+            score_parallelism=config.AI_SCORE_PARALLELISM,
+            description_tokens=config.AI_PROMPT_DESCRIPTION_TOKENS,
+            streaming=config.GEMINI_STREAMING,
+            pre_ranker=RelevancePreRanker(
+                miss_threshold=config.RELEVANCE_MISS_THRESHOLD,
+                hit_threshold=config.RELEVANCE_HIT_THRESHOLD
+            ) if config.RELEVANCE_PRERANK_ENABLED else None
+        )
         
         logger.info("✅ 视频搜索 Agent 初始化完成")
     
+    @property
+    def youtube_fetcher(self):
+        """YouTube 获取器（未启用时为 None）"""
+        return self.fetchers.get('youtube')
+    
+    @youtube_fetcher.setter
+    def youtube_fetcher(self, fetcher):
+        self.fetchers['youtube'] = fetcher
+    
+    @property
+    def instagram_fetcher(self):
+        """Instagram（instaloader）获取器（未启用时为 None）"""
+        return self.fetchers.get('instagram')
+    
+    @instagram_fetcher.setter
+    def instagram_fetcher(self, fetcher):
+        self.fetchers['instagram'] = fetcher
+    
     def _detect_chinese(self, text: str) -> bool:
         """
         检测文本是否包含中文
@@ -71,6 +167,12 @@ class VideoSearchAgent:
         Returns:
             英文搜索关键词
         """
+        if self.use_cache:
+            cached = self.translation_cache.get(chinese_text)
+            if cached:
+                logger.info(f"✅ 翻译缓存命中: 「{chinese_text}」 → 「{cached}」")
+                return cached
+        
         logger.info(f"🌐 检测到中文输入，正在翻译...")
         
         try:
@@ -87,13 +189,14 @@ class VideoSearchAgent:
 
 英文关键词："""
             
-            response = self.ai_ranker.model.generate_content(prompt)
-            english_keyword = response.text.strip()
+            english_keyword = self.ai_ranker.generate_text(prompt, 'translate')
             
             # 清理可能的引号或多余符号
             english_keyword = english_keyword.strip('"\'').strip()
             
             logger.info(f"✅ 翻译完成: 「{chinese_text}」 → 「{english_keyword}」")
+            if self.use_cache:
+                self.translation_cache.set(chinese_text, english_keyword)
             return english_keyword
             
         except Exception as e:
@@ -101,6 +204,67 @@ class VideoSearchAgent:
             logger.warning("使用原始搜索词")
             return chinese_text
     
+    def translate_many(self, texts: List[str]) -> Dict[str, str]:
+        """
+        批量翻译搜索词（未缓存的中文词合并为一次模型调用）
+        
+        Args:
+            texts: 搜索词列表（英文词原样返回）
+            
+        Returns:
+            {原搜索词: 英文关键词}
+        """
+        translations = {text: text for text in texts if not self._detect_chinese(text)}
+        chinese = [text for text in dict.fromkeys(texts) if self._detect_chinese(text)]
+        
+        if self.use_cache and chinese:
+            translations.update(self.translation_cache.get_many(chinese))
+        pending = [text for text in chinese if text not in translations]
+        
+        if not pending:
+            return translations
+        
+        logger.info(f"🌐 批量翻译 {len(pending)} 个中文搜索词...")
+        
+        try:
+            numbered = "\n".join(f"{i+1}. {text}" for i, text in enumerate(pending))
+            prompt = f"""
+请将以下中文搜索词逐个翻译成适合在 YouTube 上搜索的英文关键词。
+
+要求：
+1. 翻译要准确、地道
+2. 适合在 YouTube 上搜索欧美内容
+3. 保持搜索意图不变
+
+中文搜索词：
+{numbered}
+
+只输出JSON数组，不要其他文字：
+[{{"id": 1, "keyword": "social media marketing"}}, ...]
+"""
+            items = self.ai_ranker.generate_json(prompt, 'translate', schema={'id': int, 'keyword': str})
+            
+            translated = {}
+            for item in items:
+                idx = item['id'] - 1
+                keyword = str(item.get('keyword', '')).strip().strip('"\'').strip()
+                if 0 <= idx < len(pending) and keyword:
+                    translated[pending[idx]] = keyword
+            
+            if self.use_cache:
+                self.translation_cache.set_many(translated)
+            translations.update(translated)
+            logger.info(f"✅ 批量翻译完成: {len(translated)}/{len(pending)}")
+            
+        except Exception as e:
+            logger.error(f"批量翻译失败: {e}")
+        
+        # 翻译失败的搜索词使用原文
+        for text in pending:
+            translations.setdefault(text, text)
+        
+        return translations
+    
     def search(self, topic: str, top_n: int = 10) -> List[Dict]:
         """
         搜索热门视频
@@ -112,46 +276,388 @@ class VideoSearchAgent:
         Returns:
             排序后的视频列表
         """
+        return _final_videos(self.search_stream(topic, top_n))
+    
+    def search_stream(self, topic: str, top_n: int = 10) -> Iterator[SearchEvent]:
+        """
+        搜索热门视频，逐步产出进度事件
+        
+        事件顺序：每个平台一个 FetchedBatch（先完成的先产出）→ FilterDone
+        → ScoredBatch → FinalRanking。缓存命中时只产出 FinalRanking(from_cache=True)。
+        
+        Args:
+            topic: 搜索主题（支持中文，会自动翻译）
+            top_n: 返回的视频数量
+            
+        Yields:
+            SearchEvent 子类实例，最后一个总是 FinalRanking
+        """
         logger.info(f"\n{'='*60}")
         logger.info(f"🎯 开始搜索: {topic}")
         logger.info(f"{'='*60}\n")
         
-        # 中文自动翻译
-        original_topic = topic
-        if self._detect_chinese(topic):
-            topic = self._translate_to_english(topic)
-            if not topic:  # 翻译失败
-                topic = original_topic
-        
-        # 检查缓存（使用原始搜索词作为key，这样中英文搜索可以共享缓存）
-        cache_key = original_topic
+        # 快速路径：先查缓存（使用原始搜索词作为key），命中时无需等待翻译或网络
         if self.use_cache:
-            cached_results = self.cache.get(cache_key)
+            cached_results = self._lookup_cache(topic, top_n)
+            if cached_results:
+                yield FinalRanking(topic, videos=cached_results[:top_n], from_cache=True)
+                return
+        
+        # 纯离线模式：只用本地视频目录回答
+        if config.OFFLINE_SEARCH == 'only' and self.catalog is not None:
+            yield FinalRanking(topic, videos=self.search_offline(topic, top_n))
+            return
+        
+        yield from self._pipeline_events(topic, top_n)
+    
+    def search_offline(self, topic: str, top_n: int = 10) -> List[Dict]:
+        """
+        离线搜索：在本地视频目录上做全文检索（BM25），不请求任何平台也不调用 AI 排序
+        
+        中文搜索词仍会翻译（翻译缓存命中时不调用模型）。
+        
+        Args:
+            topic: 搜索主题（支持中文）
+            top_n: 返回的视频数量
+            
+        Returns:
+            按相关性排序的视频列表（满足 MIN_VIEWS / MAX_DAYS_AGO）
+        """
+        if self.catalog is None:
+            logger.warning("本地视频目录未启用")
+            return []
+        
+        videos = to_dicts(self._catalog_candidates(self._translate_topic(topic), top_n))
+        logger.info(f"✅ 离线搜索: {topic} → {len(videos)} 个视频")
+        return videos
+    
+    def _catalog_candidates(self, topic: str, limit: int) -> List[Dict]:
+        """
+        从本地视频目录检索满足规则条件的候选视频
+        
+        Args:
+            topic: 搜索主题（英文）
+            limit: 最多返回数量
+            
+        Returns:
+            按 BM25 相关性排序的视频列表
+        """
+        return to_videos(self.catalog.search(
+            topic,
+            min_views=config.MIN_VIEWS,
+            max_days_ago=config.MAX_DAYS_AGO,
+            limit=limit
+        ))
+    
+    def search_many(self, topics: List[str], top_n: int = 10) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        批量搜索多个主题，每个主题完成后立即产出结果
+        
+        - 缓存命中的主题最先返回
+        - 中文主题一次模型调用批量翻译
+        - 所有主题的获取并发进行（每个平台受各自的并发上限约束）
+        - 多个主题的相关性评分合并到更少的模型调用，跨主题重复的视频只描述一次
+        
+        Args:
+            topics: 主题列表（重复主题只搜索一次）
+            top_n: 每个主题返回的视频数量
+            
+        Yields:
+            (主题, 排序后的视频列表)
+        """
+        topics = list(dict.fromkeys(topics))
+        logger.info(f"🎯 开始批量搜索: {len(topics)} 个主题")
+        
+        # 1. 缓存命中的主题直接返回
+        pending = []
+        for topic in topics:
+            cached_results = self._lookup_cache(topic, top_n) if self.use_cache else None
+            if cached_results:
+                yield topic, cached_results[:top_n]
+            else:
+                pending.append(topic)
+        
+        if not pending:
+            return
+        
+        # 2. 批量翻译
+        translations = self.translate_many(pending)
+        
+        # 3. 所有 (主题, 获取器) 任务并发提交，超过截止时间的获取器不再等待
+        tasks = []
+        remaining = {}
+        for topic in pending:
+            plan = self._fetch_plan(translations[topic])
+            remaining[topic] = len(plan)
+            tasks.extend((topic, plugin, fetch, params) for plugin, fetch, params in plan)
+        
+        fetched = {topic: [] for topic in pending}
+        seen = {}  # (平台, 视频ID) -> 首次获取的视频，用于跨主题去重
+        batch = {}
+        duplicates = 0
+        
+        for topic, plugin, videos, error in self._run_fetches(tasks):
+            if error:
+                logger.error(f"  ✗ {topic} / {plugin.platform} 获取失败: {error}")
+            else:
+                logger.info(f"  ✓ {topic} / {plugin.platform}: {len(videos)} 个视频")
+            for video in videos:
+                key = (video.get('platform', ''), str(video.get('video_id', '')))
+                if key in seen:
+                    duplicates += 1
+                    video = seen[key]
+                else:
+                    seen[key] = video
+                # 评分按主题写入，每个主题持有独立副本
+                fetched[topic].append(dict(video))
+            
+            remaining[topic] -= 1
+            if remaining[topic] > 0:
+                continue
+            
+            # 该主题所有平台获取完毕 → 规则筛选，加入评分批次
+            filtered = self.rule_filter.filter(
+                self._dedupe(fetched.pop(topic)),
+                translations[topic],
+                target_count=config.RULE_FILTER_COUNT
+            )
+            if filtered:
+                batch[topic] = filtered
+            else:
+                logger.warning(f"规则筛选后无结果: {topic}")
+                yield topic, []
+            
+            # 无结果的主题也要检查：它可能是最后完成的主题，此时需要提交已缓冲的批次
+            still_fetching = any(remaining[t] > 0 for t in remaining)
+            if batch and (len(batch) >= config.SEARCH_MANY_TOPICS_PER_BATCH or not still_fetching):
+                yield from self._finish_batch(batch, translations, top_n)
+                batch = {}
+        
+        # 兜底：获取结束后仍未提交的批次
+        if batch:
+            yield from self._finish_batch(batch, translations, top_n)
+        
+        if duplicates:
+            logger.info(f"♻️ 跨主题重复视频: {duplicates} 个")
+        
+        logger.info(f"✅ 批量搜索完成: {len(topics)} 个主题")
+    
+    def _finish_batch(self, batch: Dict[str, List[Dict]], translations: Dict[str, str],
+                      top_n: int) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        对一批主题合并做 AI 评分，再逐个精细排序、写入缓存并产出
+        
+        Args:
+            batch: {原始主题: 规则筛选后的视频}
+            translations: {原始主题: 英文主题}
+            top_n: 每个主题返回的视频数量
+            
+        Yields:
+            (主题, 排序后的视频列表)
+        """
+        # 不同原始主题可能翻译成同一个英文主题，每个英文主题只参与一次合并评分
+        scoring = {}
+        for topic, videos in batch.items():
+            scoring.setdefault(translations[topic], videos)
+        
+        scored = self.ai_ranker.score_relevance_many(
+            scoring,
+            target_count=config.AI_FILTER_COUNT,
+            max_pairs_per_call=config.SEARCH_MANY_PAIRS_PER_CALL
+        )
+        
+        for topic, filtered_videos in batch.items():
+            english_topic = translations[topic]
+            if scoring[english_topic] is filtered_videos:
+                scored_videos = scored.get(english_topic, [])
+            else:
+                # 评分已在合并调用中写入缓存，这里不会再调用模型
+                scored_videos = self.ai_ranker.score_relevance(
+                    filtered_videos, english_topic, target_count=config.AI_FILTER_COUNT
+                )
+            if scored_videos:
+                final_results = self.ai_ranker.rank_top_n(scored_videos, english_topic, top_n=top_n)
+            else:
+                final_results = filtered_videos[:top_n]
+            final_results = to_dicts(final_results)
+            
+            if self.use_cache and final_results:
+                self.cache.set(topic, final_results)
+            
+            yield topic, final_results
+    
+    def _lookup_cache(self, topic: str, top_n: int) -> Optional[List[Dict]]:
+        """
+        查询结果缓存（内存层 → SQLite）
+        
+        启用 stale-while-revalidate 时，过期结果会被立即返回，同时在后台刷新。
+        
+        Args:
+            topic: 原始搜索主题
+            top_n: 返回的视频数量（用于后台刷新）
+            
+        Returns:
+            缓存的视频列表，未命中返回 None
+        """
+        if not config.CACHE_STALE_WHILE_REVALIDATE:
+            cached_results = self.cache.get(topic)
             if cached_results:
                 logger.info("✅ 使用缓存结果")
-                return cached_results[:top_n]
+            return cached_results
+        
+        entry = self.cache.get_stale(topic, config.CACHE_STALE_MAX_HOURS)
+        if not entry or not entry[0]:
+            return None
+        
+        cached_results, is_stale = entry
+        if is_stale:
+            logger.info("✅ 使用过期缓存结果，后台刷新中")
+            self._refresh_in_background(topic, top_n)
+        else:
+            logger.info("✅ 使用缓存结果")
+        return cached_results
+    
+    def _refresh_in_background(self, topic: str, top_n: int):
+        """
+        在后台线程中重新执行搜索并更新缓存（同一主题只刷新一次）
+        
+        Args:
+            topic: 原始搜索主题
+            top_n: 返回的视频数量
+        """
+        key = self.cache._make_key(topic)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                self._run_pipeline(topic, top_n)
+            except Exception as e:
+                logger.error(f"后台刷新失败: {topic}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+                    self._refresh_threads.discard(threading.current_thread())
+        
+        thread = threading.Thread(target=refresh, name=f"refresh-{key}", daemon=True)
+        with self._refresh_lock:
+            self._refresh_threads.add(thread)
+        thread.start()
+    
+    def _run_pipeline(self, topic: str, top_n: int) -> List[Dict]:
+        """
+        执行完整搜索流程并写入缓存（不查缓存）
+        
+        Args:
+            topic: 原始搜索主题
+            top_n: 返回的视频数量
+            
+        Returns:
+            排序后的视频列表
+        """
+        return _final_videos(self._pipeline_events(topic, top_n))
+    
+    def _pipeline_events(self, topic: str, top_n: int) -> Iterator[SearchEvent]:
+        """
+        执行完整搜索流程（翻译 → 获取 → 规则筛选 → AI 评分 → AI 排序），并写入缓存
+        
+        Args:
+            topic: 原始搜索主题
+            top_n: 返回的视频数量
+            
+        Yields:
+            各阶段的进度事件
+        """
+        # 缓存使用原始搜索词作为key，这样中英文搜索可以共享缓存
+        cache_key = topic
+        topic = self._translate_topic(topic)
         
         # 第1步：并行获取数据
         logger.info("【步骤 1/4】从各平台获取数据...")
-        all_videos = self._fetch_from_all_platforms(topic)
+        all_videos = []
+        for event in self._fetch_events(topic):
+            all_videos.extend(event.videos)
+            event.topic = cache_key
+            yield event
         logger.info(f"✅ 共获取 {len(all_videos)} 个候选视频\n")
         
+        final_results = []
+        for event in self._rank_events(all_videos, topic, top_n):
+            event.topic = cache_key
+            if isinstance(event, FinalRanking):
+                final_results = event.videos
+                # 先写缓存，再产出最终结果
+                if self.use_cache and final_results:
+                    self.cache.set(cache_key, final_results)
+            yield event
+        
+        logger.info(f"{'='*60}")
+        logger.info(f"✅ 搜索完成！")
+        logger.info(f"{'='*60}\n")
+    
+    def _translate_topic(self, topic: str) -> str:
+        """
+        中文搜索词自动翻译，英文原样返回
+        
+        Args:
+            topic: 原始搜索主题
+            
+        Returns:
+            用于各平台搜索的主题
+        """
+        if self._detect_chinese(topic):
+            translated = self._translate_to_english(topic)
+            if translated:  # 翻译失败时使用原词
+                return translated
+        return topic
+    
+    def _rank_candidates(self, all_videos: List[Dict], topic: str, top_n: int) -> List[Dict]:
+        """
+        对候选视频执行规则筛选、AI 评分和 AI 排序（步骤 2-4）
+        
+        Args:
+            all_videos: 各平台获取的候选视频
+            topic: 搜索主题（英文）
+            top_n: 返回的视频数量
+            
+        Returns:
+            排序后的视频列表
+        """
+        return _final_videos(self._rank_events(all_videos, topic, top_n))
+    
+    def _rank_events(self, all_videos: List[Dict], topic: str, top_n: int) -> Iterator[SearchEvent]:
+        """
+        步骤 2-4，逐步产出 FilterDone / ScoredBatch / FinalRanking
+        
+        Args:
+            all_videos: 各平台获取的候选视频
+            topic: 搜索主题（英文）
+            top_n: 返回的视频数量
+            
+        Yields:
+            各阶段的进度事件
+        """
         if not all_videos:
             logger.warning("未找到任何视频")
-            return []
+            yield FinalRanking(topic)
+            return
         
-        # 第2步：规则筛选
+        # 第2步：合并近似重复视频，再应用规则筛选
         logger.info("【步骤 2/4】应用规则筛选...")
         filtered_videos = self.rule_filter.filter(
-            all_videos,
+            self._dedupe(all_videos),
             topic,
             target_count=config.RULE_FILTER_COUNT
         )
         logger.info(f"✅ 规则筛选保留 {len(filtered_videos)} 个视频\n")
+        yield FilterDone(topic, videos=filtered_videos, total=len(all_videos))
         
         if not filtered_videos:
             logger.warning("规则筛选后无结果")
-            return []
+            yield FinalRanking(topic)
+            return
         
         # 第3步：AI相关性评分
         logger.info("【步骤 3/4】AI 相关性分析...")
@@ -161,10 +667,12 @@ class VideoSearchAgent:
             target_count=config.AI_FILTER_COUNT
         )
         logger.info(f"✅ AI 筛选保留 {len(scored_videos)} 个高相关视频\n")
+        yield ScoredBatch(topic, videos=scored_videos)
         
         if not scored_videos:
             logger.warning("AI筛选后无结果")
-            return filtered_videos[:top_n]
+            yield FinalRanking(topic, videos=to_dicts(filtered_videos[:top_n]))
+            return
         
         # 第4步：AI精细排序
         logger.info(f"【步骤 4/4】AI 精细排序，选出 Top {top_n}...")
@@ -174,16 +682,91 @@ class VideoSearchAgent:
             top_n=top_n
         )
         logger.info(f"✅ 最终选出 {len(final_results)} 个视频\n")
+        # 返回边界：Video 记录转回普通字典（可直接 JSON 序列化、写入缓存）
+        yield FinalRanking(topic, videos=to_dicts(final_results))
+    
+    def _dedupe(self, videos: List[Dict]) -> List[Dict]:
+        """
+        合并近似重复的视频（跨平台搬运、重复上传）
         
-        # 保存到缓存（使用原始搜索词作为key）
-        if self.use_cache and final_results:
-            self.cache.set(cache_key, final_results)
+        每组保留的一份从满足规则筛选的视频中选出（其次按播放量），
+        不达标的原视频不会挡住达标的副本。
         
-        logger.info(f"{'='*60}")
-        logger.info(f"✅ 搜索完成！")
-        logger.info(f"{'='*60}\n")
+        Args:
+            videos: 候选视频
+            
+        Returns:
+            去重后的视频列表（未启用时原样返回）
+        """
+        if self.deduper is None:
+            return videos
+        return self.deduper.dedupe(videos, eligible=self.rule_filter.passes(videos))
+    
+    def _fetch_plan(self, topic: str) -> List[Tuple[FetcherPlugin, Callable, Dict]]:
+        """
+        各获取器的获取计划
         
-        return final_results
+        Args:
+            topic: 搜索主题
+            
+        Returns:
+            [(获取器插件, 获取函数, 获取参数), ...]
+        """
+        plan = []
+        for plugin in self.fetcher_plugins:
+            fetch = plugin.search(self) if plugin.search else self.fetchers[plugin.name].search_videos
+            if plugin.options:
+                # 调优参数绑定到获取函数上，不进入阶段缓存键
+                fetch = functools.partial(fetch, **plugin.options())
+            plan.append((plugin, fetch, plugin.params(topic)))
+        return plan
+    
+    def _fetch_youtube(self, topic: str, max_results: int, days_ago: int,
+                       min_views: int = 0, min_page_yield: float = 0.0) -> List[Dict]:
+        """
+        YouTube 获取：已知视频只刷新统计数据，完整搜索按较慢的节奏执行
+        
+        主题在 YOUTUBE_FULL_SEARCH_HOURS 内做过完整搜索时，只用 videos.list
+        刷新已知视频的播放量（约 1/100 的配额）；配额不够完整搜索时，
+        即使已知视频已过期也用它刷新。
+        
+        Args:
+            topic: 搜索主题
+            max_results: 候选视频数量预算
+            days_ago: 搜索最近N天内的视频
+            min_views: 判断分页收益时使用的播放量门槛
+            min_page_yield: 每页达标比例下限
+            
+        Returns:
+            视频列表
+        """
+        incremental = self.use_cache and config.YOUTUBE_INCREMENTAL_REFRESH
+        
+        if incremental:
+            known_ids = self.topic_catalog.get(topic, 'YouTube', max_age_hours=config.YOUTUBE_FULL_SEARCH_HOURS)
+            if known_ids:
+                videos = self.youtube_fetcher.refresh_videos(known_ids, days_ago)
+                if videos:
+                    return videos
+        
+        try:
+            videos = self.youtube_fetcher.search_videos(
+                topic,
+                max_results=max_results,
+                days_ago=days_ago,
+                min_views=min_views,
+                min_page_yield=min_page_yield
+            )
+        except QuotaExhaustedError:
+            known_ids = self.topic_catalog.get(topic, 'YouTube') if incremental else None
+            if not known_ids:
+                raise
+            logger.warning("配额不足以完整搜索，刷新已知视频")
+            return self.youtube_fetcher.refresh_videos(known_ids, days_ago)
+        
+        if incremental and videos:
+            self.topic_catalog.set(topic, 'YouTube', [v['video_id'] for v in videos])
+        return videos
     
     def _fetch_from_all_platforms(self, topic: str) -> List[Dict]:
         """
@@ -196,34 +779,116 @@ class VideoSearchAgent:
             合并的视频列表
         """
         all_videos = []
+        for event in self._fetch_events(topic):
+            all_videos.extend(event.videos)
+        return all_videos
+    
+    def _fetch_events(self, topic: str) -> Iterator[FetchedBatch]:
+        """
+        并行从所有平台获取视频，每个平台完成后立即产出
+        
+        Args:
+            topic: 搜索主题
+            
+        Yields:
+            每个平台一个 FetchedBatch（失败时 videos 为空、error 为错误信息）；
+            OFFLINE_SEARCH=first 且本地目录候选充足时，只产出一个 platform='Catalog' 的批次
+        """
+        if config.OFFLINE_SEARCH == 'first' and self.catalog is not None:
+            candidates = self._catalog_candidates(topic, config.OFFLINE_MAX_CANDIDATES)
+            if len(candidates) >= config.OFFLINE_MIN_CANDIDATES:
+                logger.info(f"  ✓ 本地目录: {len(candidates)} 个视频，跳过平台请求")
+                yield FetchedBatch(topic, platform='Catalog', videos=candidates)
+                return
+        
+        tasks = [(topic, plugin, fetch, params) for plugin, fetch, params in self._fetch_plan(topic)]
+        for _, plugin, videos, error in self._run_fetches(tasks):
+            if error:
+                logger.error(f"  ✗ {plugin.platform} 获取失败: {error}")
+                yield FetchedBatch(topic, platform=plugin.platform, error=error, timed_out=error == _TIMED_OUT)
+            else:
+                logger.info(f"  ✓ {plugin.platform}: {len(videos)} 个视频")
+                yield FetchedBatch(topic, platform=plugin.platform, videos=videos)
+    
+    def _run_fetches(self, tasks: List[Tuple[Any, FetcherPlugin, Callable, Dict]]
+                     ) -> Iterator[Tuple[Any, FetcherPlugin, List[Dict], str]]:
+        """
+        并发执行获取任务，按完成顺序产出；超过获取器截止时间的任务不再等待
+        
+        截止时间从提交时算起（含排队时间）。线程无法被强制中止，超时的调用
+        在后台继续运行，完成后结果照常写入阶段缓存和本地目录，供下次搜索使用。
+        
+        Args:
+            tasks: [(任务标识, 获取器插件, 获取函数, 获取参数), ...]
+            
+        Yields:
+            (任务标识, 获取器插件, 视频列表, 错误信息)，成功时错误信息为空字符串
+        """
+        submitted_at = time.monotonic()
+        futures = {}
+        for key, plugin, fetch, params in tasks:
+            future = self._platform_executors[plugin.name].submit(
+                self._fetch_stage, plugin.stage, fetch, plugin.stage_ttl_hours, **params
+            )
+            deadline = submitted_at + plugin.timeout_seconds if plugin.timeout_seconds else None
+            futures[future] = (key, plugin, deadline)
         
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(
-                    self.youtube_fetcher.search_videos,
-                    topic,
-                    config.MAX_RESULTS_PER_PLATFORM,
-                    config.MAX_DAYS_AGO
-                ): 'YouTube',
-                executor.submit(
-                    self.instagram_fetcher.search_videos,
-                    topic,
-                    config.MAX_RESULTS_PER_PLATFORM,
-                    config.MAX_DAYS_AGO,
-                    config.MIN_VIEWS
-                ): 'Instagram'
-            }
-            
-            for future in as_completed(futures):
-                platform = futures[future]
+        pending = set(futures)
+        while pending:
+            deadlines = [futures[f][2] for f in pending if futures[f][2] is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                key, plugin, _ = futures[future]
                 try:
-                    videos = future.result()
-                    logger.info(f"  ✓ {platform}: {len(videos)} 个视频")
-                    all_videos.extend(videos)
+                    yield key, plugin, future.result(), ''
                 except Exception as e:
-                    logger.error(f"  ✗ {platform} 获取失败: {e}")
+                    yield key, plugin, [], str(e) or type(e).__name__
+            
+            now = time.monotonic()
+            expired = [f for f in pending if futures[f][2] is not None and futures[f][2] <= now and not f.done()]
+            for future in expired:
+                pending.discard(future)
+                key, plugin, _ = futures[future]
+                yield key, plugin, [], _TIMED_OUT
+    
+    def _fetch_stage(self, stage: str, fetch, ttl_hours: float, **params) -> List[Dict]:
+        """
+        带阶段缓存的获取调用
         
-        return all_videos
+        Args:
+            stage: 阶段名称（用作缓存命名空间）
+            fetch: 获取函数
+            ttl_hours: 阶段缓存存活时间（小时）
+            **params: 获取输入（同时构成缓存键）
+            
+        Returns:
+            播放量达到 MIN_VIEWS 的 Video 记录（配额耗尽时来自过期的阶段缓存，或为空列表）
+        """
+        if self.use_cache:
+            cached = self.stage_cache.get(stage, params)
+            if cached is not None:
+                return _min_views(to_videos(cached))
+        
+        try:
+            videos = fetch(**params)
+        except QuotaExhaustedError as e:
+            # 仅缓存模式：配额耗尽时退回到过期的阶段缓存
+            logger.warning(f"{e}，改用缓存数据")
+            if self.use_cache:
+                return _min_views(to_videos(self.stage_cache.get(stage, params, allow_expired=True) or []))
+            return []
+        
+        if self.catalog is not None and videos:
+            self.catalog.upsert(videos)
+        
+        # 获取器出错时返回空列表，不缓存空结果以免固化失败
+        # 门槛不在缓存键中的获取器（YouTube）保存未按播放量过滤的结果，调整 MIN_VIEWS 后仍可复用
+        if self.use_cache and videos:
+            self.stage_cache.set(stage, params, to_dicts(videos), ttl_hours)
+        
+        return _min_views(videos)
     
     def clear_cache(self, topic: Optional[str] = None):
         """
@@ -240,6 +905,49 @@ class VideoSearchAgent:
             self.cache.delete(topic)
         else:
             self.cache.clear_all()
+            self.stage_cache.clear()
+            self.topic_catalog.clear()
+    
+    def close(self, wait: bool = True):
+        """
+        关闭 Agent：后台刷新、获取线程池、AI 评分线程池、获取器和 SQLite 连接
+        
+        Args:
+            wait: 是否等待后台刷新和仍在进行的获取结束（它们会写入阶段缓存和本地目录）
+        """
+        if wait:
+            with self._refresh_lock:
+                threads = list(self._refresh_threads)
+            for thread in threads:
+                thread.join()
+        for executor in self._platform_executors.values():
+            executor.shutdown(wait=wait)
+        self.ai_ranker.close(wait=wait)
+        for fetcher in self.fetchers.values():
+            if hasattr(fetcher, 'close'):
+                fetcher.close()
+        
+        stores = [self.quota_ledger, self.catalog]
+        if self.use_cache:
+            stores += [self.cache, self.stage_cache, self.ai_ranker.score_store,
+                       self.translation_cache, self.topic_catalog]
+        for store in stores:
+            if store is not None:
+                store.close()
+
+
+def _min_views(videos: List[Dict]) -> List[Dict]:
+    """按当前 MIN_VIEWS 过滤（在阶段缓存之后应用）"""
+    return [v for v in videos if (v.get('views') or 0) >= config.MIN_VIEWS]
+
+
+def _final_videos(events: Iterator[SearchEvent]) -> List[Dict]:
+    """消费事件流，返回 FinalRanking 中的视频列表"""
+    final_results = []
+    for event in events:
+        if isinstance(event, FinalRanking):
+            final_results = event.videos
+    return final_results
 
 
 def format_results(videos: List[Dict]) -> str:
@@ -268,6 +976,11 @@ def format_results(videos: List[Dict]) -> str:
         output.append(f"   📅 发布时间: {video['days_ago']} 天前")
         output.append(f"   🔗 链接: {video['url']}")
         
+        # 被合并的近似重复副本（如果有）
+        if video.get('duplicates'):
+            copies = ', '.join(f"{c['platform']} {c['url']}" for c in video['duplicates'])
+            output.append(f"   ♻️ 其他副本: {copies}")
+        
         # AI 评分信息（如果有）
         if 'ai_score' in video:
             output.append(f"   🤖 相关性: {video['ai_score']}/100 ({video.get('ai_reason', '')})")
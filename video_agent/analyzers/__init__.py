@@ -3,6 +3,9 @@ Analyzers 包初始化
 """
 from .rule_filter import RuleFilter
 from .ai_ranker import AIRanker
+from .relevance import RelevancePreRanker
+from .dedupe import NearDuplicateDetector
+from .model_caller import ModelCaller, CircuitBreaker, ModelUnavailableError, ModelTimeoutError
 
-__all__ = ['RuleFilter', 'AIRanker']
+__all__ = ['RuleFilter', 'AIRanker', 'RelevancePreRanker', 'NearDuplicateDetector', 'ModelCaller', 'CircuitBreaker', 'ModelUnavailableError', 'ModelTimeoutError']
 
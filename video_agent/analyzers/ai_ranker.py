@@ -2,28 +2,226 @@
 AI 排序分析器 - 使用 Gemini 进行智能分析和排序
 """
 import google.generativeai as genai
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, List, Dict, Optional
+import hashlib
 import logging
-import json
+import threading
+import time
+
+from .. import config
+from ..cache import LRUCache, ScoreStore, normalize_topic
+from .model_caller import ModelCaller
+from .relevance import RelevancePreRanker
+from .json_stream import JSONArrayStreamParser, parse_json_array, validate_item
+from .prompts import (
+    estimate_tokens, format_video_line, format_rank_line,
+    scoring_prompt, multi_scoring_prompt, ranking_prompt,
+    SCORE_ITEM_SCHEMA, MULTI_SCORE_ITEM_SCHEMA, RANK_ITEM_SCHEMA
+)
 
 logger = logging.getLogger(__name__)
 
+# 新版 SDK 支持 JSON 输出模式；0.3.x 的 GenerationConfig 没有 response_mime_type，
+# 只能靠 prompt 约束输出格式，再逐个元素按 schema 校验
+_JSON_MODE_OPTIONS = (
+    {'generation_config': {'response_mime_type': 'application/json'}}
+    if 'response_mime_type' in getattr(genai.types.GenerationConfig, '__annotations__', {}) else {}
+)
+
+# 模型为每个视频输出一项评分 JSON 的大致 token 数（计入批次预算，避免响应被截断）
+_SCORE_OUTPUT_TOKENS = 40
+
 
 class AIRanker:
     """AI 排序器（使用 Gemini）"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, response_cache_size: int = 256,
+                 score_cache_size: int = 4096, score_ttl_hours: float = 24,
+                 score_store: Optional[ScoreStore] = None,
+                 caller: Optional[ModelCaller] = None,
+                 score_batch_tokens: Optional[int] = None, score_parallelism: int = 4,
+                 description_tokens: int = 40, streaming: bool = True,
+                 pre_ranker: Optional[RelevancePreRanker] = None):
         """
         初始化 Gemini API
         
         Args:
             api_key: Gemini API 密钥
+            response_cache_size: 响应缓存条目上限（按模型名+prompt 哈希寻址）
+            score_cache_size: 单视频评分缓存条目上限（按视频+主题寻址）
+            score_ttl_hours: 单视频评分的有效期（小时）
+            score_store: 可选的持久评分存储，进程重启后仍可增量评分
+            caller: 模型调用器（截止时间、重试、对冲、熔断），None 时使用默认参数
+            score_batch_tokens: 单次评分调用的视频描述 + 预期输出 token 预算，超出时分批
+                （None 时使用 config.AI_SCORE_BATCH_TOKENS）
+            score_parallelism: 同时进行的评分批次数
+            description_tokens: 评分 prompt 中每个视频描述摘要的 token 上限
+            streaming: 是否流式接收 JSON 输出（每个元素到达即应用）
+            pre_ranker: 可选的本地相关性预排序器，明显相关/无关的视频不再送入模型
         """
         genai.configure(api_key=api_key)
         # 使用最新的 Gemini 模型
         self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # 所有模型调用都经过调用器：超时、失败或熔断时抛出异常，由各调用方降级
+        self.caller = caller or ModelCaller()
+        
+        # 相同 prompt 不重复调用模型
+        self.response_cache = LRUCache(response_cache_size)
+        # 已评分的 (视频, 主题) 不再进入下一次批量评分
+        self.score_cache = LRUCache(score_cache_size, score_ttl_hours * 3600)
+        self.score_ttl_hours = score_ttl_hours
+        self.score_store = score_store
+        # 本地预排序：只把相关性模糊的视频交给模型评分
+        self.pre_ranker = pre_ranker
+        
+        # 大候选集按 token 预算分批、并发评分，单批失败只影响该批
+        self.score_batch_tokens = score_batch_tokens or config.AI_SCORE_BATCH_TOKENS
+        self.description_tokens = description_tokens
+        self.streaming = streaming
+        self._score_executor = ThreadPoolExecutor(max_workers=max(1, score_parallelism),
+                                                  thread_name_prefix='ai-score')
+        
+        # 每次模型调用的 prompt token 估算（按调用类型汇总）
+        self._prompt_tokens = {}
+        self._prompt_tokens_lock = threading.Lock()
+        
         logger.info("✅ Gemini AI 初始化成功")
     
+    def close(self, wait: bool = True):
+        """
+        关闭评分线程池和模型调用器
+        
+        Args:
+            wait: 是否等待进行中的评分批次结束
+        """
+        self._score_executor.shutdown(wait=wait)
+        self.caller.close()
+    
+    def generate_text(self, prompt: str, kind: str = 'other',
+                      on_text: Optional[Callable[[str], None]] = None, **request_options) -> str:
+        """
+        调用模型并返回响应文本（经过截止时间、重试、对冲和熔断）
+        
+        Args:
+            prompt: 完整 prompt
+            kind: 调用类型（score / rank / translate ...），用于 token 统计
+            on_text: 流式回调，每个响应片段到达时调用
+            **request_options: 透传给 generate_content 的参数
+        
+        Returns:
+            去除首尾空白的响应文本
+        """
+        tokens = estimate_tokens(prompt)
+        with self._prompt_tokens_lock:
+            entry = self._prompt_tokens.setdefault(kind, {'calls': 0, 'tokens': 0})
+            entry['calls'] += 1
+            entry['tokens'] += tokens
+        logger.info(f"📏 {kind} prompt ≈ {tokens} tokens")
+        return self.caller.generate(self.model, prompt, on_text=on_text, **request_options).strip()
+    
+    def prompt_token_stats(self) -> Dict:
+        """各类型调用的次数、prompt token 总数和平均值"""
+        with self._prompt_tokens_lock:
+            return {
+                kind: dict(entry, per_call=entry['tokens'] // entry['calls'])
+                for kind, entry in self._prompt_tokens.items()
+            }
+    
+    def generate_json(self, prompt: str, kind: str = 'other', schema: Optional[Dict[str, Any]] = None,
+                      on_item: Optional[Callable[[Dict], None]] = None) -> List[Any]:
+        """
+        调用模型并增量解析 JSON 数组输出（带响应缓存）
+        
+        流式开启时每个数组元素一到达就按 schema 校验并回调 on_item；损坏或不符合
+        schema 的元素被跳过，不影响其余元素。响应中途失败时返回已收到的有效元素，
+        数组结构损坏（顶层出现多余的 '}'）时整体失败。
+        只有完整且没有无效元素的响应才写入缓存，避免固化错误输出。
+        
+        Args:
+            prompt: 完整 prompt
+            kind: 调用类型，用于 token 统计
+            schema: 数组元素 schema（{字段名: 类型}），None 表示不校验
+            on_item: 每个有效元素到达时的回调
+        
+        Returns:
+            有效元素列表
+        
+        Raises:
+            ValueError: 输出中没有 JSON 数组，或数组结构错误
+        """
+        model_name = getattr(self.model, 'model_name', '')
+        key = hashlib.sha256(f"{model_name}\x00{prompt}".encode('utf-8')).hexdigest()
+        
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info("✅ AI 响应缓存命中")
+            items, _ = parse_json_array(cached, schema)
+            for item in items:
+                if on_item is not None:
+                    on_item(item)
+            return items
+        
+        parser = JSONArrayStreamParser()
+        items = []
+        rejected = 0
+        start = time.monotonic()
+        
+        def consume(text: str):
+            nonlocal rejected
+            for item in parser.feed(text):
+                if schema is not None and not validate_item(item, schema):
+                    rejected += 1
+                    continue
+                if not items:
+                    logger.info(f"⚡ {kind} 首个结果 {time.monotonic() - start:.2f}s")
+                items.append(item)
+                if on_item is not None:
+                    on_item(item)
+        
+        try:
+            # 调用 Gemini
+            if self.streaming:
+                text = self.generate_text(prompt, kind, on_text=consume, **_JSON_MODE_OPTIONS)
+            else:
+                text = self.generate_text(prompt, kind, **_JSON_MODE_OPTIONS)
+                consume(text)
+        except Exception as e:
+            if not items or parser.malformed:
+                # 结构损坏的响应整体作废，由调用方走降级逻辑
+                raise
+            logger.warning(f"模型响应中断（{e}），保留已收到的 {len(items)} 项")
+            return items
+        
+        if not parser.started:
+            raise ValueError("模型输出中没有 JSON 数组")
+        
+        invalid = parser.errors + rejected
+        if invalid and not items:
+            raise ValueError(f"模型输出的 {invalid} 个元素均无效")
+        if invalid:
+            logger.warning(f"跳过 {invalid} 个无效元素，保留 {len(items)} 项")
+        elif parser.finished:
+            self.response_cache.set(key, text)
+        return items
+    
+    @staticmethod
+    def _score_key(video: Dict, topic: str) -> str:
+        """单视频评分缓存键：平台 + 视频ID + 标准化主题"""
+        return f"{video.get('platform', '')}:{video.get('video_id', '')}|{normalize_topic(topic)}"
+    
+    def cache_stats(self) -> Dict:
+        """响应缓存和评分缓存的命中统计，以及模型调用统计"""
+        stats = {
+            'responses': self.response_cache.stats(),
+            'scores': self.score_cache.stats(),
+            'model_calls': self.caller.stats(),
+            'prompt_tokens': self.prompt_token_stats()
+        }
+        if self.pre_ranker is not None:
+            stats['pre_rank'] = self.pre_ranker.stats()
+        return stats
+    
     def score_relevance(self, videos: List[Dict], topic: str, 
                        target_count: int = 15) -> List[Dict]:
         """
@@ -33,7 +231,7 @@ class AIRanker:
             videos: 候选视频列表
             topic: 搜索主题
             target_count: 目标保留数量
-            
+        
         Returns:
             带有AI评分的视频列表
         """
@@ -43,78 +241,320 @@ class AIRanker:
         logger.info(f"开始 AI 相关性评分: {len(videos)} 个视频")
         
         try:
-            # 构建批量分析的 prompt
-            video_texts = []
-            for i, video in enumerate(videos):
-                video_text = f"{i+1}. [{video['platform']}] {video['title'][:100]}\n"
-                video_text += f"   作者: {video['author']}\n"
-                video_text += f"   描述: {video['description'][:150]}\n"
-                video_text += f"   播放量: {video['views']:,} | {video['days_ago']}天前\n"
-                video_texts.append(video_text)
-            
-            prompt = f"""
-你是一个自媒体内容分析专家。请深度分析以下真实YouTube视频与主题"{topic}"的相关性。
-
-⚠️ 重要：这些都是真实存在的视频，有真实的播放量和作者信息。请基于这些真实数据进行分析。
-
-评分标准：
-- 90-100分：完全相关，内容直接匹配主题，值得深度学习
-- 70-89分：高度相关，涉及主题核心方面，有参考价值
-- 50-69分：中度相关，部分内容相关
-- 30-49分：弱相关，仅标题提及
-- 0-29分：不相关或标题党
-
-视频列表（真实YouTube数据）：
-{chr(10).join(video_texts)}
-
-请输出JSON数组，每个视频包含：
-- id: 视频序号（1开始）
-- score: 相关性评分（0-100）
-- reason: 简短理由（15字内）
-- hook: 这个视频的核心吸引点/钩子（15字内，如"7天涨粉10万"）
-
-只输出JSON，不要其他文字：
-[{{"id": 1, "score": 85, "reason": "完整教程覆盖核心要点", "hook": "从0到100万粉丝实战"}}, ...]
-"""
-            
-            # 调用 Gemini
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # 清理可能的markdown代码块标记
-            if result_text.startswith('```'):
-                result_text = result_text.split('```')[1]
-                if result_text.startswith('json'):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
+            # 先应用已有评分，只把未评分的视频送入模型
+            pending = self._apply_cached_scores(videos, topic)
+            pending = self._pre_rank(pending, topic)
             
-            # 解析 JSON
-            scores = json.loads(result_text)
-            
-            # 将评分添加到视频中
-            for score_item in scores:
-                idx = score_item['id'] - 1
-                if 0 <= idx < len(videos):
-                    videos[idx]['ai_score'] = score_item['score']
-                    videos[idx]['ai_reason'] = score_item['reason']
-                    videos[idx]['hook_text'] = score_item.get('hook', '')  # 钩子文本
-            
-            # 筛选高分视频
-            filtered = [v for v in videos if v.get('ai_score', 0) >= 70]
-            filtered = sorted(filtered, key=lambda x: x.get('ai_score', 0), reverse=True)
-            
-            # 限制数量
-            filtered = filtered[:target_count]
-            
-            logger.info(f"✅ AI 评分完成: 保留 {len(filtered)} 个高相关视频")
-            return filtered
+            failed = self._score_chunks(pending, topic) if pending else []
             
+            selected = self._select_relevant(videos, target_count)
+            if failed and len(selected) < target_count:
+                # 失败批次的视频按播放量补位（没有 AI 评分）
+                backfill = sorted(failed, key=lambda x: x['views'], reverse=True)
+                selected += backfill[:target_count - len(selected)]
+            return selected
+        
         except Exception as e:
             logger.error(f"AI 评分失败: {e}")
             logger.warning("降级使用播放量排序")
             # 降级：使用播放量排序
             return sorted(videos, key=lambda x: x['views'], reverse=True)[:target_count]
     
+    def score_relevance_many(self, topic_videos: Dict[str, List[Dict]],
+                             target_count: int = 15,
+                             max_pairs_per_call: int = 60) -> Dict[str, List[Dict]]:
+        """
+        多个主题合并评分：跨主题重复的视频在 prompt 中只出现一次，
+        多个主题的 (视频, 主题) 组合打包进更少的模型调用
+        
+        每个主题的视频列表必须是独立的字典（评分按主题写入）。
+        
+        Args:
+            topic_videos: {主题: 候选视频列表}
+            target_count: 每个主题的目标保留数量
+            max_pairs_per_call: 单次调用最多评估的 (视频, 主题) 组合数
+        
+        Returns:
+            {主题: 带有AI评分的视频列表}
+        """
+        pending_by_topic = {}
+        for topic, videos in topic_videos.items():
+            pending = self._pre_rank(self._apply_cached_scores(videos, topic), topic)
+            if pending:
+                pending_by_topic[topic] = pending
+        
+        if pending_by_topic:
+            total = sum(len(v) for v in pending_by_topic.values())
+            logger.info(f"开始多主题 AI 评分: {len(pending_by_topic)} 个主题, {total} 个 (视频, 主题) 组合")
+            
+            # 按视频去重：同一视频的所有待评主题合并到一行
+            unique = {}
+            for topic, videos in pending_by_topic.items():
+                for video in videos:
+                    key = (video.get('platform', ''), str(video.get('video_id', '')))
+                    entry = unique.setdefault(key, {'video': video, 'copies': {}})
+                    entry['copies'].setdefault(topic, []).append(video)
+            
+            if len(unique) < total:
+                logger.info(f"♻️ 跨主题重复视频合并后剩 {len(unique)} 个")
+            
+            # 打包成若干次调用
+            groups, group, pairs = [], [], 0
+            for entry in unique.values():
+                n = len(entry['copies'])
+                if group and pairs + n > max_pairs_per_call:
+                    groups.append(group)
+                    group, pairs = [], 0
+                group.append(entry)
+                pairs += n
+            if group:
+                groups.append(group)
+            
+            futures = [self._score_executor.submit(self._score_multi_batch, group) for group in groups]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"多主题 AI 评分失败: {e}")
+        
+        results = {}
+        for topic, videos in topic_videos.items():
+            unscored = [v for v in pending_by_topic.get(topic, []) if 'ai_score' not in v]
+            if unscored:
+                # 合并调用未覆盖的主题单独评分（含降级逻辑）
+                results[topic] = self.score_relevance(videos, topic, target_count)
+            else:
+                results[topic] = self._select_relevant(videos, target_count)
+        return results
+    
+    def _apply_cached_scores(self, videos: List[Dict], topic: str) -> List[Dict]:
+        """
+        应用内存评分缓存和持久评分存储中的已有评分
+        
+        Args:
+            videos: 候选视频列表
+            topic: 搜索主题
+        
+        Returns:
+            仍需模型评分的视频
+        """
+        pending = []
+        for video in videos:
+            cached = self.score_cache.get(self._score_key(video, topic))
+            if cached is not None:
+                video.update(cached)
+            else:
+                pending.append(video)
+        
+        # 内存未命中的再查持久评分存储
+        if pending and self.score_store is not None:
+            stored = self.score_store.get_scores(topic, pending, self.score_ttl_hours)
+            still_pending = []
+            for video in pending:
+                result = stored.get((video.get('platform', ''), str(video.get('video_id', ''))))
+                if result is not None:
+                    video.update(result)
+                    self.score_cache.set(self._score_key(video, topic), result)
+                else:
+                    still_pending.append(video)
+            pending = still_pending
+        
+        if len(pending) < len(videos):
+            logger.info(f"♻️ 复用 {len(videos) - len(pending)} 个已有评分，待评分 {len(pending)} 个")
+        
+        return pending
+    
+    def _pre_rank(self, videos: List[Dict], topic: str) -> List[Dict]:
+        """
+        本地预排序：明显相关和明显无关的视频直接得到本地评分
+        
+        Args:
+            videos: 待评分的视频
+            topic: 搜索主题
+        
+        Returns:
+            仍需模型评分的视频（相关性模糊的一段）
+        """
+        if self.pre_ranker is None or not videos:
+            return videos
+        _, ambiguous, _ = self.pre_ranker.split(videos, topic)
+        return ambiguous
+    
+    def _select_relevant(self, videos: List[Dict], target_count: int) -> List[Dict]:
+        """
+        保留高分视频（≥70 分），按评分排序并截取
+        
+        Args:
+            videos: 已评分的视频
+            target_count: 目标保留数量
+        
+        Returns:
+            高相关视频列表
+        """
+        # 筛选高分视频
+        filtered = [v for v in videos if v.get('ai_score', 0) >= 70]
+        filtered = sorted(filtered, key=lambda x: x.get('ai_score', 0), reverse=True)
+        
+        # 限制数量
+        filtered = filtered[:target_count]
+        
+        logger.info(f"✅ AI 评分完成: 保留 {len(filtered)} 个高相关视频")
+        return filtered
+    
+    def _record_score(self, video: Dict, topic: str, score_item: Dict) -> Dict:
+        """
+        把模型返回的评分写入视频字典和内存评分缓存
+        
+        Args:
+            video: 视频
+            topic: 搜索主题
+            score_item: 模型输出的单项评分
+        
+        Returns:
+            标准化的评分字典
+        """
+        result = {
+            'ai_score': score_item['score'],
+            'ai_reason': score_item['reason'],
+            'hook_text': score_item.get('hook', '')  # 钩子文本
+        }
+        video.update(result)
+        self.score_cache.set(self._score_key(video, topic), result)
+        return result
+    
+    def _score_chunks(self, videos: List[Dict], topic: str) -> List[Dict]:
+        """
+        按 token 预算分批并发评分
+        
+        同一视频（平台 + 视频ID）只送入模型一次，评分合并回所有副本。
+        单批失败只丢失该批的评分；全部失败时抛出异常，由调用方降级。
+        
+        Args:
+            videos: 待评分视频
+            topic: 搜索主题
+        
+        Returns:
+            评分失败的视频
+        """
+        unique = {}
+        for video in videos:
+            unique.setdefault((video.get('platform', ''), str(video.get('video_id', ''))), []).append(video)
+        representatives = [copies[0] for copies in unique.values()]
+        
+        chunks = self._chunk_videos(representatives)
+        if len(chunks) == 1:
+            self._score_batch(chunks[0], topic)
+            failed_chunks = []
+        else:
+            logger.info(f"📦 分 {len(chunks)} 批并发评分（每批 ≤ {self.score_batch_tokens} tokens）")
+            futures = {self._score_executor.submit(self._score_batch, chunk, topic): chunk for chunk in chunks}
+            failed_chunks = []
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"AI 评分批次失败（{len(futures[future])} 个视频）: {e}")
+                    failed_chunks.append(futures[future])
+            if len(failed_chunks) == len(chunks):
+                raise RuntimeError(f"全部 {len(chunks)} 个评分批次失败")
+        
+        # 按视频ID合并：重复视频复制代表视频的评分
+        for copies in unique.values():
+            if len(copies) > 1 and 'ai_score' in copies[0]:
+                for video in copies[1:]:
+                    self._record_score(video, topic, {
+                        'score': copies[0]['ai_score'],
+                        'reason': copies[0]['ai_reason'],
+                        'hook': copies[0].get('hook_text', '')
+                    })
+        
+        failed_keys = {(v.get('platform', ''), str(v.get('video_id', ''))) for chunk in failed_chunks for v in chunk}
+        return [v for key in failed_keys for v in unique[key]]
+    
+    def _chunk_videos(self, videos: List[Dict]) -> List[List[Dict]]:
+        """
+        按 token 预算切分候选视频（每批至少一个视频）
+        
+        Args:
+            videos: 待评分视频
+        
+        Returns:
+            批次列表
+        """
+        chunks, chunk, used = [], [], 0
+        for video in videos:
+            line = format_video_line(len(chunk), video, self.description_tokens)
+            cost = estimate_tokens(line) + _SCORE_OUTPUT_TOKENS
+            if chunk and used + cost > self.score_batch_tokens:
+                chunks.append(chunk)
+                chunk, used = [], 0
+            chunk.append(video)
+            used += cost
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    def _score_batch(self, videos: List[Dict], topic: str):
+        """
+        调用模型为一批视频评分，结果写入视频字典和评分缓存
+        
+        Args:
+            videos: 待评分视频
+            topic: 搜索主题
+        """
+        # 构建批量分析的 prompt
+        video_lines = [format_video_line(i, video, self.description_tokens) for i, video in enumerate(videos)]
+        prompt = scoring_prompt(topic, video_lines)
+        
+        # 每个评分到达即写入视频（流式），响应中断时已到达的评分仍然有效
+        scored = []
+        
+        def apply(score_item: Dict):
+            idx = score_item['id'] - 1
+            if 0 <= idx < len(videos):
+                result = self._record_score(videos[idx], topic, score_item)
+                scored.append((videos[idx], result))
+        
+        self.generate_json(prompt, 'score', schema=SCORE_ITEM_SCHEMA, on_item=apply)
+        
+        if self.score_store is not None:
+            self.score_store.set_scores(topic, scored)
+    
+    def _score_multi_batch(self, group: List[Dict]):
+        """
+        一次模型调用评估多个主题的视频
+        
+        Args:
+            group: [{'video': 代表视频, 'copies': {主题: [该主题下的视频字典, ...]}}, ...]
+        """
+        topics = list(dict.fromkeys(topic for entry in group for topic in entry['copies']))
+        topic_index = {topic: i + 1 for i, topic in enumerate(topics)}
+        
+        video_lines = [
+            format_video_line(i, entry['video'], self.description_tokens,
+                              targets=', '.join(f"T{topic_index[t]}" for t in entry['copies']))
+            for i, entry in enumerate(group)
+        ]
+        prompt = multi_scoring_prompt(topics, video_lines)
+        
+        scored_by_topic = {}
+        
+        def apply(score_item: Dict):
+            idx = score_item['id'] - 1
+            t_idx = score_item['topic'] - 1
+            if not (0 <= idx < len(group) and 0 <= t_idx < len(topics)):
+                return
+            topic = topics[t_idx]
+            for video in group[idx]['copies'].get(topic, []):
+                result = self._record_score(video, topic, score_item)
+                scored_by_topic.setdefault(topic, []).append((video, result))
+        
+        self.generate_json(prompt, 'score_many', schema=MULTI_SCORE_ITEM_SCHEMA, on_item=apply)
+        
+        if self.score_store is not None:
+            for topic, scored in scored_by_topic.items():
+                self.score_store.set_scores(topic, scored)
+    
     def rank_top_n(self, videos: List[Dict], topic: str, top_n: int = 10) -> List[Dict]:
         """
         精细排序，选出最终的 Top N
@@ -123,7 +563,7 @@ class AIRanker:
             videos: 高质量候选视频
             topic: 搜索主题
             top_n: 最终返回数量
-            
+        
         Returns:
             排序后的 Top N 视频
         """
@@ -136,57 +576,12 @@ class AIRanker:
         logger.info(f"开始 AI 精细排序: 从 {len(videos)} 个中选出 Top {top_n}")
         
         try:
-            # 构建视频列表
-            video_texts = []
-            for i, video in enumerate(videos):
-                video_text = f"{i+1}. [{video['platform']}] {video['title'][:80]}\n"
-                video_text += f"   作者: @{video['author']}\n"
-                video_text += f"   播放量: {video['views']:,} | {video['days_ago']}天前\n"
-                video_text += f"   相关性: {video.get('ai_score', 'N/A')}\n"
-                video_texts.append(video_text)
-            
-            prompt = f"""
-你是一个视频推荐专家，擅长分析爆款视频的运营逻辑和可复制性。
-从以下视频中选出最好的{top_n}个，推荐给对"{topic}"感兴趣的欧美自媒体创作者。
-
-⚠️ 重要：这些都是真实存在的视频，有真实的播放量和作者信息。请基于这些真实数据进行分析，不要编造信息。
-
-选择标准：
-1. 相关性：内容与主题高度匹配，且是欧美创作者的视频
-2. 质量：播放量、互动率显示受欢迎程度
-3. 时效性：较新的视频优先（但不是唯一标准）
-4. 多样性：尽量覆盖主题的不同角度和风格
-5. 深度分析：提取视频的"钩子文本"、"可复制性评分"、"关键学习点"和"成功原因"
-
-候选视频：
-{chr(10).join(video_texts)}
-
-请输出JSON数组，每个视频包含：
-- rank: 最终排名（1到{top_n}）
-- id: 视频序号（1开始）
-- reason: 简短的推荐理由（15字内）
-- hookText: 视频最吸引人的"钩子文本"或核心卖点（20字内）
-- replicabilityScore: 可复制性评分（1-10分，10分表示非常容易复制，1分表示非常难）
-- keyLearningPoints: 视频中可以学习到的关键技巧或策略（20字内，用逗号分隔）
-- reasonForSuccess: 视频成为爆款的主要原因（30字内）
-
-只输出JSON数组，不要其他文字：
-[{{"rank": 1, "id": 1, "reason": "标题吸引，内容实用", "hookText": "7天涨粉10万实战方法", "replicabilityScore": 8, "keyLearningPoints": "前3秒钩子,清晰框架,强CTA", "reasonForSuccess": "真实案例+详细步骤+可执行建议"}}, ...]
-"""
+            # 评分阶段已经看过描述，这里只带评分和钩子
+            video_lines = [format_rank_line(i, video) for i, video in enumerate(videos)]
+            prompt = ranking_prompt(topic, top_n, video_lines)
             
             # 调用 Gemini
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # 清理可能的markdown代码块标记
-            if result_text.startswith('```'):
-                result_text = result_text.split('```')[1]
-                if result_text.startswith('json'):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            # 解析 JSON
-            rankings = json.loads(result_text)
+            rankings = self.generate_json(prompt, 'rank', schema=RANK_ITEM_SCHEMA)
             
             # 按排名组装结果
             ranked_videos = []
@@ -209,7 +604,7 @@ class AIRanker:
             
             logger.info(f"✅ AI 排序完成: Top {len(ranked_videos)} 视频已选出")
             return ranked_videos[:top_n]
-            
+        
         except Exception as e:
             logger.error(f"AI 排序失败: {e}")
             logger.warning("降级使用综合排序")
@@ -268,6 +663,10 @@ def test_ai_ranker():
     scored = ranker.score_relevance(test_videos, "AI coding")
     for video in scored:
         print(f"  {video['title']}: {video.get('ai_score', 'N/A')} - {video.get('ai_reason', 'N/A')}")
+    
+    print("\n=== 测试评分缓存（第二次评分不调用模型） ===")
+    ranker.score_relevance(test_videos, "AI coding")
+    print(f"  缓存统计: {ranker.cache_stats()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,270 @@
+"""
+近似重复检测 - 合并跨平台搬运和重复上传的同一视频（标题 SimHash + 缩略图 dHash）
+"""
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import logging
+import os
+import re
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 可选：未安装时只按标题去重
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+_TAG_PATTERN = re.compile(r'[#@]\w+')
+_WORD_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]')
+# 搬运时常被加上或去掉的词，不影响内容是否相同
+_NOISE_WORDS = frozenset(
+    'shorts short reel reels viral fyp foryou trending official full hd 4k new reupload repost '
+    'video clip part ep the a an'.split()
+)
+# Instagram 没有说明文字时的占位标题，不能用来判断重复
+_PLACEHOLDER_PATTERN = re.compile(r'^(video by \S+|instagram post \S+)$', re.IGNORECASE)
+_THUMBNAIL_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def normalize_title(title: str) -> List[str]:
+    """
+    标准化标题：去掉链接、#标签、@提及、表情和标点，以及搬运常见的噪声词
+    
+    Args:
+        title: 原始标题（Instagram 为说明文字开头）
+    
+    Returns:
+        词列表（英文按词，中文按字）
+    """
+    if not title or _PLACEHOLDER_PATTERN.match(title.strip()):
+        return []
+    text = _TAG_PATTERN.sub(' ', _URL_PATTERN.sub(' ', title.lower()))
+    return [word for word in _WORD_PATTERN.findall(text) if word not in _NOISE_WORDS]
+
+
+def simhash(words: List[str]) -> int:
+    """
+    64 位 SimHash：以单词和相邻两词为特征，特征哈希用 blake2b（跨进程稳定）
+    
+    Args:
+        words: 标准化后的词列表
+    
+    Returns:
+        指纹
+    """
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    digests = b''.join(hashlib.blake2b(f.encode('utf-8'), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(features), 8), axis=1)
+    votes = (2 * bits.astype(np.int64) - 1).sum(axis=0)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+def dhash(path: str, size: int = 8) -> Optional[int]:
+    """
+    缩略图差值哈希（dHash）：缩放成 (size+1)×size 灰度图，比较相邻像素明暗
+    
+    Args:
+        path: 本地缩略图文件
+        size: 哈希边长（64 位时为 8）
+    
+    Returns:
+        指纹；Pillow 未安装或图片无法读取时返回 None
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            pixels = np.asarray(image.convert('L').resize((size + 1, size)), dtype=np.int16)
+    except (OSError, ValueError) as e:
+        logger.debug(f"缩略图无法读取: {path} ({e})")
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+def _near_pairs(signatures: Dict[int, int], max_distance: int):
+    """
+    找出汉明距离不超过 max_distance 的指纹对
+    
+    把 64 位分成 max_distance + 1 段：距离不超过 max_distance 的两个指纹至少有一段
+    完全相同（抽屉原理），所以只需比较至少一段相同的指纹，不必两两比较。
+    
+    Args:
+        signatures: {视频下标: 指纹}
+        max_distance: 最大汉明距离
+    
+    Yields:
+        (下标, 下标)
+    """
+    bands = max(1, min(max_distance + 1, 64))
+    width = 64 // bands
+    checked = set()
+    for band in range(bands):
+        shift = band * width
+        mask = (1 << (64 - shift if band == bands - 1 else width)) - 1
+        buckets = {}
+        for index, signature in signatures.items():
+            buckets.setdefault((signature >> shift) & mask, []).append(index)
+        for members in buckets.values():
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    if hamming(signatures[a], signatures[b]) <= max_distance:
+                        yield a, b
+
+
+class NearDuplicateDetector:
+    """
+    近似重复检测器
+    
+    同一段内容常以 YouTube Shorts 和 Instagram Reels 各发一份，或被多次搬运上传。
+    标题（去掉标签、表情和噪声词后）SimHash 相近，或本地已缓存的缩略图 dHash 相近，
+    即视为同一视频；每组只保留一份（优先满足筛选规则的，其次播放量最高的），
+    其余副本记录在 duplicates 字段中。
+    """
+    
+    def __init__(self, title_distance: int = 3, thumbnail_distance: int = 5,
+                 thumbnail_dir: str = '', min_title_words: int = 4):
+        """
+        初始化检测器
+        
+        Args:
+            title_distance: 标题指纹的最大汉明距离（64 位）
+            thumbnail_distance: 缩略图指纹的最大汉明距离（64 位）
+            thumbnail_dir: 本地缩略图缓存目录（文件名为 {平台}_{视频ID}.jpg 等，空字符串表示不比较缩略图）
+            min_title_words: 标题至少包含的词数（过短的通用标题不参与比较）
+        """
+        self.title_distance = title_distance
+        self.thumbnail_distance = thumbnail_distance
+        self.thumbnail_dir = thumbnail_dir
+        self.min_title_words = min_title_words
+    
+    def thumbnail_path(self, video: Dict) -> Optional[str]:
+        """
+        视频在本地缩略图缓存中的文件
+        
+        Args:
+            video: 视频
+        
+        Returns:
+            文件路径，未缓存时返回 None
+        """
+        if not self.thumbnail_dir:
+            return None
+        stem = f"{video.get('platform', '').lower()}_{video.get('video_id', '')}"
+        for extension in _THUMBNAIL_EXTENSIONS:
+            path = os.path.join(self.thumbnail_dir, stem + extension)
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def dedupe(self, videos: List[Dict], eligible: Optional[Sequence[bool]] = None) -> List[Dict]:
+        """
+        合并近似重复的视频
+        
+        Args:
+            videos: 候选视频
+            eligible: 可选，每个视频是否满足筛选规则；每组优先从满足规则的视频中选保留的一份，
+                避免不达标的原视频挡住达标的搬运副本
+        
+        Returns:
+            去重后的视频列表（保持首次出现的顺序；每组保留满足规则的视频中播放量最高的一份，
+            被合并的副本写入其 duplicates 字段）
+        """
+        if len(videos) < 2:
+            return videos
+        
+        title_signatures = {}
+        for index, video in enumerate(videos):
+            words = normalize_title(video.get('title', ''))
+            if len(words) >= self.min_title_words:
+                title_signatures[index] = simhash(words)
+        
+        thumbnail_signatures = {}
+        if self.thumbnail_dir:
+            for index, video in enumerate(videos):
+                path = self.thumbnail_path(video)
+                signature = dhash(path) if path else None
+                if signature is not None:
+                    thumbnail_signatures[index] = signature
+        
+        # 并查集合并相近的视频
+        parent = list(range(len(videos)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        pairs = list(_near_pairs(title_signatures, self.title_distance))
+        pairs += _near_pairs(thumbnail_signatures, self.thumbnail_distance)
+        for a, b in pairs:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        if not pairs:
+            return videos
+        
+        groups = {}
+        for index in range(len(videos)):
+            groups.setdefault(find(index), []).append(index)
+        
+        results = []
+        merged = 0
+        for members in groups.values():
+            canonical = max(members, key=lambda i: (
+                bool(eligible[i]) if eligible is not None else True,
+                videos[i].get('views') or 0,
+                -i
+            ))
+            video = videos[canonical]
+            copies = [videos[i] for i in members if i != canonical]
+            if copies:
+                merged += len(copies)
+                video['duplicates'] = [
+                    {key: copy.get(key) for key in ('platform', 'video_id', 'url', 'views')}
+                    for copy in copies
+                ]
+            results.append(video)
+        
+        logger.info(f"♻️ 近似重复视频: 合并 {merged} 个副本，剩余 {len(results)} 个")
+        return results
+
+
+def test_dedupe():
+    """测试近似重复检测"""
+    videos = [
+        {'platform': 'YouTube', 'video_id': 'a', 'title': 'I built a full app with Cursor in 1 hour #shorts',
+         'url': 'https://youtube.com/shorts/a', 'views': 500000},
+        {'platform': 'Instagram', 'video_id': 'b', 'title': 'I built a full app with Cursor in 1 hour 🚀 #ai #coding',
+         'url': 'https://instagram.com/p/b/', 'views': 800000},
+        {'platform': 'YouTube', 'video_id': 'c', 'title': 'I BUILT A FULL APP WITH CURSOR IN 1 HOUR (reupload)',
+         'url': 'https://youtube.com/watch?v=c', 'views': 20000},
+        {'platform': 'YouTube', 'video_id': 'd', 'title': 'Cursor vs Copilot: which AI editor wins?',
+         'url': 'https://youtube.com/watch?v=d', 'views': 300000},
+        {'platform': 'Instagram', 'video_id': 'e', 'title': 'Video by someone', 'views': 1000},
+    ]
+    
+    detector = NearDuplicateDetector()
+    results = detector.dedupe(videos)
+    
+    print(f"\n输入 {len(videos)} 个视频，去重后 {len(results)} 个:")
+    for video in results:
+        copies = ', '.join(f"{c['platform']}:{c['video_id']}" for c in video.get('duplicates', []))
+        print(f"  [{video['platform']}] {video['title'][:50]}  {f'(合并: {copies})' if copies else ''}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    test_dedupe()
@@ -0,0 +1,160 @@
+"""
+增量 JSON 数组解析 - 模型流式输出时逐个解析数组元素，单个元素损坏不影响其余元素
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """
+    增量解析顶层 JSON 数组
+    
+    feed() 接收任意切分的文本片段，返回本次新完成的数组元素。第一个 '[' 之前的内容
+    （如 ```json 代码块标记、说明文字）被忽略；解析失败的元素被跳过并计入 errors，
+    数组未闭合（响应被截断）时已完成的元素照常返回。只有 ']' 结束数组，顶层的 '}'
+    说明结构已损坏，抛出 ValueError，由调用方按整体失败处理。
+    """
+    
+    def __init__(self):
+        self.errors = 0  # 解析失败的元素数
+        self.started = False  # 是否已遇到数组起始 '['
+        self.finished = False  # 是否已遇到数组结束 ']'
+        self.malformed = False  # 是否遇到顶层结构错误
+        self._buffer = ''
+        self._pos = 0  # 已扫描到的位置
+        self._element_start = None
+        self._depth = 0  # 数组内的嵌套深度（0 表示位于顶层数组元素之间）
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, text: str) -> List[Any]:
+        """
+        输入一段文本
+        
+        Args:
+            text: 模型输出片段
+        
+        Returns:
+            本次新完成的元素
+        
+        Raises:
+            ValueError: 顶层结构错误（如元素之间出现多余的 '}'），之后的输入被忽略
+        """
+        if self.finished or self.malformed or not text:
+            return []
+        self._buffer += text
+        items = []
+        
+        if not self.started:
+            start = self._buffer.find('[', self._pos)
+            if start < 0:
+                self._pos = len(self._buffer)
+                return items
+            self.started = True
+            self._pos = start + 1
+        
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+                if self._element_start is None:
+                    self._element_start = i
+            elif char in '{[':
+                if self._element_start is None:
+                    self._element_start = i
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    if char == '}':
+                        # 顶层没有未闭合的对象：结构已损坏，不能当作数组结束
+                        self.malformed = True
+                        raise ValueError(f"JSON 数组结构错误：位置 {i} 出现多余的 '}}'")
+                    # 顶层数组结束
+                    self._emit(buffer[self._element_start:i] if self._element_start is not None else '', items)
+                    self._element_start = None
+                    self.finished = True
+                    i += 1
+                    break
+                self._depth -= 1
+            elif char == ',' and self._depth == 0:
+                self._emit(buffer[self._element_start:i] if self._element_start is not None else '', items)
+                self._element_start = None
+            elif self._element_start is None and not char.isspace():
+                # 数字、true/false/null 等标量元素
+                self._element_start = i
+            i += 1
+        
+        # 丢弃已完成的部分，避免缓冲区无限增长
+        keep_from = self._element_start if self._element_start is not None else i
+        self._buffer = buffer[keep_from:]
+        if self._element_start is not None:
+            self._element_start = 0
+        self._pos = i - keep_from
+        return items
+    
+    def _emit(self, text: str, items: List[Any]):
+        """解析一个完整元素（空白忽略，失败计数）"""
+        text = text.strip()
+        if not text:
+            return
+        try:
+            items.append(json.loads(text))
+        except json.JSONDecodeError:
+            self.errors += 1
+            logger.warning(f"跳过无法解析的 JSON 元素: {text[:80]}")
+
+
+def validate_item(item: Any, schema: Dict[str, Any]) -> bool:
+    """
+    检查数组元素是否符合 schema（必填字段 → 类型），整数字段接受数字字符串并就地转换
+    
+    Args:
+        item: 解析出的元素
+        schema: {字段名: 类型或类型元组}
+    
+    Returns:
+        是否有效
+    """
+    if not isinstance(item, dict):
+        return False
+    for key, expected in schema.items():
+        value = item.get(key)
+        if expected is int and isinstance(value, str) and value.strip().isdigit():
+            value = item[key] = int(value)
+        if isinstance(value, bool) or not isinstance(value, expected):
+            return False
+    return True
+
+
+def parse_json_array(text: str, schema: Optional[Dict[str, Any]] = None) -> Tuple[List[Any], int]:
+    """
+    一次性解析完整响应（缓存命中时使用）
+    
+    Args:
+        text: 模型输出
+        schema: 元素 schema（None 表示不校验）
+    
+    Returns:
+        (有效元素, 无效或无法解析的元素数)
+    
+    Raises:
+        ValueError: 输出中没有 JSON 数组，或数组结构错误
+    """
+    parser = JSONArrayStreamParser()
+    items = parser.feed(text)
+    if not parser.started:
+        raise ValueError("模型输出中没有 JSON 数组")
+    valid = [item for item in items if schema is None or validate_item(item, schema)]
+    return valid, parser.errors + len(items) - len(valid)
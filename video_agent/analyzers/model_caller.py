@@ -0,0 +1,382 @@
+"""
+模型调用器 - 为 Gemini 调用加上截止时间、抖动重试、对冲请求和熔断
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional
+import logging
+import random
+import threading
+import time
+
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+# 可重试的上游错误（限流、服务端错误、上游超时）
+_RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+)
+
+
+class ModelUnavailableError(Exception):
+    """模型不可用（熔断中），调用方应立即使用本地降级逻辑"""
+
+
+class ModelTimeoutError(TimeoutError):
+    """模型调用超过截止时间"""
+
+
+def _is_retryable(error: Exception) -> bool:
+    """超时和临时性上游错误可重试；参数错误、内容被拦截等不重试"""
+    return isinstance(error, (ModelTimeoutError,) + _RETRYABLE_ERRORS)
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    
+    连续失败 failure_threshold 次后断开，reset_seconds 内的调用直接拒绝；
+    之后放行一个探测请求（半开），成功则闭合，失败则重新断开。
+    """
+    
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 60):
+        """
+        Args:
+            failure_threshold: 断开所需的连续失败次数（0 关闭熔断）
+            reset_seconds: 断开后多久放行探测请求
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """closed / open / half_open"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return 'half_open'
+            return 'open'
+    
+    def allow(self) -> bool:
+        """是否放行本次调用"""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._probing:
+                return False
+            # 半开：只放行一个探测请求
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        """调用成功：闭合"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def record_failure(self):
+        """调用失败：累计失败次数，达到阈值（或探测失败）时断开"""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probing:
+                    logger.warning(f"🔌 模型连续失败 {self._failures} 次，熔断 {self.reset_seconds:g}s")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class _StreamRace:
+    """流式请求与其对冲请求的竞争：先产出片段的请求胜出，只有胜者的片段会回调"""
+    
+    def __init__(self, callback: Callable[[str], None]):
+        self.callback = callback
+        self.winner = None
+        self._lock = threading.Lock()
+    
+    def bind(self, index: int) -> Callable[[str], None]:
+        """第 index 个请求的片段回调"""
+        def on_chunk(text: str):
+            with self._lock:
+                if self.winner is None:
+                    self.winner = index
+            if self.winner == index:
+                self.callback(text)
+        return on_chunk
+
+
+class ModelCaller:
+    """
+    带截止时间的模型调用
+    
+    - 截止时间：每次 generate() 的总耗时上限（含重试和退避），超时抛出 ModelTimeoutError
+    - 重试：临时性错误按指数退避 + 全抖动重试，退避不会越过截止时间
+    - 对冲：请求超过近期延迟的 p95 仍未返回时，发送一个重复请求，取先返回的结果
+    - 熔断：连续失败后直接抛出 ModelUnavailableError，调用方立即降级
+    - 流式：传入 on_text 时以 stream=True 请求，每个片段到达即回调；首个片段慢于对冲等待时间时
+      同样发送对冲请求，先产出片段的请求胜出，另一请求的片段和结果全部丢弃；已经回调过片段后
+      失败不再重试（调用方保留已收到的部分）
+    
+    - 并发上限：max_in_flight 限制同时发往模型的请求数（含并行分批评分和对冲请求），
+      超出的请求排队等待名额，排队时间计入截止时间
+    
+    客户端库是阻塞式的，请求在内部线程池中执行；超时或对冲落败的请求无法中止，
+    会在后台运行到结束（结果丢弃），期间仍占用并发名额。
+    """
+    
+    def __init__(self, deadline_seconds: Optional[float] = 45, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_cap: float = 8,
+                 hedge: bool = True, hedge_delay_seconds: float = 10, hedge_quantile: float = 0.95,
+                 hedge_min_samples: int = 20, breaker: Optional[CircuitBreaker] = None,
+                 max_workers: int = 8, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            deadline_seconds: 单次 generate() 的截止时间（None 表示不限）
+            max_retries: 最多重试次数
+            backoff_base: 首次重试退避上限（秒），之后每次翻倍
+            backoff_cap: 单次退避上限（秒）
+            hedge: 是否发送对冲请求
+            hedge_delay_seconds: 延迟样本不足时的对冲等待时间
+            hedge_quantile: 对冲等待时间取近期成功延迟的分位数
+            hedge_min_samples: 使用分位数前所需的延迟样本数
+            breaker: 熔断器（None 时使用默认参数）
+            max_workers: 执行模型请求的线程数
+            max_in_flight: 同时发往模型的请求数上限（None 表示只受 max_workers 限制）
+        """
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-call')
+        self.set_max_in_flight(max_in_flight)
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0,
+                       'timeouts': 0, 'failures': 0, 'short_circuits': 0}
+    
+    def generate(self, model: Any, prompt: str, on_text: Optional[Callable[[str], None]] = None,
+                 **request_options) -> str:
+        """
+        调用 model.generate_content(prompt) 并返回响应文本
+        
+        Args:
+            model: 模型对象（需实现 generate_content(prompt) -> 带 text 属性的响应）
+            prompt: 完整 prompt
+            on_text: 流式回调，每个响应片段到达时调用（None 表示不流式）
+            **request_options: 透传给 generate_content 的参数（如 generation_config）
+        
+        Returns:
+            响应文本
+        
+        Raises:
+            ModelUnavailableError: 熔断中
+            ModelTimeoutError: 超过截止时间
+        """
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            raise ModelUnavailableError("模型暂时不可用（熔断中），使用本地降级结果")
+        
+        self._count('calls')
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
+        attempt = 0
+        delivered = threading.Event()
+        
+        while True:
+            try:
+                text = self._attempt(model, prompt, deadline, on_text, delivered, request_options)
+                self.breaker.record_success()
+                return text
+            except Exception as e:
+                if delivered.is_set():
+                    # 流式响应中途失败：调用方已处理收到的片段，不再重试
+                    self._count('failures')
+                    if _is_retryable(e):
+                        self.breaker.record_failure()
+                    raise
+                if not _is_retryable(e):
+                    # 请求本身的问题（参数错误、内容被拦截），不代表模型不健康
+                    self.breaker.record_success()
+                    raise
+                
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                remaining = deadline - time.monotonic() if deadline is not None else float('inf')
+                if attempt >= self.max_retries or delay >= remaining:
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise
+                
+                attempt += 1
+                self._count('retries')
+                logger.warning(f"模型调用失败（{type(e).__name__}: {e}），{delay:.1f}s 后第 {attempt} 次重试")
+                time.sleep(delay)
+    
+    def set_max_in_flight(self, limit: Optional[int]):
+        """
+        设置同时发往模型的请求数上限（应在发出请求前调用）
+        
+        Args:
+            limit: 上限（None 或 0 表示只受线程池大小限制）
+        """
+        self.max_in_flight = limit or None
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+    
+    def close(self):
+        """关闭请求线程池（不等待：超时或对冲落败的请求无法中止，结果本就会丢弃）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def hedge_delay(self) -> float:
+        """对冲等待时间：近期成功延迟的分位数（样本不足时用默认值）"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_delay_seconds
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_quantile))
+        return samples[index]
+    
+    def stats(self) -> Dict:
+        """调用统计（含熔断状态和当前对冲等待时间）"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['breaker'] = self.breaker.state
+        stats['hedge_delay'] = round(self.hedge_delay(), 3)
+        return stats
+    
+    def _attempt(self, model: Any, prompt: str, deadline: Optional[float],
+                 on_text: Optional[Callable[[str], None]], delivered: threading.Event,
+                 request_options: Dict) -> str:
+        """
+        单次尝试：发送请求，超过对冲等待时间仍未返回时再发一个，取先成功的结果
+        
+        Raises:
+            ModelTimeoutError: 超过截止时间
+        """
+        callback = None
+        active = threading.Event()
+        if on_text is not None:
+            active.set()
+            
+            def callback(text: str):
+                # 超时放弃后，后台仍在运行的请求不再回调
+                if active.is_set():
+                    delivered.set()
+                    on_text(text)
+        
+        try:
+            return self._wait_attempt(model, prompt, deadline, callback, request_options)
+        finally:
+            active.clear()
+    
+    def _wait_attempt(self, model: Any, prompt: str, deadline: Optional[float],
+                      callback: Optional[Callable[[str], None]], request_options: Dict) -> str:
+        """
+        等待请求（及对冲请求）完成
+        
+        流式请求一旦有请求产出片段，就只等待该请求：不再发送对冲请求，另一请求的结果丢弃，
+        胜出的请求中途失败时直接抛出（调用方已处理收到的片段）。
+        """
+        race = _StreamRace(callback) if callback is not None else None
+        futures = [self._submit(model, prompt, race, 0, request_options)]
+        hedge_at = time.monotonic() + self.hedge_delay() if self.hedge else None
+        error = None
+        
+        while futures:
+            wake_at = [t for t in (deadline, hedge_at) if t is not None]
+            timeout = max(0.0, min(wake_at) - time.monotonic()) if wake_at else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                futures.remove(future)
+                if race is not None and race.winner not in (None, future.index):
+                    # 流式竞争中落败的请求
+                    continue
+                if future.exception() is None:
+                    return self._won(future)
+                error = future.exception()
+            
+            if not futures:
+                break
+            
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self._count('timeouts')
+                raise ModelTimeoutError(f"模型调用超过 {self.deadline_seconds:g}s 截止时间")
+            
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                if race is None or race.winner is None:
+                    self._count('hedges')
+                    logger.info("⏳ 模型响应慢于 p95，发送对冲请求")
+                    futures.append(self._submit(model, prompt, race, 1, request_options))
+        
+        raise error
+    
+    def _submit(self, model: Any, prompt: str, race: Optional[_StreamRace], index: int,
+                request_options: Dict):
+        """提交第 index 个请求（0 为原请求，1 为对冲请求）"""
+        callback = race.bind(index) if race is not None else None
+        future = self._executor.submit(self._call, model, prompt, callback, request_options)
+        future.index = index
+        return future
+    
+    def _won(self, future) -> str:
+        """返回成功请求的结果（对冲请求先返回时计数）"""
+        if future.index > 0:
+            self._count('hedge_wins')
+        return future.result()
+    
+    def _call(self, model: Any, prompt: str, callback: Optional[Callable[[str], None]],
+              request_options: Dict) -> str:
+        """在线程池中执行的实际请求（占用一个并发名额），记录成功延迟（不含排队时间）"""
+        slots = self._slots
+        if slots is None:
+            return self._request(model, prompt, callback, request_options)
+        with slots:
+            return self._request(model, prompt, callback, request_options)
+    
+    def _request(self, model: Any, prompt: str, callback: Optional[Callable[[str], None]],
+                 request_options: Dict) -> str:
+        start = time.monotonic()
+        if callback is None:
+            text = model.generate_content(prompt, **request_options).text
+        else:
+            response = model.generate_content(prompt, stream=True, **request_options)
+            try:
+                chunks = iter(response)
+            except TypeError:
+                # 不支持流式的模型对象：整段响应一次回调
+                chunks = [response]
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk.text)
+                callback(chunk.text)
+            text = ''.join(parts)
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return text
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,201 @@
+"""
+Prompt 构建 - 紧凑的评分/排序 prompt 与 token 估算
+"""
+from typing import Dict, List
+import re
+
+_CJK_PATTERN = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+# 所有 prompt 共用的说明（只出现一次，不再逐个 prompt 重复长段落）
+FACT_NOTE = "以下均为真实视频的真实数据，请据此分析，不要编造。"
+
+# 视频行格式说明：字段标签只在这里出现一次，而不是每个视频重复“作者:”“播放量:”
+VIDEO_LEGEND = "格式：序号. [平台] 标题 | @作者 | 播放量 | 发布天数\n   描述摘要（可能为空）"
+RANK_LEGEND = "格式：序号. [平台] 标题 | @作者 | 播放量 | 发布天数 | 相关性评分 | 钩子"
+
+SCORE_CRITERIA = "评分：90-100 完全相关；70-89 高度相关；50-69 部分相关；30-49 仅标题提及；0-29 不相关或标题党"
+
+# 模型输出 JSON 数组中每个元素的必填字段（流式解析时逐个校验，不符合的元素被跳过）
+SCORE_ITEM_SCHEMA = {'id': int, 'score': (int, float), 'reason': str}
+MULTI_SCORE_ITEM_SCHEMA = dict(SCORE_ITEM_SCHEMA, topic=int)
+RANK_ITEM_SCHEMA = {'id': int, 'rank': int}
+
+# 描述中信息量低的片段：章节时间戳、订阅/关注/赞助等号召、纯标签
+_URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+_TIMESTAMP_PATTERN = re.compile(r'^\(?\d{1,2}:\d{2}(?::\d{2})?\)?\s')
+_CTA_PATTERN = re.compile(
+    r'subscribe|follow (me|us)|like and|turn on notifications|patreon|sponsor|affiliate|discount code|'
+    r'promo code|merch|use code|with code|coupon|\d+% off|link in bio|business inquiries|'
+    r'订阅|关注|点赞|赞助|优惠码|商务合作',
+    re.IGNORECASE
+)
+_SEGMENT_SPLIT = re.compile(r'[\n\r]+|(?<=[.!?])\s+|(?<=[。！？])')
+_WORD_PATTERN = re.compile(r'[a-z0-9]{3,}|[\u4e00-\u9fff]')
+_STOPWORDS = frozenset(
+    'the and for with this that you your are was from have will what how about into more '
+    'all our can out just get not but video videos'.split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：中日韩字符每字约 1 个 token，其余约 4 个字符 1 个 token
+    
+    Args:
+        text: 文本
+    
+    Returns:
+        估算的 token 数
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _words(text: str) -> set:
+    return {w for w in _WORD_PATTERN.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def compact_description(description: str, title: str = '', max_tokens: int = 40) -> str:
+    """
+    按信息量截断描述
+    
+    去掉链接、章节时间戳、订阅/赞助号召、纯标签和重复句，再按“标题之外的新词数 / token 数”
+    挑选信息量最高的句子，按原顺序拼接到 max_tokens 以内。
+    
+    Args:
+        description: 原始描述
+        title: 视频标题（标题里已有的词不算新信息）
+        max_tokens: 摘要 token 上限（0 表示不要描述）
+    
+    Returns:
+        描述摘要
+    """
+    if not description or max_tokens <= 0:
+        return ''
+    
+    seen = _words(title)
+    candidates = []
+    normalized_seen = set()
+    for index, segment in enumerate(_SEGMENT_SPLIT.split(description)):
+        segment = _URL_PATTERN.sub('', segment).strip(' -–—•|*>')
+        if not segment or _TIMESTAMP_PATTERN.match(segment) or _CTA_PATTERN.search(segment):
+            continue
+        if all(token.startswith('#') for token in segment.split()):
+            continue
+        normalized = ' '.join(segment.lower().split())
+        if normalized in normalized_seen:
+            continue
+        normalized_seen.add(normalized)
+        candidates.append((index, segment))
+    
+    # 贪心：每次取“新词 / token”最高的句子
+    chosen, used = [], 0
+    remaining = list(candidates)
+    while remaining and used < max_tokens:
+        best = max(remaining, key=lambda item: len(_words(item[1]) - seen) / (estimate_tokens(item[1]) + 1))
+        remaining.remove(best)
+        new_words = _words(best[1]) - seen
+        if not new_words and chosen:
+            break
+        cost = estimate_tokens(best[1]) + (1 if chosen else 0)  # 拼接用的空格也计入预算
+        if used + cost > max_tokens:
+            if chosen:
+                continue
+            # 第一句就超出预算：按字符截断（省略号也计入预算）
+            text = best[1][:max(1, int(len(best[1]) * max_tokens / cost))].rstrip()
+            while len(text) > 1 and estimate_tokens(text + '…') > max_tokens:
+                text = text[:-1].rstrip()
+            best = (best[0], text + '…')
+            cost = estimate_tokens(best[1])
+        chosen.append(best)
+        seen |= new_words
+        used += cost
+    
+    return ' '.join(segment for _, segment in sorted(chosen))
+
+
+def format_count(value: int) -> str:
+    """紧凑的数量表示：1234567 → 1.2M"""
+    if value >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    if value >= 1_000:
+        return f"{value / 1_000:.0f}K"
+    return str(value)
+
+
+def format_video_line(i: int, video: Dict, description_tokens: int = 40, targets: str = '') -> str:
+    """
+    评分 prompt 中的单个视频（格式见 VIDEO_LEGEND）
+    
+    Args:
+        i: 序号（从 0 开始）
+        video: 视频
+        description_tokens: 描述摘要 token 上限
+        targets: 多主题评分时需要评估的主题编号（如 "T1, T3"）
+    
+    Returns:
+        视频文本
+    """
+    line = (f"{i+1}. [{video['platform']}] {video['title'][:100]} | @{video['author']} | "
+            f"{format_count(video['views'])} | {video['days_ago']}天")
+    if targets:
+        line += f" | 评估: {targets}"
+    summary = compact_description(video.get('description', ''), video['title'], description_tokens)
+    if summary:
+        line += f"\n   {summary}"
+    return line
+
+
+def format_rank_line(i: int, video: Dict) -> str:
+    """
+    排序 prompt 中的单个视频（格式见 RANK_LEGEND）
+    
+    视频刚在评分阶段看过描述，这里只带评分和钩子，不再重发描述。
+    """
+    line = (f"{i+1}. [{video['platform']}] {video['title'][:80]} | @{video['author']} | "
+            f"{format_count(video['views'])} | {video['days_ago']}天 | {video.get('ai_score', 'N/A')}")
+    if video.get('hook_text'):
+        line += f" | {video['hook_text']}"
+    return line
+
+
+def scoring_prompt(topic: str, video_lines: List[str]) -> str:
+    """单主题相关性评分 prompt"""
+    return f"""你是自媒体内容分析专家。评估每个视频与主题"{topic}"的相关性。{FACT_NOTE}
+{SCORE_CRITERIA}
+
+{VIDEO_LEGEND}
+{chr(10).join(video_lines)}
+
+每个视频输出一项 JSON：id（序号）、score（0-100）、reason（理由，15字内）、hook（核心吸引点，15字内）。
+只输出JSON数组：[{{"id": 1, "score": 85, "reason": "完整教程覆盖核心要点", "hook": "从0到100万粉丝实战"}}]"""
+
+
+def multi_scoring_prompt(topics: List[str], video_lines: List[str]) -> str:
+    """多主题合并评分 prompt（每个视频标注需要评估的主题）"""
+    topic_lines = '\n'.join(f"T{i + 1}. {topic}" for i, topic in enumerate(topics))
+    return f"""你是自媒体内容分析专家。评估每个视频与其标注主题的相关性。{FACT_NOTE}
+{SCORE_CRITERIA}
+
+主题：
+{topic_lines}
+
+{VIDEO_LEGEND}
+{chr(10).join(video_lines)}
+
+每个（视频, 评估主题）组合输出一项 JSON：id（序号）、topic（主题编号，T1 记为 1）、score（0-100）、reason（理由，15字内）、hook（核心吸引点，15字内）。
+只输出JSON数组：[{{"id": 1, "topic": 1, "score": 85, "reason": "完整教程覆盖核心要点", "hook": "从0到100万粉丝实战"}}]"""
+
+
+def ranking_prompt(topic: str, top_n: int, video_lines: List[str]) -> str:
+    """精细排序 prompt"""
+    return f"""你是视频推荐专家，擅长分析爆款视频的运营逻辑和可复制性。
+从以下视频中选出最好的{top_n}个，推荐给对"{topic}"感兴趣的欧美自媒体创作者。{FACT_NOTE}
+标准：与主题高度相关且为欧美创作者；播放与互动受欢迎；较新优先；覆盖主题不同角度和风格。
+
+{RANK_LEGEND}
+{chr(10).join(video_lines)}
+
+每个入选视频输出一项 JSON：rank（1到{top_n}）、id（序号）、reason（推荐理由，15字内）、hookText（钩子文本或核心卖点，20字内）、replicabilityScore（可复制性 1-10，10 最容易）、keyLearningPoints（关键技巧，20字内，逗号分隔）、reasonForSuccess（爆款原因，30字内）。
+只输出JSON数组：[{{"rank": 1, "id": 1, "reason": "标题吸引，内容实用", "hookText": "7天涨粉10万实战方法", "replicabilityScore": 8, "keyLearningPoints": "前3秒钩子,清晰框架,强CTA", "reasonForSuccess": "真实案例+详细步骤+可执行建议"}}]"""
+
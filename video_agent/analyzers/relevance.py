@@ -0,0 +1,224 @@
+"""
+本地相关性预排序 - 在 AI 评分前用 TF-IDF 余弦相似度筛掉明显无关的视频（纯 CPU，无网络）
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+import logging
+import math
+import re
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]+')
+_STOPWORDS = frozenset(
+    'the and for with this that you your are was from have will what how about into more all our can '
+    'out just get not but its it is in on of to a an my me we us be do by at or as so if up new '
+    'http https www com video videos shorts reel reels'.split()
+)
+
+
+def _stem(word: str) -> str:
+    """极简英文词干：去掉常见复数和时态后缀，让 tool / tools、edit / editing 匹配"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 5 and word.endswith('ing'):
+        return word[:-3]
+    if len(word) > 4 and word.endswith('ed'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分为检索词：英文/数字按词（去停用词、取词干），中文按相邻两字
+    
+    Args:
+        text: 文本
+    
+    Returns:
+        检索词列表（保留重复，用于词频）
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token[0] >= '\u4e00':
+            terms.extend(token[i:i + 2] for i in range(max(1, len(token) - 1)))
+        elif len(token) > 1 and token not in _STOPWORDS:
+            terms.append(_stem(token))
+    return terms
+
+
+def _document_terms(video: Dict) -> Counter:
+    """视频的检索词词频：标题权重 2，描述和标签权重 1"""
+    terms = Counter(tokenize(video.get('title') or ''))
+    for term in terms:
+        terms[term] *= 2
+    terms.update(tokenize(video.get('description') or ''))
+    terms.update(tokenize(' '.join(video.get('tags') or [])))
+    return terms
+
+
+class RelevancePreRanker:
+    """
+    本地相关性预排序器
+    
+    以当前候选集合为语料计算 TF-IDF（次线性词频、平滑 IDF），用主题与
+    标题/描述/标签的余弦相似度把候选分成三段：
+    - 明显无关（< miss_threshold）：直接给出低分，不送入模型
+    - 明显相关（≥ hit_threshold）：直接给出高分，不送入模型
+    - 其余为模糊段，交给 AI 评分
+    
+    主题与所有候选都没有共同词时（如主题和视频语言不同），不做任何预判。
+    """
+    
+    def __init__(self, miss_threshold: float = 0.05, hit_threshold: float = 0.5):
+        """
+        初始化预排序器
+        
+        Args:
+            miss_threshold: 低于该相似度视为明显无关（0 表示不剪枝）
+            hit_threshold: 不低于该相似度视为明显相关（0 表示不跳过模型）
+        """
+        self.miss_threshold = miss_threshold
+        self.hit_threshold = hit_threshold
+        self._stats = Counter()
+        self._lock = threading.Lock()
+    
+    def similarities(self, videos: List[Dict], topic: str) -> np.ndarray:
+        """
+        计算每个视频与主题的 TF-IDF 余弦相似度
+        
+        词频表按 (视频下标, 词下标, 次数) 三元组存成 NumPy 数组，
+        IDF、向量长度和点积都用 bincount 一次算完，不构造稠密矩阵。
+        
+        Args:
+            videos: 候选视频
+            topic: 搜索主题
+        
+        Returns:
+            相似度数组（0-1），与 videos 一一对应
+        """
+        count = len(videos)
+        query = Counter(tokenize(topic))
+        if not count or not query:
+            return np.zeros(count)
+        
+        vocabulary = {}
+        rows, cols, freqs = [], [], []
+        for row, video in enumerate(videos):
+            for term, freq in _document_terms(video).items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+                freqs.append(freq)
+        if not vocabulary:
+            return np.zeros(count)
+        
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        freqs = np.array(freqs, dtype=np.float64)
+        
+        doc_freq = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log((1 + count) / (1 + doc_freq)) + 1
+        weights = (1 + np.log(freqs)) * idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=count))
+        
+        # 查询向量：不在语料中的词只计入查询长度
+        query_weights = np.zeros(len(vocabulary))
+        query_norm = 0.0
+        unseen_idf = math.log(1 + count) + 1
+        for term, freq in query.items():
+            index = vocabulary.get(term)
+            weight = (1 + math.log(freq)) * (idf[index] if index is not None else unseen_idf)
+            if index is not None:
+                query_weights[index] = weight
+            query_norm += weight ** 2
+        
+        dots = np.bincount(rows, weights=weights * query_weights[cols], minlength=count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(norms > 0, dots / (norms * math.sqrt(query_norm)), 0.0)
+        return scores
+    
+    def split(self, videos: List[Dict], topic: str) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """
+        按相似度把候选分成明显相关 / 模糊 / 明显无关三段，并写入本地评分
+        
+        明显相关和明显无关的视频写入 ai_score（映射到 70-100 / 0-29）和 ai_reason，
+        所有视频写入 relevance（相似度）。
+        
+        Args:
+            videos: 候选视频
+            topic: 搜索主题
+        
+        Returns:
+            (明显相关, 模糊, 明显无关)
+        """
+        scores = self.similarities(videos, topic)
+        for video, score in zip(videos, scores):
+            video['relevance'] = round(float(score), 3)
+        
+        if not len(videos) or not scores.max() > 0:
+            # 没有任何共同词：无法判断，全部交给模型
+            self._record(0, len(videos), 0)
+            return [], list(videos), []
+        
+        hit_mask = scores >= self.hit_threshold if self.hit_threshold > 0 else np.zeros(len(videos), dtype=bool)
+        miss_mask = (scores < self.miss_threshold) & ~hit_mask
+        
+        hits, ambiguous, misses = [], [], []
+        for video, score, is_hit, is_miss in zip(videos, scores, hit_mask, miss_mask):
+            if is_hit:
+                span = max(1e-9, 1 - self.hit_threshold)
+                video['ai_score'] = min(100, 70 + int(30 * (score - self.hit_threshold) / span))
+                video['ai_reason'] = '本地预排序：与主题高度相关'
+                hits.append(video)
+            elif is_miss:
+                video['ai_score'] = int(29 * score / self.miss_threshold)
+                video['ai_reason'] = '本地预排序：与主题无关'
+                misses.append(video)
+            else:
+                ambiguous.append(video)
+        
+        self._record(len(hits), len(ambiguous), len(misses))
+        logger.info(f"🔎 本地预排序: 明显相关 {len(hits)}，待 AI 评分 {len(ambiguous)}，剪除 {len(misses)}")
+        return hits, ambiguous, misses
+    
+    def _record(self, hits: int, ambiguous: int, misses: int):
+        with self._lock:
+            self._stats['hits'] += hits
+            self._stats['ambiguous'] += ambiguous
+            self._stats['misses'] += misses
+    
+    def stats(self) -> Dict[str, int]:
+        """累计的三段数量（hits / ambiguous / misses）"""
+        with self._lock:
+            return {key: self._stats[key] for key in ('hits', 'ambiguous', 'misses')}
+
+
+def test_pre_ranker():
+    """测试本地预排序"""
+    videos = [
+        {'title': 'Best AI coding tools in 2024', 'description': 'Cursor vs Copilot for coding',
+         'tags': ['ai', 'coding']},
+        {'title': 'Easy pasta recipe', 'description': 'Dinner in 15 minutes', 'tags': ['cooking']},
+        {'title': 'My morning routine', 'description': 'AI tools I use every day', 'tags': []},
+        {'title': '美食探店', 'description': '', 'tags': []},
+    ]
+    
+    ranker = RelevancePreRanker(miss_threshold=0.05, hit_threshold=0.5)
+    scores = ranker.similarities(videos, 'AI coding tools')
+    hits, ambiguous, misses = ranker.split(videos, 'AI coding tools')
+    
+    print("\n相似度:")
+    for video, score in zip(videos, scores):
+        print(f"  {score:.3f}  {video['title']}")
+    print(f"\n明显相关 {len(hits)} / 模糊 {len(ambiguous)} / 明显无关 {len(misses)}")
+    print(f"统计: {ranker.stats()}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    test_pre_ranker()
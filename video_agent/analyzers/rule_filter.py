@@ -1,12 +1,81 @@
 """
 规则筛选器 - 基于硬性规则快速过滤视频
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
+import operator
 import re
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# 列字段 → (取值函数, dtype, 缺失值)；itemgetter 在 C 层取值，map 不经过逐条的 Python 帧
+_COLUMN_FIELDS = {
+    name: (operator.itemgetter(name), dtype, default)
+    for name, dtype, default in (
+        ('views', np.int64, 0),
+        ('days_ago', np.int64, 0),
+        ('likes', np.int64, 0),
+        ('platform', object, ''),
+    )
+}
+
+
+def to_columns(videos: List[Dict], fields=('views', 'days_ago', 'likes', 'platform')) -> Dict[str, np.ndarray]:
+    """
+    把视频字典列表转成列式数组
+    
+    每列一次 np.fromiter(map(itemgetter, videos))；有视频缺少该字段（或数值字段为 None）时，
+    该列退回逐条 get() 并按缺失值补齐。
+    
+    Args:
+        videos: 视频列表
+        fields: 需要的字段（views / days_ago / likes 为 int64 数组，platform 为字符串数组）
+        
+    Returns:
+        {字段: 数组}
+    """
+    count = len(videos)
+    columns = {}
+    for name in fields:
+        getter, dtype, default = _COLUMN_FIELDS[name]
+        try:
+            column = np.fromiter(map(getter, videos), dtype=dtype, count=count)
+        except (KeyError, TypeError):
+            column = np.fromiter((v.get(name) or default for v in videos), dtype=dtype, count=count)
+        columns[name] = column
+    return columns
+
+
+def top_k_by_views(views: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """
+    从候选下标中取播放量最高的 k 个（argpartition，O(n)）
+    
+    结果与「按播放量稳定降序排序后取前 k 个」一致：
+    播放量相同时保留下标靠前的视频，并保持其原顺序。
+    
+    Args:
+        views: 播放量数组
+        candidates: 候选下标（升序）
+        k: 保留数量
+        
+    Returns:
+        入选下标，按播放量降序排列
+    """
+    if k <= 0:
+        return candidates[:0]
+    
+    values = views[candidates]
+    kth = values[np.argpartition(-values, k - 1)[k - 1]]
+    
+    above = candidates[values > kth]
+    ties = candidates[values == kth][:k - len(above)]
+    selected = np.concatenate([above, ties])
+    
+    # 按播放量降序、下标升序排列（与稳定排序一致）
+    return selected[np.lexsort((selected, -views[selected]))]
+
 
 class RuleFilter:
     """规则筛选器"""
@@ -26,53 +95,115 @@ class RuleFilter:
         """
         应用规则筛选
         
+        候选视频先转成列式数组，再用向量化掩码筛选、argpartition 取前 N，
+        数万条候选也只需几毫秒。
+        
         Args:
             videos: 候选视频列表
             topic: 搜索主题（仅用于日志，不再用于关键词匹配）
             target_count: 目标保留数量
             
         Returns:
-            筛选后的视频列表
+            筛选后的视频列表（超过目标数量时按播放量降序，播放量相同保持原顺序）
         """
         logger.info(f"开始规则筛选: 输入{len(videos)}个视频, 目标{target_count}个")
         logger.info(f"筛选条件: 播放量≥{self.min_views:,}, 发布时间≤{self.max_days_ago}天")
         
-        filtered = []
-        stats = {
-            'views': 0,
-            'time': 0,
-            'passed': 0
-        }
+        columns = to_columns(videos, fields=('views', 'days_ago'))
+        selected, stats = self.filter_columns(columns, target_count)
         
-        for video in videos:
-            # 规则1：播放量检查
-            if video['views'] < self.min_views:
-                stats['views'] += 1
-                logger.debug(f"❌ 播放量不足: {video['title'][:50]} ({video['views']:,} < {self.min_views:,})")
-                continue
-            
-            # 规则2：时间检查
-            if video['days_ago'] > self.max_days_ago:
-                stats['time'] += 1
-                logger.debug(f"❌ 发布时间过久: {video['title'][:50]} ({video['days_ago']}天 > {self.max_days_ago}天)")
-                continue
-            
-            # 注意：我们移除了关键词匹配检查
-            # 原因：YouTube API 已经根据搜索词返回了相关结果
-            # 后续还有 AI 来评估相关性，没必要在这里二次过滤
-            
-            stats['passed'] += 1
-            filtered.append(video)
+        # 注意：我们移除了关键词匹配检查
+        # 原因：YouTube API 已经根据搜索词返回了相关结果
+        # 后续还有 AI 来评估相关性，没必要在这里二次过滤
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_rejected(videos, columns)
         
-        # 如果结果太多，按播放量排序并截取
-        if len(filtered) > target_count:
-            filtered = sorted(filtered, key=lambda x: x['views'], reverse=True)[:target_count]
+        if stats['passed'] > target_count:
             logger.info(f"📊 结果过多，按播放量排序后截取前 {target_count} 个")
         
+        filtered = [videos[i] for i in selected]
         logger.info(f"✅ 规则筛选完成: 保留{len(filtered)}个视频")
         logger.info(f"📊 过滤统计: 播放量不足={stats['views']}, 时间过久={stats['time']}, 通过={stats['passed']}")
         return filtered
     
+    def passes(self, videos: List[Dict]) -> np.ndarray:
+        """
+        逐个判断视频是否满足播放量和发布时间规则（不截取数量）
+        
+        Args:
+            videos: 候选视频列表
+            
+        Returns:
+            布尔数组，与 videos 一一对应
+        """
+        columns = to_columns(videos, fields=('views', 'days_ago'))
+        return (columns['views'] >= self.min_views) & (columns['days_ago'] <= self.max_days_ago)
+    
+    def filter_columns(self, columns: Dict[str, np.ndarray], target_count: int = 30,
+                       platform: Optional[str] = None):
+        """
+        在列式候选批次上应用规则筛选
+        
+        Args:
+            columns: to_columns() 的输出（至少包含 views、days_ago；按平台筛选时需要 platform）
+            target_count: 目标保留数量
+            platform: 只保留某个平台，None 表示全部
+            
+        Returns:
+            (入选下标数组, 过滤统计)，下标按播放量降序排列（未超出目标数量时保持原顺序）
+        """
+        views = columns['views']
+        views_ok = views >= self.min_views
+        time_ok = columns['days_ago'] <= self.max_days_ago
+        mask = views_ok & time_ok
+        if platform is not None:
+            mask &= columns['platform'] == platform
+        
+        passed = np.flatnonzero(mask)
+        stats = {
+            'views': int(np.count_nonzero(~views_ok)),
+            'time': int(np.count_nonzero(views_ok & ~time_ok)),
+            'passed': len(passed)
+        }
+        
+        if len(passed) > target_count:
+            passed = top_k_by_views(views, passed, target_count)
+        
+        return passed, stats
+    
+    def _log_rejected(self, videos: List[Dict], columns: Dict[str, np.ndarray]):
+        """逐条输出被过滤的视频（仅 DEBUG 级别开启时调用）"""
+        views_ok = columns['views'] >= self.min_views
+        for i in np.flatnonzero(~views_ok):
+            video = videos[i]
+            logger.debug(f"❌ 播放量不足: {video['title'][:50]} ({video['views']:,} < {self.min_views:,})")
+        for i in np.flatnonzero(views_ok & (columns['days_ago'] > self.max_days_ago)):
+            video = videos[i]
+            logger.debug(f"❌ 发布时间过久: {video['title'][:50]} ({video['days_ago']}天 > {self.max_days_ago}天)")
+    
+    def filter_catalog(self, catalog, platform: Optional[str] = None, target_count: int = 30) -> List[Dict]:
+        """
+        在本地视频目录上应用相同的规则（以带索引的 SQL 执行）
+        
+        Args:
+            catalog: VideoCatalog 实例
+            platform: 只筛选某个平台，None 表示全部
+            target_count: 目标保留数量（按播放量降序截取）
+            
+        Returns:
+            筛选后的视频列表
+        """
+        filtered = catalog.query(
+            platform=platform,
+            min_views=self.min_views,
+            max_days_ago=self.max_days_ago,
+            order_by='views',
+            limit=target_count
+        )
+        logger.info(f"✅ 目录规则筛选完成: 保留{len(filtered)}个视频")
+        return filtered
+    
     def _is_relevant(self, video: Dict, topic: str) -> bool:
         """
         检查视频是否与主题相关（基础关键词匹配）
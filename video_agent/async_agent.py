@@ -0,0 +1,246 @@
+"""
+异步视频搜索 Agent - 在单个事件循环上并发处理多个搜索
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import logging
+import weakref
+
+from .agent import VideoSearchAgent
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def _release_soon(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    """在事件循环线程中释放信号量（线程池任务的完成回调可能在工作线程中执行）"""
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # 事件循环已关闭，信号量随之失效
+        pass
+
+
+class AsyncVideoSearchAgent(VideoSearchAgent):
+    """
+    异步视频搜索 Agent
+    
+    搜索流程与 VideoSearchAgent 相同。各获取器和 Gemini 的客户端库都是阻塞式的，
+    这里把每次获取放进共享线程池，并用每个获取器独立的信号量限制并发数；Gemini 的并发上限
+    由 ModelCaller 在实际发出请求处执行（含并行分批评分和对冲请求），多个主题可以在同一个
+    事件循环上同时搜索。
+    
+    线程中的阻塞调用无法取消：超时只是放弃等待，调用在后台运行到结束，
+    期间仍占用该上游的并发名额。
+    """
+    
+    def __init__(self, use_cache: bool = True,
+                 youtube_concurrency: Optional[int] = None,
+                 instagram_concurrency: Optional[int] = None,
+                 gemini_concurrency: Optional[int] = None):
+        """
+        初始化异步 Agent
+        
+        Args:
+            use_cache: 是否使用缓存
+            youtube_concurrency: 同时进行的 YouTube 请求数上限
+            instagram_concurrency: 同时进行的 Instagram 请求数上限
+            gemini_concurrency: 同时发往 Gemini 的请求数上限（覆盖 GEMINI_CONCURRENCY，
+                由 AIRanker 共用的 ModelCaller 执行，含并行分批评分和对冲请求）
+        """
+        super().__init__(use_cache)
+        
+        # 每个获取器插件一个并发上限（键为插件注册名）
+        self.limits = {plugin.name: plugin.concurrency for plugin in self.fetcher_plugins}
+        overrides = {'youtube': youtube_concurrency, 'instagram': instagram_concurrency}
+        for name, limit in overrides.items():
+            if limit and name in self.limits:
+                self.limits[name] = limit
+        if gemini_concurrency:
+            self.ai_ranker.caller.set_max_in_flight(gemini_concurrency)
+        gemini_limit = self.ai_ranker.caller.max_in_flight or config.GEMINI_CONCURRENCY
+        
+        # 获取、翻译与排序流程、缓存读写共用的线程池
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(self.limits.values()) + gemini_limit + 4,
+            thread_name_prefix='async-agent'
+        )
+        
+        # asyncio 原语绑定事件循环，按循环分别创建信号量
+        self._semaphores = weakref.WeakKeyDictionary()
+    
+    def _semaphore(self, upstream: str) -> asyncio.Semaphore:
+        """获取当前事件循环上某个上游的并发信号量"""
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+            self._semaphores[loop] = semaphores
+        return semaphores[upstream]
+    
+    async def _run_blocking(self, upstream: Optional[str], func: Callable, *args, **kwargs) -> Any:
+        """
+        在线程池中执行阻塞调用
+        
+        信号量在线程池任务真正结束时才释放（完成回调），而不是在等待方被取消时释放：
+        调用方超时放弃等待后，阻塞调用仍在后台运行，提前释放会让上游同时承受超出上限的请求。
+        
+        Args:
+            upstream: 上游名称（用于并发限制），None 表示不限制
+            func: 阻塞函数
+        
+        Returns:
+            函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        
+        if upstream is None:
+            return await loop.run_in_executor(self._executor, call)
+        
+        semaphore = self._semaphore(upstream)
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(lambda _: _release_soon(loop, semaphore))
+        return await asyncio.wrap_future(future, loop=loop)
+    
+    async def asearch(self, topic: str, top_n: int = 10) -> List[Dict]:
+        """
+        异步搜索热门视频
+        
+        Args:
+            topic: 搜索主题（支持中文，会自动翻译）
+            top_n: 返回的视频数量
+        
+        Returns:
+            排序后的视频列表
+        """
+        logger.info(f"🎯 开始异步搜索: {topic}")
+        
+        # 快速路径：缓存命中时无需等待翻译或网络
+        if self.use_cache:
+            cached_results = await self._run_blocking(None, self._lookup_cache, topic, top_n)
+            if cached_results:
+                return cached_results[:top_n]
+        
+        cache_key = topic
+        if self._detect_chinese(topic):
+            topic = await self._run_blocking(None, self._translate_topic, topic)
+        
+        all_videos = await self._afetch_from_all_platforms(topic)
+        logger.info(f"✅ 共获取 {len(all_videos)} 个候选视频")
+        
+        # 规则筛选 + AI 评分 + AI 排序（模型请求数由 ModelCaller 限制）
+        final_results = await self._run_blocking(
+            None, self._rank_candidates, all_videos, topic, top_n
+        )
+        
+        if self.use_cache and final_results:
+            await self._run_blocking(None, self.cache.set, cache_key, final_results)
+        
+        logger.info(f"✅ 异步搜索完成: {cache_key}")
+        return final_results
+    
+    async def asearch_many(self, topics: List[str], top_n: int = 10) -> Dict[str, List[Dict]]:
+        """
+        并发搜索多个主题
+        
+        Args:
+            topics: 主题列表
+            top_n: 每个主题返回的视频数量
+        
+        Returns:
+            {主题: 视频列表}
+        """
+        results = await asyncio.gather(
+            *(self.asearch(topic, top_n) for topic in topics),
+            return_exceptions=True
+        )
+        
+        output = {}
+        for topic, result in zip(topics, results):
+            if isinstance(result, Exception):
+                logger.error(f"搜索失败: {topic}: {result}")
+                output[topic] = []
+            else:
+                output[topic] = result
+        return output
+    
+    async def _afetch_from_all_platforms(self, topic: str) -> List[Dict]:
+        """
+        并发从所有平台获取视频（超过获取器截止时间的平台被跳过）
+        
+        超时的获取只是被放弃、并未取消：阻塞调用在后台运行到结束（完成后照常写入阶段缓存），
+        在此之前继续占用该获取器的并发名额。
+        
+        Args:
+            topic: 搜索主题
+        
+        Returns:
+            合并的视频列表
+        """
+        plan = self._fetch_plan(topic)
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self._run_blocking(
+                        plugin.name, self._fetch_stage, plugin.stage, fetch, plugin.stage_ttl_hours, **params
+                    ),
+                    timeout=plugin.timeout_seconds
+                )
+                for plugin, fetch, params in plan
+            ),
+            return_exceptions=True
+        )
+        
+        all_videos = []
+        for (plugin, *_), videos in zip(plan, results):
+            if isinstance(videos, asyncio.TimeoutError):
+                logger.warning(f"⏱️ {plugin.name} 超过 {plugin.timeout_seconds:g}s 截止时间，使用其余平台的结果")
+                continue
+            if isinstance(videos, Exception):
+                logger.error(f"  ✗ {plugin.platform} 获取失败: {videos}")
+                continue
+            logger.info(f"  ✓ {plugin.platform}: {len(videos)} 个视频")
+            all_videos.extend(videos)
+        
+        return all_videos
+    
+    def close(self, wait: bool = True):
+        """
+        关闭共用线程池，再关闭同步 Agent 的资源
+        
+        Args:
+            wait: 是否等待仍在后台运行的调用（含超时被放弃的获取）结束
+        """
+        self._executor.shutdown(wait=wait)
+        super().close(wait=wait)
+
+
+def test_async_agent():
+    """测试异步 Agent（并发搜索多个主题）"""
+    import time
+    
+    agent = AsyncVideoSearchAgent(use_cache=True)
+    topics = ["AI coding", "fitness tips", "video editing"]
+    
+    start = time.perf_counter()
+    results = asyncio.run(agent.asearch_many(topics, top_n=5))
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n✅ 并发搜索 {len(topics)} 个主题，用时 {elapsed:.1f} 秒")
+    for topic, videos in results.items():
+        print(f"  {topic}: {len(videos)} 个视频")
+    
+    agent.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    test_async_agent()
@@ -3,50 +3,305 @@
 """
 import sqlite3
 import json
+import hashlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 import logging
 import os
+import threading
+import time
+import unicodedata
+import weakref
+from zoneinfo import ZoneInfo
+
+from .video import json_default
 
 logger = logging.getLogger(__name__)
 
+# YouTube 每日配额按太平洋时间午夜重置
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+
+# SQLite synchronous 级别（WAL 模式下 NORMAL 即可保证一致性）
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# 固定的 SQL 语句：持久连接会按语句文本复用已编译的 prepared statement
+_SQL_GET = 'SELECT results, expires_at FROM video_cache WHERE query_key = ?'
+_SQL_SET = '''
+    INSERT OR REPLACE INTO video_cache 
+    (query_key, topic, results, created_at, expires_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_SQL_DELETE = 'DELETE FROM video_cache WHERE query_key = ?'
+_SQL_CLEAR_EXPIRED = 'DELETE FROM video_cache WHERE expires_at < ?'
+_SQL_CLEAR_ALL = 'DELETE FROM video_cache'
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    标准化主题（小写、合并空白），用于跨组件共享的主题键
+    
+    Args:
+        topic: 主题
+        
+    Returns:
+        标准化后的主题
+    """
+    return ' '.join(topic.lower().split())
+
+
+def normalize_query(text: str) -> str:
+    """
+    模糊标准化搜索词，用作翻译缓存键
+
+    NFKC 折叠全角字符，去除空白和标点，英文转小写。
+    例如「 自媒体 运营！」与「自媒体运营」得到相同的键。
+    
+    Args:
+        text: 原始搜索词
+        
+    Returns:
+        标准化后的搜索词
+    """
+    folded = unicodedata.normalize('NFKC', text).lower()
+    return ''.join(
+        ch for ch in folded
+        if not ch.isspace() and not unicodedata.category(ch).startswith('P')
+    )
+
+
+class LRUCache:
+    """线程安全的进程内 LRU 缓存（按条目数和 TTL 淘汰）"""
+    
+    def __init__(self, max_size: int = 128, ttl_seconds: Optional[float] = None):
+        """
+        初始化 LRU 缓存
+        
+        Args:
+            max_size: 最多保留的条目数
+            ttl_seconds: 默认存活时间（秒），None 表示不过期
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()  # key -> (value, 过期时间戳)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """获取条目，过期或不存在时返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        写入条目
+        
+        Args:
+            key: 键
+            value: 值
+            ttl_seconds: 本条目的存活时间，默认使用 self.ttl_seconds
+        """
+        if self.max_size <= 0:
+            return
+        
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires = time.monotonic() + ttl if ttl is not None else None
+        
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        """删除条目"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """清空所有条目"""
+        with self._lock:
+            self._data.clear()
+    
+    def purge_expired(self) -> int:
+        """清理过期条目，返回清理数量"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, exp) in self._data.items() if exp is not None and now >= exp]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+    
+    def stats(self) -> Dict:
+        """命中统计"""
+        return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
 
-class CacheManager:
-    """缓存管理器"""
+class _ThreadConnection:
+    """线程本地连接的持有者：线程结束时随线程本地数据一起释放，触发连接关闭"""
     
-    def __init__(self, cache_file: str = 'cache.db', expiry_hours: int = 2):
+    __slots__ = ('conn', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class SQLiteStore:
+    """
+    SQLite 存储基类 - 管理线程本地持久连接
+
+    子类实现 _init_db() 建表，并通过 self._connection() 访问数据库。
+    线程结束时其连接随之关闭（Streamlit 每次重跑、后台刷新都会新建线程，连接不会累积）。
+    """
+    
+    def __init__(self, cache_file: str = 'cache.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化存储
+        
+        Args:
+            cache_file: 数据库文件路径
+            persistent: 是否为每个线程保持持久连接（False 时每次操作新建连接）
+            synchronous: SQLite synchronous 级别（OFF/NORMAL/FULL/EXTRA）
+            wal: 是否启用 WAL 日志模式（读写互不阻塞）
+        """
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"无效的 synchronous 级别: {synchronous}，可选 {SYNCHRONOUS_LEVELS}")
+        
+        self.cache_file = cache_file
+        self.persistent = persistent
+        self.synchronous = synchronous
+        self.wal = wal
+        
+        # 线程本地连接池：每个线程复用自己的连接，sqlite3 连接不跨线程共享；
+        # 每个连接登记一个终结器，线程结束（持有者被回收）或 close() 时关闭连接
+        self._local = threading.local()
+        self._finalizers = []
+        self._conn_lock = threading.Lock()
+        
+        # 确保目录存在
+        os.makedirs(os.path.dirname(self.cache_file) if os.path.dirname(self.cache_file) else '.', exist_ok=True)
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """
+        创建并配置一个新的 SQLite 连接
+        
+        连接只在创建它的线程中使用；关闭 check_same_thread 是为了让线程结束后
+        终结器（可能在其他线程执行）和 close() 能关闭它。
+        """
+        conn = sqlite3.connect(self.cache_file, timeout=30, cached_statements=256, check_same_thread=False)
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+    
+    def _thread_connection(self) -> sqlite3.Connection:
+        """获取当前线程的持久连接（不存在则创建）"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            conn = self._open_connection()
+            holder = _ThreadConnection(conn)
+            self._local.holder = holder
+            with self._conn_lock:
+                # 顺带清理已关闭连接的终结器，列表只保留存活线程的连接
+                self._finalizers = [f for f in self._finalizers if f.alive]
+                self._finalizers.append(weakref.finalize(holder, conn.close))
+        return holder.conn
+    
+    @contextmanager
+    def _connection(self):
+        """
+        获取数据库连接，退出时提交事务
+        
+        持久模式下复用线程本地连接；否则每次新建并关闭连接。
+        """
+        conn = self._thread_connection() if self.persistent else self._open_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            if not self.persistent:
+                conn.close()
+    
+    def close(self):
+        """关闭所有线程的持久连接"""
+        with self._conn_lock:
+            finalizers, self._finalizers = self._finalizers, []
+        for finalizer in finalizers:
+            finalizer()
+        self._local = threading.local()
+    
+    def open_connections(self) -> int:
+        """当前仍打开的线程持久连接数"""
+        with self._conn_lock:
+            return sum(1 for f in self._finalizers if f.alive)
+
+
+def _copy_results(results: List[Dict]) -> List[Dict]:
+    """每个视频一份浅拷贝：内存层与调用方不共享字典，与从 SQLite 反序列化的结果行为一致"""
+    return [dict(video) for video in results]
+
+
+class CacheManager(SQLiteStore):
+    """缓存管理器（内存 LRU + SQLite 两级缓存）"""
+    
+    def __init__(self, cache_file: str = 'cache.db', expiry_hours: int = 2,
+                 persistent: bool = True, synchronous: str = 'NORMAL',
+                 wal: bool = True, memory_size: int = 128,
+                 memory_ttl_seconds: float = 600):
         """
         初始化缓存管理器
         
         Args:
             cache_file: 缓存数据库文件路径
             expiry_hours: 缓存过期时间（小时）
+            persistent: 是否为每个线程保持持久连接（False 时每次操作新建连接）
+            synchronous: SQLite synchronous 级别（OFF/NORMAL/FULL/EXTRA）
+            wal: 是否启用 WAL 日志模式（读写互不阻塞）
+            memory_size: 内存 LRU 层的条目上限（0 表示关闭内存层）
+            memory_ttl_seconds: 内存层条目的最长存活时间（秒），限制多进程间的不一致窗口
         """
-        self.cache_file = cache_file
+        super().__init__(cache_file, persistent, synchronous, wal)
         self.expiry_hours = expiry_hours
+        
+        # 内存层：保存已反序列化的结果列表，命中时不访问磁盘也不做 json.loads
+        self.memory = LRUCache(memory_size, memory_ttl_seconds)
+        
         self._init_db()
     
     def _init_db(self):
         """初始化数据库"""
-        # 确保目录存在
-        os.makedirs(os.path.dirname(self.cache_file) if os.path.dirname(self.cache_file) else '.', exist_ok=True)
-        
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
-        
-        # 创建缓存表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS video_cache (
-                query_key TEXT PRIMARY KEY,
-                topic TEXT,
-                results TEXT,
-                created_at TIMESTAMP,
-                expires_at TIMESTAMP
-            )
-        ''')
+        with self._connection() as conn:
+            # 创建缓存表
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS video_cache (
+                    query_key TEXT PRIMARY KEY,
+                    topic TEXT,
+                    results TEXT,
+                    created_at TIMESTAMP,
+                    expires_at TIMESTAMP
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
         logger.info(f"✅ 缓存数据库初始化完成: {self.cache_file}")
     
     def get(self, topic: str) -> Optional[List[Dict]]:
@@ -61,16 +316,15 @@ class CacheManager:
         """
         query_key = self._make_key(topic)
         
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
+        # 第一级：内存 LRU
+        cached = self.memory.get(query_key)
+        if cached is not None:
+            logger.info(f"✅ 内存缓存命中: {topic}")
+            return _copy_results(cached)
         
-        cursor.execute(
-            'SELECT results, expires_at FROM video_cache WHERE query_key = ?',
-            (query_key,)
-        )
-        
-        row = cursor.fetchone()
-        conn.close()
+        # 第二级：SQLite
+        with self._connection() as conn:
+            row = conn.execute(_SQL_GET, (query_key,)).fetchone()
         
         if not row:
             logger.info(f"缓存未命中: {topic}")
@@ -86,7 +340,54 @@ class CacheManager:
             return None
         
         logger.info(f"✅ 缓存命中: {topic} (有效期至 {expires_at.strftime('%Y-%m-%d %H:%M')})")
-        return json.loads(results_json)
+        results = json.loads(results_json)
+        self._remember(query_key, results, expires_at)
+        return list(results)
+    
+    def get_stale(self, topic: str, max_stale_hours: float = 24) -> Optional[Tuple[List[Dict], bool]]:
+        """
+        读取缓存，允许返回已过期（但不超过 max_stale_hours）的结果
+        
+        用于 stale-while-revalidate：调用方先返回旧结果，再在后台刷新。
+        与 get() 不同，过期条目不会被删除。
+        
+        Args:
+            topic: 搜索主题
+            max_stale_hours: 过期后仍可使用的最长时间（小时）
+            
+        Returns:
+            (视频列表, 是否已过期)，不存在或过期太久则返回 None
+        """
+        query_key = self._make_key(topic)
+        
+        cached = self.memory.get(query_key)
+        if cached is not None:
+            logger.info(f"✅ 内存缓存命中: {topic}")
+            return _copy_results(cached), False
+        
+        with self._connection() as conn:
+            row = conn.execute(_SQL_GET, (query_key,)).fetchone()
+        
+        if not row:
+            logger.info(f"缓存未命中: {topic}")
+            return None
+        
+        results_json, expires_at = row
+        expires_at = datetime.fromisoformat(expires_at)
+        now = datetime.now()
+        
+        if now > expires_at + timedelta(hours=max_stale_hours):
+            logger.info(f"缓存已过期太久: {topic}")
+            return None
+        
+        results = json.loads(results_json)
+        if now > expires_at:
+            logger.info(f"⏳ 使用过期缓存: {topic} (过期于 {expires_at.strftime('%Y-%m-%d %H:%M')})")
+            return results, True
+        
+        logger.info(f"✅ 缓存命中: {topic} (有效期至 {expires_at.strftime('%Y-%m-%d %H:%M')})")
+        self._remember(query_key, results, expires_at)
+        return list(results), False
     
     def set(self, topic: str, results: List[Dict]):
         """
@@ -100,23 +401,16 @@ class CacheManager:
         created_at = datetime.now()
         expires_at = created_at + timedelta(hours=self.expiry_hours)
         
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO video_cache 
-            (query_key, topic, results, created_at, expires_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            query_key,
-            topic,
-            json.dumps(results, ensure_ascii=False),
-            created_at.isoformat(),
-            expires_at.isoformat()
-        ))
+        with self._connection() as conn:
+            conn.execute(_SQL_SET, (
+                query_key,
+                topic,
+                json.dumps(results, ensure_ascii=False, default=json_default),
+                created_at.isoformat(),
+                expires_at.isoformat()
+            ))
         
-        conn.commit()
-        conn.close()
+        self._remember(query_key, results, expires_at)
         
         logger.info(f"✅ 结果已缓存: {topic} (有效期至 {expires_at.strftime('%Y-%m-%d %H:%M')})")
     
@@ -129,46 +423,39 @@ class CacheManager:
         """
         query_key = self._make_key(topic)
         
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM video_cache WHERE query_key = ?', (query_key,))
-        
-        conn.commit()
-        conn.close()
+        self.memory.delete(query_key)
+        with self._connection() as conn:
+            conn.execute(_SQL_DELETE, (query_key,))
         
         logger.info(f"缓存已删除: {topic}")
     
     def clear_expired(self):
         """清理所有过期的缓存"""
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            'DELETE FROM video_cache WHERE expires_at < ?',
-            (datetime.now().isoformat(),)
-        )
-        
-        deleted_count = cursor.rowcount
-        conn.commit()
-        conn.close()
+        self.memory.purge_expired()
+        with self._connection() as conn:
+            cursor = conn.execute(_SQL_CLEAR_EXPIRED, (datetime.now().isoformat(),))
+            deleted_count = cursor.rowcount
         
         if deleted_count > 0:
             logger.info(f"✅ 清理了 {deleted_count} 条过期缓存")
     
     def clear_all(self):
         """清空所有缓存"""
-        conn = sqlite3.connect(self.cache_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM video_cache')
-        
-        deleted_count = cursor.rowcount
-        conn.commit()
-        conn.close()
+        self.memory.clear()
+        with self._connection() as conn:
+            cursor = conn.execute(_SQL_CLEAR_ALL)
+            deleted_count = cursor.rowcount
         
         logger.info(f"✅ 清空了所有缓存 ({deleted_count} 条)")
     
+    def _remember(self, query_key: str, results: List[Dict], expires_at: datetime):
+        """写入内存层（保存副本，调用方之后修改结果不影响缓存），存活时间不超过 SQLite 中的过期时间"""
+        remaining = (expires_at - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        ttl = min(remaining, self.memory.ttl_seconds) if self.memory.ttl_seconds else remaining
+        self.memory.set(query_key, _copy_results(results), ttl)
+    
     def _make_key(self, topic: str) -> str:
         """
         生成缓存键
@@ -179,8 +466,559 @@ class CacheManager:
         Returns:
             缓存键
         """
-        # 标准化主题（去除空格、转小写）
-        return topic.strip().lower().replace(' ', '_')
+        # 标准化主题（转小写、合并空白）
+        return normalize_topic(topic).replace(' ', '_')
+
+
+class StageCache(SQLiteStore):
+    """
+    阶段缓存 - 保存各平台获取器的原始输出
+
+    与最终结果缓存分开存放，键由获取参数构成。调整 top_n、MIN_VIEWS
+    或 AI 阈值后重新筛选/排序时，可直接复用已获取的候选视频。
+    """
+    
+    def __init__(self, cache_file: str = 'cache.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化阶段缓存
+        
+        Args:
+            cache_file: 缓存数据库文件路径（可与 CacheManager 共用）
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(cache_file, persistent, synchronous, wal)
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS stage_cache (
+                    stage TEXT,
+                    params_key TEXT,
+                    params TEXT,
+                    payload TEXT,
+                    created_at TIMESTAMP,
+                    expires_at TIMESTAMP,
+                    PRIMARY KEY (stage, params_key)
+                )
+            ''')
+    
+    def get(self, stage: str, params: Dict, allow_expired: bool = False) -> Optional[Any]:
+        """
+        读取阶段输出
+        
+        过期条目不会立即删除（重新获取时被覆盖），配额耗尽等无法获取新数据的
+        情况下仍可用 allow_expired=True 取出作为降级结果。
+        
+        Args:
+            stage: 阶段名称（如 youtube_search）
+            params: 获取参数
+            allow_expired: 是否返回已过期的输出
+            
+        Returns:
+            缓存的输出，不存在或已过期则返回 None
+        """
+        params_key = self._make_key(params)
+        
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT payload, expires_at FROM stage_cache WHERE stage = ? AND params_key = ?',
+                (stage, params_key)
+            ).fetchone()
+        
+        if not row:
+            return None
+        
+        payload, expires_at = row
+        if datetime.now() > datetime.fromisoformat(expires_at):
+            if not allow_expired:
+                return None
+            logger.info(f"⚠️ 使用过期阶段缓存: {stage} {params}")
+        else:
+            logger.info(f"✅ 阶段缓存命中: {stage} {params}")
+        return json.loads(payload)
+    
+    def set(self, stage: str, params: Dict, payload: Any, ttl_hours: float):
+        """
+        保存阶段输出
+        
+        Args:
+            stage: 阶段名称
+            params: 获取参数
+            payload: 阶段输出（可 JSON 序列化）
+            ttl_hours: 存活时间（小时）
+        """
+        created_at = datetime.now()
+        expires_at = created_at + timedelta(hours=ttl_hours)
+        
+        with self._connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO stage_cache
+                (stage, params_key, params, payload, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                stage,
+                self._make_key(params),
+                json.dumps(params, ensure_ascii=False, sort_keys=True),
+                json.dumps(payload, ensure_ascii=False, default=json_default),
+                created_at.isoformat(),
+                expires_at.isoformat()
+            ))
+        
+        logger.info(f"✅ 阶段输出已缓存: {stage} (有效期至 {expires_at.strftime('%Y-%m-%d %H:%M')})")
+    
+    def clear(self, stage: Optional[str] = None):
+        """
+        清空阶段缓存
+        
+        Args:
+            stage: 要清空的阶段，None 表示全部
+        """
+        with self._connection() as conn:
+            if stage:
+                conn.execute('DELETE FROM stage_cache WHERE stage = ?', (stage,))
+            else:
+                conn.execute('DELETE FROM stage_cache')
+    
+    def _make_key(self, params: Dict) -> str:
+        """
+        生成参数键（字符串参数做与主题缓存相同的标准化）
+        
+        Args:
+            params: 获取参数
+            
+        Returns:
+            参数的 SHA1 摘要
+        """
+        normalized = {
+            k: normalize_topic(v) if isinstance(v, str) else v
+            for k, v in params.items()
+        }
+        raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ScoreStore(SQLiteStore):
+    """
+    单视频相关性评分存储
+
+    持久保存 (视频, 标准化主题) 的 AI 评分，主题缓存过期后
+    只需为新出现或评分过期的视频调用模型。
+    """
+    
+    def __init__(self, cache_file: str = 'cache.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化评分存储
+        
+        Args:
+            cache_file: 数据库文件路径（可与 CacheManager 共用）
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(cache_file, persistent, synchronous, wal)
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS video_scores (
+                    platform TEXT,
+                    video_id TEXT,
+                    topic_key TEXT,
+                    ai_score INTEGER,
+                    ai_reason TEXT,
+                    hook TEXT,
+                    scored_at TIMESTAMP,
+                    PRIMARY KEY (platform, video_id, topic_key)
+                )
+            ''')
+    
+    def get_scores(self, topic: str, videos: List[Dict],
+                   max_age_hours: Optional[float] = None) -> Dict[tuple, Dict]:
+        """
+        批量读取视频评分
+        
+        Args:
+            topic: 搜索主题
+            videos: 视频列表
+            max_age_hours: 评分最长有效期（小时），超过视为过期；None 表示不过期
+            
+        Returns:
+            {(platform, video_id): {'ai_score', 'ai_reason', 'hook_text'}}，只包含未过期的评分
+        """
+        video_ids = list({str(v.get('video_id', '')) for v in videos})
+        if not video_ids:
+            return {}
+        
+        cutoff = ''
+        if max_age_hours is not None:
+            cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        
+        placeholders = ','.join('?' * len(video_ids))
+        with self._connection() as conn:
+            rows = conn.execute(
+                f'''
+                SELECT platform, video_id, ai_score, ai_reason, hook FROM video_scores
+                WHERE topic_key = ? AND scored_at >= ? AND video_id IN ({placeholders})
+                ''',
+                [normalize_topic(topic), cutoff, *video_ids]
+            ).fetchall()
+        
+        return {
+            (platform, video_id): {'ai_score': score, 'ai_reason': reason, 'hook_text': hook}
+            for platform, video_id, score, reason, hook in rows
+        }
+    
+    def set_scores(self, topic: str, scored: List[tuple]):
+        """
+        批量保存视频评分
+        
+        Args:
+            topic: 搜索主题
+            scored: [(video, {'ai_score', 'ai_reason', 'hook_text'}), ...]
+        """
+        if not scored:
+            return
+        
+        topic_key = normalize_topic(topic)
+        scored_at = datetime.now().isoformat()
+        with self._connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO video_scores
+                (platform, video_id, topic_key, ai_score, ai_reason, hook, scored_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (
+                    video.get('platform', ''),
+                    str(video.get('video_id', '')),
+                    topic_key,
+                    result['ai_score'],
+                    result['ai_reason'],
+                    result.get('hook_text', ''),
+                    scored_at
+                )
+                for video, result in scored
+            ])
+    
+    def clear(self):
+        """清空所有评分"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM video_scores')
+
+
+class TranslationCache(SQLiteStore):
+    """翻译缓存 - 按模糊标准化后的原文保存翻译结果"""
+    
+    def __init__(self, cache_file: str = 'cache.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化翻译缓存
+        
+        Args:
+            cache_file: 数据库文件路径（可与 CacheManager 共用）
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(cache_file, persistent, synchronous, wal)
+        self.memory = LRUCache(1024)
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS translations (
+                    source_key TEXT PRIMARY KEY,
+                    source_text TEXT,
+                    translation TEXT,
+                    created_at TIMESTAMP
+                )
+            ''')
+    
+    def get_many(self, texts: List[str]) -> Dict[str, str]:
+        """
+        批量读取翻译
+        
+        Args:
+            texts: 原文列表
+            
+        Returns:
+            {原文: 译文}，只包含已缓存的条目
+        """
+        found = {}
+        missing = {}
+        for text in texts:
+            key = normalize_query(text)
+            cached = self.memory.get(key)
+            if cached is not None:
+                found[text] = cached
+            elif key:
+                missing.setdefault(key, []).append(text)
+        
+        if missing:
+            placeholders = ','.join('?' * len(missing))
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f'SELECT source_key, translation FROM translations WHERE source_key IN ({placeholders})',
+                    list(missing)
+                ).fetchall()
+            for key, translation in rows:
+                self.memory.set(key, translation)
+                for text in missing[key]:
+                    found[text] = translation
+        
+        return found
+    
+    def get(self, text: str) -> Optional[str]:
+        """读取单条翻译，未缓存时返回 None"""
+        return self.get_many([text]).get(text)
+    
+    def set_many(self, translations: Dict[str, str]):
+        """
+        批量保存翻译
+        
+        Args:
+            translations: {原文: 译文}
+        """
+        created_at = datetime.now().isoformat()
+        rows = []
+        for text, translation in translations.items():
+            key = normalize_query(text)
+            if key and translation:
+                self.memory.set(key, translation)
+                rows.append((key, text, translation, created_at))
+        
+        if rows:
+            with self._connection() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO translations (source_key, source_text, translation, created_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    rows
+                )
+    
+    def set(self, text: str, translation: str):
+        """保存单条翻译"""
+        self.set_many({text: translation})
+
+
+class TopicCatalog(SQLiteStore):
+    """
+    主题已知视频目录 - 记录每个主题最近一次完整搜索得到的视频ID
+
+    每天跟踪的主题里大部分候选视频都是已知的，只是播放量变了。
+    有了已知ID，刷新时只需批量获取统计数据，完整搜索按更慢的节奏执行。
+    """
+    
+    def __init__(self, cache_file: str = 'cache.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化主题目录
+        
+        Args:
+            cache_file: 数据库文件路径（可与 CacheManager 共用）
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(cache_file, persistent, synchronous, wal)
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS topic_searches (
+                    topic_key TEXT,
+                    platform TEXT,
+                    searched_at TIMESTAMP,
+                    PRIMARY KEY (topic_key, platform)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS topic_videos (
+                    topic_key TEXT,
+                    platform TEXT,
+                    position INTEGER,
+                    video_id TEXT,
+                    PRIMARY KEY (topic_key, platform, position)
+                )
+            ''')
+    
+    def get(self, topic: str, platform: str,
+            max_age_hours: Optional[float] = None) -> Optional[List[str]]:
+        """
+        读取主题的已知视频ID
+        
+        Args:
+            topic: 搜索主题
+            platform: 平台名称
+            max_age_hours: 完整搜索的最长有效期（小时），None 表示不限
+            
+        Returns:
+            视频ID列表（保持搜索结果顺序），没有记录或已过期则返回 None
+        """
+        topic_key = normalize_topic(topic)
+        
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT searched_at FROM topic_searches WHERE topic_key = ? AND platform = ?',
+                (topic_key, platform)
+            ).fetchone()
+            if not row:
+                return None
+            
+            searched_at = datetime.fromisoformat(row[0])
+            if max_age_hours is not None and datetime.now() - searched_at > timedelta(hours=max_age_hours):
+                return None
+            
+            rows = conn.execute(
+                'SELECT video_id FROM topic_videos WHERE topic_key = ? AND platform = ? ORDER BY position',
+                (topic_key, platform)
+            ).fetchall()
+        
+        return [video_id for (video_id,) in rows] or None
+    
+    def set(self, topic: str, platform: str, video_ids: List[str]):
+        """
+        记录一次完整搜索的结果（替换该主题之前的已知视频）
+        
+        Args:
+            topic: 搜索主题
+            platform: 平台名称
+            video_ids: 视频ID列表
+        """
+        topic_key = normalize_topic(topic)
+        
+        with self._connection() as conn:
+            conn.execute(
+                'DELETE FROM topic_videos WHERE topic_key = ? AND platform = ?',
+                (topic_key, platform)
+            )
+            conn.executemany(
+                'INSERT INTO topic_videos (topic_key, platform, position, video_id) VALUES (?, ?, ?, ?)',
+                [(topic_key, platform, i, video_id) for i, video_id in enumerate(video_ids)]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO topic_searches (topic_key, platform, searched_at) VALUES (?, ?, ?)',
+                (topic_key, platform, datetime.now().isoformat())
+            )
+    
+    def clear(self):
+        """清空主题目录"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM topic_videos')
+            conn.execute('DELETE FROM topic_searches')
+
+
+class QuotaLedger(SQLiteStore):
+    """
+    API 配额账本 - 按天记录各类调用消耗的配额单位
+
+    YouTube Data API 的每日配额在太平洋时间午夜重置，账本按同一时区分日，
+    多个进程共用同一个数据库文件时也能看到彼此的消耗。
+    """
+    
+    def __init__(self, cache_file: str = 'cache.db', daily_limit: int = 10000,
+                 upstream: str = 'youtube', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化配额账本
+        
+        Args:
+            cache_file: 数据库文件路径（可与 CacheManager 共用）
+            daily_limit: 每日配额上限
+            upstream: 上游名称（同一数据库可记录多个上游）
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(cache_file, persistent, synchronous, wal)
+        self.daily_limit = daily_limit
+        self.upstream = upstream
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS api_quota (
+                    day TEXT,
+                    upstream TEXT,
+                    operation TEXT,
+                    units INTEGER,
+                    calls INTEGER,
+                    PRIMARY KEY (day, upstream, operation)
+                )
+            ''')
+    
+    @staticmethod
+    def _today() -> str:
+        """当前配额日（太平洋时间）"""
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+    
+    def record(self, operation: str, units: int, calls: int = 1):
+        """
+        记录一次调用的配额消耗
+        
+        Args:
+            operation: 调用类型（如 search.list）
+            units: 消耗的配额单位
+            calls: 调用次数
+        """
+        with self._connection() as conn:
+            conn.execute('''
+                INSERT INTO api_quota (day, upstream, operation, units, calls)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (day, upstream, operation)
+                DO UPDATE SET units = units + excluded.units, calls = calls + excluded.calls
+            ''', (self._today(), self.upstream, operation, units, calls))
+    
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """
+        今日各调用类型的消耗
+        
+        Returns:
+            {调用类型: {'units': 配额单位, 'calls': 调用次数}}
+        """
+        with self._connection() as conn:
+            rows = conn.execute(
+                'SELECT operation, units, calls FROM api_quota WHERE day = ? AND upstream = ?',
+                (self._today(), self.upstream)
+            ).fetchall()
+        return {operation: {'units': units, 'calls': calls} for operation, units, calls in rows}
+    
+    def used(self) -> int:
+        """今日已消耗的配额单位"""
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT COALESCE(SUM(units), 0) FROM api_quota WHERE day = ? AND upstream = ?',
+                (self._today(), self.upstream)
+            ).fetchone()
+        return row[0]
+    
+    def remaining(self) -> int:
+        """今日剩余配额单位"""
+        return max(0, self.daily_limit - self.used())
+    
+    def mark_exhausted(self):
+        """上游报告配额耗尽时调用：把剩余额度记为已用，直到下一个配额日"""
+        remaining = self.remaining()
+        if remaining > 0:
+            self.record('quota_exceeded', remaining, calls=0)
+        logger.warning(f"⚠️ {self.upstream} 今日配额已耗尽")
+    
+    def clear(self):
+        """清空账本"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM api_quota WHERE upstream = ?', (self.upstream,))
 
 
 def test_cache_manager():
@@ -220,12 +1058,71 @@ def test_cache_manager():
         print("4. 清理过期缓存...")
         cache.clear_expired()
         
+        # 多线程共享同一个 CacheManager
+        print("5. 多线程读写...")
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: cache.set(f"topic {i}", test_results), range(8)))
+            hits = list(executor.map(lambda i: cache.get(f"topic {i}"), range(8)))
+        print(f"   结果: {all(h == test_results for h in hits)}")
+        
+        # 内存层与删除保持一致
+        print("6. 删除后内存层失效...")
+        cache.delete("AI coding")
+        print(f"   结果: {cache.get('AI coding') is None}, 内存层统计: {cache.memory.stats()}")
+        
+        # 阶段缓存
+        print("7. 阶段缓存...")
+        stage_cache = StageCache(cache_file)
+        params = {'topic': 'AI coding', 'max_results': 50, 'days_ago': 60}
+        stage_cache.set('youtube_search', params, test_results, ttl_hours=1)
+        print(f"   结果: {stage_cache.get('youtube_search', params) == test_results}")
+        print(f"   参数不同: {stage_cache.get('youtube_search', dict(params, days_ago=30)) is None}")
+        stage_cache.close()
+        
+        # 评分存储
+        print("8. 单视频评分存储...")
+        score_store = ScoreStore(cache_file)
+        video = {'platform': 'YouTube', 'video_id': 'abc'}
+        score_store.set_scores("AI coding", [(video, {'ai_score': 88, 'ai_reason': '相关', 'hook_text': ''})])
+        print(f"   结果: {score_store.get_scores('ai  Coding', [video])}")
+        print(f"   过期: {score_store.get_scores('AI coding', [video], max_age_hours=0) == {}}")
+        score_store.close()
+        
+        # 翻译缓存（全角/空白/标点折叠）
+        print("9. 翻译缓存...")
+        translations = TranslationCache(cache_file)
+        translations.set("自媒体运营", "social media marketing")
+        print(f"   结果: {translations.get(' 自媒体 运营！')}")
+        translations.close()
+        
+        # 配额账本
+        print("10. 配额账本...")
+        ledger = QuotaLedger(cache_file, daily_limit=500)
+        ledger.record('search.list', 100)
+        ledger.record('videos.list', 1)
+        ledger.record('videos.list', 1)
+        print(f"   结果: 已用 {ledger.used()}, 剩余 {ledger.remaining()}, 明细 {ledger.usage()}")
+        ledger.mark_exhausted()
+        print(f"   耗尽后剩余: {ledger.remaining()}")
+        ledger.close()
+        
+        # 主题已知视频目录
+        print("11. 主题已知视频目录...")
+        catalog = TopicCatalog(cache_file)
+        catalog.set("AI coding", 'YouTube', ['b', 'a', 'c'])
+        print(f"   结果: {catalog.get('ai  coding', 'YouTube')}")
+        print(f"   过期: {catalog.get('AI coding', 'YouTube', max_age_hours=0) is None}")
+        catalog.close()
+        
+        cache.close()
         print("\n✅ 缓存测试完成")
         
     finally:
-        # 清理测试文件
-        if os.path.exists(cache_file):
-            os.remove(cache_file)
+        # 清理测试文件（包括 WAL 模式的 -wal/-shm 文件）
+        for path in (cache_file, cache_file + '-wal', cache_file + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,355 @@
+"""
+本地视频目录 - 保存所有获取到的视频，支持按索引列查询和全文检索
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import json
+import logging
+import re
+
+from .cache import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# 独立成列（并按需建索引）的字段，其余字段存入 extra
+_COLUMNS = (
+    'platform', 'video_id', 'title', 'description', 'url', 'thumbnail',
+    'views', 'likes', 'comments', 'author', 'author_url', 'published_at'
+)
+# 查询时动态计算，不入库
+_DERIVED = ('days_ago',)
+# 排序字段白名单（拼接进 SQL）
+_ORDER_BY = {
+    'views': 'views DESC',
+    'published_at': 'published_at DESC',
+    'likes': 'likes DESC',
+}
+# BM25 列权重（title, description, tags）：标题命中最重要
+_BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+_SQL_UPSERT = '''
+    INSERT INTO videos
+    (platform, video_id, title, description, url, thumbnail, views, likes, comments,
+     author, author_url, published_at, tags, extra, first_seen, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (platform, video_id) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        url = excluded.url,
+        thumbnail = excluded.thumbnail,
+        views = excluded.views,
+        likes = excluded.likes,
+        comments = excluded.comments,
+        author = excluded.author,
+        author_url = excluded.author_url,
+        published_at = excluded.published_at,
+        tags = excluded.tags,
+        extra = excluded.extra,
+        updated_at = excluded.updated_at
+'''
+
+
+class VideoCatalog(SQLiteStore):
+    """
+    本地视频目录
+    
+    每个获取器的原始输出都写入这里（同一视频只保留一行，统计数据取最新），
+    随时间积累成离线语料。规则筛选类的条件（播放量、发布时间、平台、作者）
+    以带索引的 SQL 执行，而不是在 Python 中遍历字典。
+    """
+    
+    def __init__(self, catalog_file: str = 'catalog.db', persistent: bool = True,
+                 synchronous: str = 'NORMAL', wal: bool = True):
+        """
+        初始化视频目录
+        
+        Args:
+            catalog_file: 数据库文件路径
+            persistent: 是否为每个线程保持持久连接
+            synchronous: SQLite synchronous 级别
+            wal: 是否启用 WAL 日志模式
+        """
+        super().__init__(catalog_file, persistent, synchronous, wal)
+        self._init_db()
+    
+    def _init_db(self):
+        """初始化数据库"""
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS videos (
+                    id INTEGER PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    title TEXT,
+                    description TEXT,
+                    url TEXT,
+                    thumbnail TEXT,
+                    views INTEGER,
+                    likes INTEGER,
+                    comments INTEGER,
+                    author TEXT,
+                    author_url TEXT,
+                    published_at TEXT,
+                    tags TEXT,
+                    extra TEXT,
+                    first_seen TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    UNIQUE (platform, video_id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_platform ON videos (platform)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_views ON videos (views)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_videos_author ON videos (author)')
+            
+            # 全文索引（外部内容表，rowid 对应 videos.id）
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+                    title, description, tags,
+                    content='videos', content_rowid='id',
+                    tokenize='porter unicode61 remove_diacritics 2'
+                )
+            ''')
+            # 只在文本列变化时更新索引，刷新播放量不触发
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+                    INSERT INTO videos_fts (rowid, title, description, tags)
+                    VALUES (new.id, new.title, new.description, new.tags);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, title, description, tags)
+                    VALUES ('delete', old.id, old.title, old.description, old.tags);
+                END
+            ''')
+            # upsert 总会重新赋值文本列（即使值不变），因此用 WHEN 比较新旧值；
+            # 先删除再创建，已有数据库中的旧触发器也会被替换
+            conn.execute('DROP TRIGGER IF EXISTS videos_fts_update')
+            conn.execute('''
+                CREATE TRIGGER videos_fts_update AFTER UPDATE OF title, description, tags ON videos
+                WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.tags IS NOT new.tags
+                BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, title, description, tags)
+                    VALUES ('delete', old.id, old.title, old.description, old.tags);
+                    INSERT INTO videos_fts (rowid, title, description, tags)
+                    VALUES (new.id, new.title, new.description, new.tags);
+                END
+            ''')
+    
+    def upsert(self, videos: Iterable[Dict]) -> int:
+        """
+        写入视频（已存在的视频更新统计数据，保留首次发现时间）
+        
+        Args:
+            videos: 标准化的视频字典
+        
+        Returns:
+            写入的视频数
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for video in videos:
+            extra = {k: v for k, v in video.items() if k not in _COLUMNS and k not in _DERIVED and k != 'tags'}
+            rows.append((
+                video['platform'],
+                video['video_id'],
+                video.get('title', ''),
+                video.get('description', ''),
+                video.get('url', ''),
+                video.get('thumbnail', ''),
+                int(video.get('views') or 0),
+                int(video.get('likes') or 0),
+                int(video.get('comments') or 0),
+                video.get('author', ''),
+                video.get('author_url', ''),
+                video.get('published_at', ''),
+                json.dumps(video.get('tags') or [], ensure_ascii=False),
+                json.dumps(extra, ensure_ascii=False),
+                now,
+                now
+            ))
+        
+        if rows:
+            with self._connection() as conn:
+                conn.executemany(_SQL_UPSERT, rows)
+        return len(rows)
+    
+    def query(self, platform: Optional[str] = None, min_views: int = 0,
+              max_days_ago: Optional[int] = None, author: Optional[str] = None,
+              order_by: str = 'views', limit: Optional[int] = None) -> List[Dict]:
+        """
+        按条件查询视频（走 platform / views / published_at / author 索引）
+        
+        Args:
+            platform: 平台名称，None 表示全部
+            min_views: 最小播放量
+            max_days_ago: 只返回最近N天内发布的视频，None 表示不限
+            author: 作者，None 表示不限
+            order_by: 排序字段（views / published_at / likes，均为降序）
+            limit: 最多返回数量
+        
+        Returns:
+            标准化的视频字典列表（days_ago 按当前时间重新计算）
+        """
+        where, params = self._where(platform, min_views, max_days_ago, author)
+        sql = f'SELECT {", ".join(_COLUMNS)}, tags, extra FROM videos{where} ORDER BY {_ORDER_BY[order_by]}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._row_to_video(row) for row in rows]
+    
+    def count(self, platform: Optional[str] = None, min_views: int = 0,
+              max_days_ago: Optional[int] = None, author: Optional[str] = None) -> int:
+        """按条件统计视频数量（参数同 query）"""
+        where, params = self._where(platform, min_views, max_days_ago, author)
+        with self._connection() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM videos{where}', params).fetchone()[0]
+    
+    def search(self, text: str, platform: Optional[str] = None, min_views: int = 0,
+               max_days_ago: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        """
+        全文检索（BM25 排序）
+        
+        搜索词拆分为词项后以 OR 连接，词形归一（coding ≈ code），
+        命中词项越多、越稀有、出现在标题中的视频排名越靠前。
+        
+        Args:
+            text: 搜索主题（英文）
+            platform: 平台名称，None 表示全部
+            min_views: 最小播放量
+            max_days_ago: 只返回最近N天内发布的视频，None 表示不限
+            limit: 最多返回数量
+        
+        Returns:
+            视频字典列表（按相关性降序，附带 fts_score，越大越相关）
+        """
+        match = self._match_expression(text)
+        if not match:
+            return []
+        
+        where, params = self._where(platform, min_views, max_days_ago, None)
+        filters = where.replace(' WHERE ', ' AND ', 1)
+        bm25 = f'bm25(videos_fts, {", ".join(str(w) for w in _BM25_WEIGHTS)})'
+        columns = ', '.join(f'videos.{c}' for c in _COLUMNS)
+        sql = (
+            f'SELECT {columns}, videos.tags, videos.extra, {bm25} AS rank '
+            f'FROM videos_fts JOIN videos ON videos.id = videos_fts.rowid '
+            f'WHERE videos_fts MATCH ?{filters} ORDER BY rank LIMIT ?'
+        )
+        
+        with self._connection() as conn:
+            rows = conn.execute(sql, [match, *params, limit]).fetchall()
+        
+        videos = []
+        for row in rows:
+            video = self._row_to_video(row[:-1])
+            video['fts_score'] = -row[-1]
+            videos.append(video)
+        return videos
+    
+    def rebuild_index(self):
+        """根据 videos 表重建全文索引"""
+        with self._connection() as conn:
+            conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+    
+    def clear(self):
+        """清空视频目录"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM videos')
+    
+    @staticmethod
+    def _match_expression(text: str) -> str:
+        """把搜索词转成 FTS5 MATCH 表达式（每个词项加引号，避免被解析为语法）"""
+        terms = dict.fromkeys(re.findall(r'\w+', text.lower()))
+        return ' OR '.join(f'"{term}"' for term in terms)
+    
+    @staticmethod
+    def _where(platform: Optional[str], min_views: int, max_days_ago: Optional[int],
+               author: Optional[str]):
+        """构建 WHERE 子句"""
+        clauses = []
+        params = []
+        if platform:
+            clauses.append('platform = ?')
+            params.append(platform)
+        if min_views:
+            clauses.append('views >= ?')
+            params.append(min_views)
+        if max_days_ago is not None:
+            # days_ago = (now - published_at).days ≤ N  ⇔  published_at > now - (N + 1) 天
+            cutoff = datetime.utcnow() - timedelta(days=max_days_ago + 1)
+            clauses.append('published_at > ?')
+            params.append(cutoff.isoformat())
+        if author:
+            clauses.append('author = ?')
+            params.append(author)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return where, params
+    
+    @staticmethod
+    def _row_to_video(row) -> Dict:
+        """数据库行 → 标准化视频字典"""
+        video = dict(zip(_COLUMNS, row[:len(_COLUMNS)]))
+        video['tags'] = json.loads(row[-2]) if row[-2] else []
+        if row[-1]:
+            video.update(json.loads(row[-1]))
+        try:
+            video['days_ago'] = (datetime.utcnow() - datetime.fromisoformat(video['published_at'])).days
+        except (TypeError, ValueError):
+            video['days_ago'] = 0
+        return video
+
+
+def test_video_catalog():
+    """测试视频目录"""
+    import os
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        catalog = VideoCatalog(os.path.join(tmp_dir, 'catalog.db'))
+        now = datetime.utcnow()
+        
+        videos = [
+            {'platform': 'YouTube', 'video_id': 'a', 'title': 'AI coding', 'views': 500000,
+             'author': 'alice', 'published_at': (now - timedelta(days=5)).isoformat(), 'tags': ['ai'],
+             'duration': 'PT10M'},
+            {'platform': 'YouTube', 'video_id': 'b', 'title': 'Old video', 'views': 900000,
+             'author': 'bob', 'published_at': (now - timedelta(days=90)).isoformat(), 'tags': []},
+            {'platform': 'Instagram', 'video_id': 'c', 'title': 'Reel', 'views': 150000,
+             'author': 'alice', 'published_at': (now - timedelta(days=2)).isoformat(), 'tags': []},
+        ]
+        
+        print("\n=== 测试视频目录 ===")
+        print(f"1. 写入: {catalog.upsert(videos)} 个视频")
+        
+        catalog.upsert([dict(videos[0], views=600000)])
+        print(f"2. 更新统计: {catalog.query(platform='YouTube', max_days_ago=60)[0]['views']}")
+        
+        recent = catalog.query(min_views=200000, max_days_ago=60)
+        print(f"3. 播放量≥20万且60天内: {[v['video_id'] for v in recent]}")
+        print(f"4. 按作者: {[v['video_id'] for v in catalog.query(author='alice')]}")
+        print(f"5. 总数: {catalog.count()}, YouTube: {catalog.count(platform='YouTube')}")
+        
+        with catalog._connection() as conn:
+            plan = conn.execute(
+                'EXPLAIN QUERY PLAN SELECT * FROM videos WHERE views >= ? ORDER BY views DESC', (1,)
+            ).fetchall()
+        print(f"6. 查询计划: {plan[0][-1]}")
+        
+        hits = catalog.search('AI coding tutorial')
+        print(f"7. 全文检索: {[(v['video_id'], v['fts_score']) for v in hits]}")
+        catalog.upsert([dict(videos[1], title='Code with AI')])
+        print(f"8. 标题更新后: {[v['video_id'] for v in catalog.search('code', max_days_ago=365)]}")
+        
+        catalog.close()
+    
+    print("\n✅ 视频目录测试完成")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    test_video_catalog()
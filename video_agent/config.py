@@ -9,14 +9,41 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 INSTAGRAM_USERNAME = os.getenv('INSTAGRAM_USERNAME')
 INSTAGRAM_PASSWORD = os.getenv('INSTAGRAM_PASSWORD')
+RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY')  # instagram_rapidapi 获取器使用
+RAPIDAPI_HOST = os.getenv('RAPIDAPI_HOST') or None
 
 # 缓存配置
 CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
 CACHE_EXPIRY_HOURS = int(os.getenv('CACHE_EXPIRY_HOURS', '2'))
 CACHE_FILE = 'video_agent/cache.db'
+CACHE_PERSISTENT_CONNECTION = os.getenv('CACHE_PERSISTENT_CONNECTION', 'true').lower() == 'true'  # 每个线程复用 SQLite 连接
+CACHE_SQLITE_WAL = os.getenv('CACHE_SQLITE_WAL', 'true').lower() == 'true'  # WAL 日志模式
+CACHE_SQLITE_SYNCHRONOUS = os.getenv('CACHE_SQLITE_SYNCHRONOUS', 'NORMAL')  # OFF/NORMAL/FULL/EXTRA
+CACHE_MEMORY_SIZE = int(os.getenv('CACHE_MEMORY_SIZE', '128'))  # 内存 LRU 层条目数（0 关闭）
+CACHE_MEMORY_TTL_SECONDS = int(os.getenv('CACHE_MEMORY_TTL_SECONDS', '600'))  # 内存层最长存活时间
+CACHE_STALE_WHILE_REVALIDATE = os.getenv('CACHE_STALE_WHILE_REVALIDATE', 'false').lower() == 'true'  # 先返回过期结果，后台刷新
+CACHE_STALE_MAX_HOURS = float(os.getenv('CACHE_STALE_MAX_HOURS', '24'))  # 过期结果最长可用时间
+YOUTUBE_STAGE_TTL_HOURS = float(os.getenv('YOUTUBE_STAGE_TTL_HOURS', '6'))  # YouTube 原始获取结果缓存时间
+INSTAGRAM_STAGE_TTL_HOURS = float(os.getenv('INSTAGRAM_STAGE_TTL_HOURS', '12'))  # Instagram 原始获取结果缓存时间
+
+# 本地视频目录（所有获取到的视频，离线语料）
+CATALOG_ENABLED = os.getenv('CATALOG_ENABLED', 'true').lower() == 'true'
+CATALOG_FILE = os.getenv('CATALOG_FILE', 'video_agent/catalog.db')
+OFFLINE_SEARCH = os.getenv('OFFLINE_SEARCH', 'off').lower()  # off / first（本地候选充足时不请求平台）/ only（只查本地目录）
+OFFLINE_MIN_CANDIDATES = int(os.getenv('OFFLINE_MIN_CANDIDATES', '30'))  # first 模式下跳过平台请求所需的候选数
+OFFLINE_MAX_CANDIDATES = int(os.getenv('OFFLINE_MAX_CANDIDATES', '100'))  # first 模式下从目录取出的候选上限
 
 # 搜索配置
 MAX_RESULTS_PER_PLATFORM = 50  # 每个平台获取的候选视频数
+YOUTUBE_MAX_CANDIDATES = int(os.getenv('YOUTUBE_MAX_CANDIDATES', '150'))  # YouTube 分页搜索的候选数量预算
+YOUTUBE_MIN_PAGE_YIELD = float(os.getenv('YOUTUBE_MIN_PAGE_YIELD', '0.3'))  # 某页播放量达标比例低于该值时停止翻页
+YOUTUBE_DETAIL_WORKERS = int(os.getenv('YOUTUBE_DETAIL_WORKERS', '4'))  # 并发获取视频详情的线程数
+YOUTUBE_INCREMENTAL_REFRESH = os.getenv('YOUTUBE_INCREMENTAL_REFRESH', 'true').lower() == 'true'  # 已知视频只刷新统计数据
+YOUTUBE_FULL_SEARCH_HOURS = float(os.getenv('YOUTUBE_FULL_SEARCH_HOURS', '72'))  # 完整搜索（search.list）的间隔
+YOUTUBE_QUOTA_DAILY_LIMIT = int(os.getenv('YOUTUBE_QUOTA_DAILY_LIMIT', '10000'))  # 每日配额上限（0 关闭配额记账）
+YOUTUBE_QUOTA_LOW_WATERMARK = int(os.getenv('YOUTUBE_QUOTA_LOW_WATERMARK', '1000'))  # 剩余配额低于该值时每次搜索只取一页
+YOUTUBE_API_ENDPOINT = os.getenv('YOUTUBE_API_ENDPOINT') or None  # 自定义 API 地址（测试用），默认官方地址
+YOUTUBE_DISCOVERY_CACHE_DIR = os.getenv('YOUTUBE_DISCOVERY_CACHE_DIR', 'video_agent/.discovery_cache')  # 发现文档本地缓存目录
 MIN_VIEWS = 100000  # 最小播放量（降低到10万，提高通过率）
 MAX_DAYS_AGO = 60  # 最近N天内的视频
 TOP_N_RESULTS = 10  # 最终返回的视频数量
@@ -25,6 +52,53 @@ TOP_N_RESULTS = 10  # 最终返回的视频数量
 RULE_FILTER_COUNT = 30  # 规则筛选后保留的数量
 AI_FILTER_COUNT = 15  # AI轻量筛选后保留的数量
 
+# 上游并发配置（每个上游同时进行的请求数，同步/异步 Agent 共用）
+YOUTUBE_CONCURRENCY = int(os.getenv('YOUTUBE_CONCURRENCY', '4'))
+INSTAGRAM_CONCURRENCY = int(os.getenv('INSTAGRAM_CONCURRENCY', '1'))  # instaloader 容易被限流
+RAPIDAPI_CONCURRENCY = int(os.getenv('RAPIDAPI_CONCURRENCY', '2'))
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '4'))  # 同时发往 Gemini 的请求数（含并行分批评分和对冲请求）
+
+# Gemini 调用可靠性（超时、失败或熔断时各环节降级为本地排序）
+GEMINI_DEADLINE_SECONDS = float(os.getenv('GEMINI_DEADLINE_SECONDS', '45')) or None  # 单次调用总耗时上限（含重试，0 不限）
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '2'))  # 限流/服务端错误的抖动重试次数
+# 对冲：请求（流式时为首个片段）慢于 p95 时再发一个，取先返回（先产出片段）的结果；
+# 代价是慢请求多消耗一次调用的配额，且流式输出开始后不再对冲（已开始但输出缓慢的请求无法被替换）
+GEMINI_HEDGE_ENABLED = os.getenv('GEMINI_HEDGE_ENABLED', 'true').lower() == 'true'
+GEMINI_HEDGE_DELAY_SECONDS = float(os.getenv('GEMINI_HEDGE_DELAY_SECONDS', '10'))  # 延迟样本不足时的对冲等待时间
+GEMINI_BREAKER_FAILURES = int(os.getenv('GEMINI_BREAKER_FAILURES', '3'))  # 连续失败多少次后熔断（0 关闭）
+GEMINI_BREAKER_RESET_SECONDS = float(os.getenv('GEMINI_BREAKER_RESET_SECONDS', '60'))  # 熔断持续时间
+GEMINI_STREAMING = os.getenv('GEMINI_STREAMING', 'true').lower() == 'true'  # 流式接收 JSON 输出，每个评分到达即应用
+
+# 获取器插件（见 fetchers/registry.py），按逗号分隔的注册名启用
+ENABLED_FETCHERS = [name.strip() for name in os.getenv('ENABLED_FETCHERS', 'youtube,instagram').split(',') if name.strip()]
+# 单个获取器的截止时间（秒，0 表示不限）：超时后放弃等待，用其余平台的结果继续
+YOUTUBE_FETCH_TIMEOUT = float(os.getenv('YOUTUBE_FETCH_TIMEOUT', '30')) or None
+INSTAGRAM_FETCH_TIMEOUT = float(os.getenv('INSTAGRAM_FETCH_TIMEOUT', '45')) or None
+RAPIDAPI_FETCH_TIMEOUT = float(os.getenv('RAPIDAPI_FETCH_TIMEOUT', '20')) or None
+
+# 多主题批量搜索
+SEARCH_MANY_TOPICS_PER_BATCH = int(os.getenv('SEARCH_MANY_TOPICS_PER_BATCH', '4'))  # 合并评分的主题数
+SEARCH_MANY_PAIRS_PER_CALL = int(os.getenv('SEARCH_MANY_PAIRS_PER_CALL', '60'))  # 单次评分调用的(视频, 主题)组合上限
+
+# AI 缓存配置
+AI_RESPONSE_CACHE_SIZE = int(os.getenv('AI_RESPONSE_CACHE_SIZE', '256'))  # 按模型名+prompt 缓存的响应数
+AI_SCORE_CACHE_SIZE = int(os.getenv('AI_SCORE_CACHE_SIZE', '4096'))  # 按(视频, 主题)缓存的评分数
+AI_SCORE_CACHE_TTL_HOURS = float(os.getenv('AI_SCORE_CACHE_TTL_HOURS', '24'))  # 单视频评分有效期
+AI_SCORE_BATCH_TOKENS = int(os.getenv('AI_SCORE_BATCH_TOKENS', '6000'))  # 单次评分调用的视频 token 预算（超出时分批）
+AI_SCORE_PARALLELISM = int(os.getenv('AI_SCORE_PARALLELISM', '4'))  # 同时进行的评分批次数
+AI_PROMPT_DESCRIPTION_TOKENS = int(os.getenv('AI_PROMPT_DESCRIPTION_TOKENS', '40'))  # 评分 prompt 中每个视频描述摘要的 token 上限
+
+# 本地相关性预排序（TF-IDF 余弦相似度，AI 评分前执行，无网络）
+RELEVANCE_PRERANK_ENABLED = os.getenv('RELEVANCE_PRERANK_ENABLED', 'true').lower() == 'true'
+RELEVANCE_MISS_THRESHOLD = float(os.getenv('RELEVANCE_MISS_THRESHOLD', '0.03'))  # 低于该相似度直接剪除（0 表示不剪枝）
+RELEVANCE_HIT_THRESHOLD = float(os.getenv('RELEVANCE_HIT_THRESHOLD', '0.5'))  # 不低于该相似度直接视为高相关（0 表示关闭）
+
+# 近似重复检测（规则筛选前合并跨平台搬运/重复上传的同一视频）
+DEDUPE_ENABLED = os.getenv('DEDUPE_ENABLED', 'true').lower() == 'true'
+DEDUPE_TITLE_DISTANCE = int(os.getenv('DEDUPE_TITLE_DISTANCE', '3'))  # 标题 SimHash 最大汉明距离（64 位）
+DEDUPE_THUMBNAIL_DISTANCE = int(os.getenv('DEDUPE_THUMBNAIL_DISTANCE', '5'))  # 缩略图 dHash 最大汉明距离（64 位）
+THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', '')  # 本地缩略图缓存目录（{平台}_{视频ID}.jpg），空表示不比较缩略图
+
 # 验证配置
 def validate_config():
     """验证必需的配置是否存在"""
@@ -33,9 +107,12 @@ def validate_config():
     if not GEMINI_API_KEY or GEMINI_API_KEY == 'your_gemini_api_key_here':
         errors.append("请设置 GEMINI_API_KEY")
     
-    if not YOUTUBE_API_KEY or YOUTUBE_API_KEY == 'your_youtube_api_key_here':
+    if 'youtube' in ENABLED_FETCHERS and (not YOUTUBE_API_KEY or YOUTUBE_API_KEY == 'your_youtube_api_key_here'):
         errors.append("请设置 YOUTUBE_API_KEY")
     
+    if OFFLINE_SEARCH not in ('off', 'first', 'only'):
+        errors.append(f"OFFLINE_SEARCH 只能是 off / first / only（当前: {OFFLINE_SEARCH}）")
+    
     if errors:
         raise ValueError(f"配置错误:\n" + "\n".join(f"- {e}" for e in errors))
     
@@ -0,0 +1,40 @@
+"""
+搜索事件 - search_stream() 逐步产出的进度事件
+"""
+from dataclasses import dataclass, field
+from typing import List, Dict
+
+
+@dataclass
+class SearchEvent:
+    """搜索事件基类"""
+    topic: str
+
+
+@dataclass
+class FetchedBatch(SearchEvent):
+    """某个平台的获取结果"""
+    platform: str = ''
+    videos: List[Dict] = field(default_factory=list)
+    error: str = ''
+    timed_out: bool = False  # 超过获取器截止时间（结果不完整，其余平台照常返回）
+
+
+@dataclass
+class FilterDone(SearchEvent):
+    """规则筛选完成"""
+    videos: List[Dict] = field(default_factory=list)
+    total: int = 0
+
+
+@dataclass
+class ScoredBatch(SearchEvent):
+    """AI 相关性评分完成（保留的高相关视频）"""
+    videos: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class FinalRanking(SearchEvent):
+    """最终排序结果（每次搜索的最后一个事件）"""
+    videos: List[Dict] = field(default_factory=list)
+    from_cache: bool = False
@@ -1,8 +1,13 @@
 """
 Fetchers 包初始化
 """
-from .youtube import YouTubeFetcher
+from .youtube import YouTubeFetcher, QuotaExhaustedError
+from .youtube_client import get_youtube_client
 from .instagram import InstagramFetcher
+from .registry import FetcherPlugin, register_fetcher, get_fetcher_plugin, available_fetchers
 
-__all__ = ['YouTubeFetcher', 'InstagramFetcher']
+__all__ = [
+    'YouTubeFetcher', 'InstagramFetcher', 'get_youtube_client', 'QuotaExhaustedError',
+    'FetcherPlugin', 'register_fetcher', 'get_fetcher_plugin', 'available_fetchers'
+]
 
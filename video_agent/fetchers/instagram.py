@@ -7,6 +7,8 @@ from typing import List, Dict, Optional
 import logging
 import time
 
+from ..video import Video
+
 logger = logging.getLogger(__name__)
 
 
@@ -121,7 +123,7 @@ class InstagramFetcher:
             logger.error(f"Instagram 搜索失败: {e}")
             return []
     
-    def _parse_post(self, post) -> Dict:
+    def _parse_post(self, post) -> Video:
         """
         解析单个 Instagram 帖子
         
@@ -129,7 +131,7 @@ class InstagramFetcher:
             post: Instaloader Post 对象
             
         Returns:
-            标准化的视频字典
+            标准化的视频记录
         """
         # 获取标题（caption）
         caption = post.caption if post.caption else ''
@@ -142,22 +144,22 @@ class InstagramFetcher:
         video_url = f"https://www.instagram.com/p/{post.shortcode}/"
         author_url = f"https://www.instagram.com/{post.owner_username}/"
         
-        return {
-            'platform': 'Instagram',
-            'video_id': post.shortcode,
-            'title': title,
-            'description': caption,
-            'url': video_url,
-            'thumbnail': post.url,  # 帖子的图片URL
-            'views': post.video_view_count if post.video_view_count else 0,
-            'likes': post.likes,
-            'comments': post.comments,
-            'author': post.owner_username,
-            'author_url': author_url,
-            'published_at': post.date.isoformat(),
-            'days_ago': days_ago,
-            'tags': list(post.caption_hashtags) if post.caption_hashtags else []
-        }
+        return Video(
+            platform='Instagram',
+            video_id=post.shortcode,
+            title=title,
+            description=caption,
+            url=video_url,
+            thumbnail=post.url,  # 帖子的图片URL
+            views=post.video_view_count if post.video_view_count else 0,
+            likes=post.likes,
+            comments=post.comments,
+            author=post.owner_username,
+            author_url=author_url,
+            published_at=post.date.isoformat(),
+            days_ago=days_ago,
+            tags=list(post.caption_hashtags) if post.caption_hashtags else []
+        )
 
 
 def test_instagram_fetcher():
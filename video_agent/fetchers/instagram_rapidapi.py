@@ -6,6 +6,8 @@ from typing import List, Dict, Optional
 import logging
 from datetime import datetime
 
+from ..video import Video
+
 logger = logging.getLogger(__name__)
 
 
@@ -195,7 +197,7 @@ class InstagramRapidAPIFetcher:
         logger.info(f"✅ 找到 {len(videos)} 个符合条件的 Instagram 视频")
         return videos[:max_results]
     
-    def _parse_post(self, post: Dict) -> Dict:
+    def _parse_post(self, post: Dict) -> Video:
         """
         解析 Instagram 帖子为标准格式
         
@@ -203,7 +205,7 @@ class InstagramRapidAPIFetcher:
             post: RapidAPI 返回的帖子数据
             
         Returns:
-            标准化的视频字典
+            标准化的视频记录
         """
         # 这个函数需要根据实际 API 响应格式调整
         
@@ -243,22 +245,22 @@ class InstagramRapidAPIFetcher:
         url = f"https://www.instagram.com/p/{code}/" if code else ''
         author_url = f"https://www.instagram.com/{author}/"
         
-        return {
-            'platform': 'Instagram',
-            'video_id': str(video_id),
-            'title': title,
-            'description': caption_text,
-            'url': url,
-            'thumbnail': post.get('thumbnail_url', ''),
-            'views': views,
-            'likes': likes,
-            'comments': comments,
-            'author': author,
-            'author_url': author_url,
-            'published_at': published_at.isoformat(),
-            'days_ago': days_ago,
-            'tags': []
-        }
+        return Video(
+            platform='Instagram',
+            video_id=str(video_id),
+            title=title,
+            description=caption_text,
+            url=url,
+            thumbnail=post.get('thumbnail_url', ''),
+            views=views,
+            likes=likes,
+            comments=comments,
+            author=author,
+            author_url=author_url,
+            published_at=published_at.isoformat(),
+            days_ago=days_ago,
+            tags=[]
+        )
 
 
 def test_rapidapi_fetcher():
@@ -0,0 +1,182 @@
+"""
+获取器插件注册表 - 声明各平台获取器及其并发上限、超时和阶段缓存策略
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetcherPlugin:
+    """
+    获取器插件
+    
+    获取器只需实现 search_videos(topic, max_results, days_ago, min_views, ...) -> List[Dict]。
+    新平台（如 TikTok）通过 register_fetcher() 注册，并加入 ENABLED_FETCHERS 即可启用。
+    """
+    name: str  # 注册名（ENABLED_FETCHERS 中使用，同时作为阶段缓存命名空间）
+    platform: str  # 平台名称（FetchedBatch.platform）
+    create: Callable[[Any], Any]  # create(agent) -> 获取器实例
+    params: Callable[[str], Dict]  # params(topic) -> 获取输入（主题、时间窗口、数量上限），同时构成阶段缓存键
+    stage_ttl_hours: float = 6
+    concurrency: int = 1  # 同时进行的请求数上限
+    timeout_seconds: Optional[float] = None  # 单次获取的截止时间，超时后放弃等待，None 表示不限
+    search: Optional[Callable[[Any], Callable]] = None  # search(agent) -> 获取函数，默认为 search_videos
+    # options() -> 额外传给获取函数、但不进入阶段缓存键的参数（如播放量门槛），调整它们不会使阶段缓存失效
+    options: Optional[Callable[[], Dict]] = None
+    
+    @property
+    def stage(self) -> str:
+        """阶段缓存名称"""
+        return f'{self.name}_search'
+
+
+_registry: Dict[str, FetcherPlugin] = {}
+
+
+def register_fetcher(plugin: FetcherPlugin) -> FetcherPlugin:
+    """
+    注册获取器插件（同名插件会被替换）
+    
+    Args:
+        plugin: 获取器插件
+    
+    Returns:
+        插件本身
+    """
+    _registry[plugin.name] = plugin
+    return plugin
+
+
+def get_fetcher_plugin(name: str) -> FetcherPlugin:
+    """
+    按注册名获取插件
+    
+    Raises:
+        ValueError: 插件未注册
+    """
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"未知的获取器: {name}，可选 {available_fetchers()}") from None
+
+
+def available_fetchers() -> List[str]:
+    """已注册的获取器名称"""
+    return list(_registry)
+
+
+def _default_params(max_results: int) -> Callable[[str], Dict]:
+    """
+    通用搜索参数：只包含获取输入，播放量门槛在读出阶段缓存后再应用
+    （见 VideoSearchAgent._fetch_stage），调整 MIN_VIEWS 不会重新获取
+    """
+    def params(topic: str) -> Dict:
+        return {
+            'topic': topic,
+            'max_results': max_results,
+            'days_ago': config.MAX_DAYS_AGO
+        }
+    return params
+
+
+def _floored_params(max_results: int) -> Callable[[str], Dict]:
+    """
+    带播放量门槛的搜索参数：用于凑够 max_results 个达标视频即停止扫描的获取器（Instagram），
+    门槛必须在获取器内部生效，因此进入阶段缓存键，调整 MIN_VIEWS 会重新获取
+    """
+    default = _default_params(max_results)
+    
+    def params(topic: str) -> Dict:
+        return dict(default(topic), min_views=config.MIN_VIEWS)
+    return params
+
+
+def _create_youtube(agent):
+    from .youtube import YouTubeFetcher
+    return YouTubeFetcher(
+        config.YOUTUBE_API_KEY,
+        max_detail_workers=config.YOUTUBE_DETAIL_WORKERS,
+        api_endpoint=config.YOUTUBE_API_ENDPOINT,
+        discovery_cache_dir=config.YOUTUBE_DISCOVERY_CACHE_DIR,
+        quota_ledger=agent.quota_ledger,
+        quota_low_watermark=config.YOUTUBE_QUOTA_LOW_WATERMARK
+    )
+
+
+def _youtube_params(topic: str) -> Dict:
+    return _default_params(config.YOUTUBE_MAX_CANDIDATES)(topic)
+
+
+def _youtube_options() -> Dict:
+    # 分页收益判断的调优参数：min_views 只用于统计每页收益，不过滤结果
+    return {'min_views': config.MIN_VIEWS, 'min_page_yield': config.YOUTUBE_MIN_PAGE_YIELD}
+
+
+def _create_instagram(agent):
+    from .instagram import InstagramFetcher
+    return InstagramFetcher(config.INSTAGRAM_USERNAME, config.INSTAGRAM_PASSWORD)
+
+
+def _create_instagram_rapidapi(agent):
+    from .instagram_rapidapi import InstagramRapidAPIFetcher
+    if not config.RAPIDAPI_KEY:
+        raise ValueError("启用 instagram_rapidapi 需要设置 RAPIDAPI_KEY")
+    return InstagramRapidAPIFetcher(config.RAPIDAPI_KEY, config.RAPIDAPI_HOST)
+
+
+register_fetcher(FetcherPlugin(
+    name='youtube',
+    platform='YouTube',
+    create=_create_youtube,
+    params=_youtube_params,
+    options=_youtube_options,
+    stage_ttl_hours=config.YOUTUBE_STAGE_TTL_HOURS,
+    concurrency=config.YOUTUBE_CONCURRENCY,
+    timeout_seconds=config.YOUTUBE_FETCH_TIMEOUT,
+    # 已知视频只刷新统计数据（见 VideoSearchAgent._fetch_youtube）
+    search=lambda agent: agent._fetch_youtube
+))
+
+register_fetcher(FetcherPlugin(
+    name='instagram',
+    platform='Instagram',
+    create=_create_instagram,
+    params=_floored_params(config.MAX_RESULTS_PER_PLATFORM),
+    stage_ttl_hours=config.INSTAGRAM_STAGE_TTL_HOURS,
+    concurrency=config.INSTAGRAM_CONCURRENCY,
+    timeout_seconds=config.INSTAGRAM_FETCH_TIMEOUT
+))
+
+register_fetcher(FetcherPlugin(
+    name='instagram_rapidapi',
+    platform='Instagram',
+    create=_create_instagram_rapidapi,
+    params=_floored_params(config.MAX_RESULTS_PER_PLATFORM),
+    stage_ttl_hours=config.INSTAGRAM_STAGE_TTL_HOURS,
+    concurrency=config.RAPIDAPI_CONCURRENCY,
+    timeout_seconds=config.RAPIDAPI_FETCH_TIMEOUT
+))
+
+
+def test_registry():
+    """测试获取器注册表"""
+    print("\n=== 已注册的获取器 ===")
+    for name in available_fetchers():
+        plugin = get_fetcher_plugin(name)
+        timeout = f"{plugin.timeout_seconds:g}s" if plugin.timeout_seconds else "不限"
+        enabled = "✓" if name in config.ENABLED_FETCHERS else " "
+        print(f"[{enabled}] {name:<20} 平台: {plugin.platform:<10} 并发: {plugin.concurrency}  截止时间: {timeout}")
+    
+    try:
+        get_fetcher_plugin('tiktok')
+    except ValueError as e:
+        print(f"\n未注册: {e}")
+
+
+if __name__ == '__main__':
+    test_registry()
@@ -1,154 +1,356 @@
 """
 YouTube 视频数据获取模块
 """
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
+import math
+
+from . import youtube_client
+from ..video import Video
 
 logger = logging.getLogger(__name__)
 
+SEARCH_PAGE_SIZE = 50  # search.list 每页最多 50 个结果
+DETAILS_CHUNK_SIZE = 50  # videos.list 每次最多 50 个ID
+
+# 每次调用消耗的配额单位（与 YouTube Data API v3 计费一致）
+QUOTA_COSTS = {'search.list': 100, 'videos.list': 1}
+PAGE_QUOTA_COST = QUOTA_COSTS['search.list'] + QUOTA_COSTS['videos.list']  # 一页搜索 + 一批详情
+QUOTA_ERROR_REASONS = (b'quotaExceeded', b'dailyLimitExceeded')
+
+
+class QuotaExhaustedError(Exception):
+    """YouTube 配额不足以执行搜索"""
+
 
 class YouTubeFetcher:
     """YouTube 视频获取器"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_detail_workers: int = 4,
+                 api_endpoint: Optional[str] = None, discovery_cache_dir: Optional[str] = None,
+                 quota_ledger=None, quota_low_watermark: int = 0):
         """
         初始化 YouTube API 客户端
         
+        客户端在进程内按 API key 共享，多个 Fetcher / Agent 实例不会重复加载发现文档。
+        获取详情的线程池随 Fetcher 创建，在 close() 中关闭。
+        
         Args:
             api_key: YouTube Data API v3 密钥
+            max_detail_workers: 并发获取视频详情的线程数
+            api_endpoint: 自定义 API 地址（如本地测试服务器），None 使用官方地址
+            discovery_cache_dir: 发现文档的本地缓存目录
+            quota_ledger: 配额账本（QuotaLedger），None 表示不记录配额
+            quota_low_watermark: 剩余配额低于该值时每次搜索只取一页
         """
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = youtube_client.get_youtube_client(
+            api_key,
+            api_endpoint=api_endpoint,
+            cache_dir=discovery_cache_dir
+        )
+        self.max_detail_workers = max_detail_workers
+        self.quota_ledger = quota_ledger
+        self.quota_low_watermark = quota_low_watermark
+        self._detail_executor = ThreadPoolExecutor(max_workers=max(1, max_detail_workers),
+                                                   thread_name_prefix='youtube-details')
+    
+    def close(self):
+        """关闭获取详情的线程池"""
+        self._detail_executor.shutdown(wait=False)
     
-    def search_videos(self, topic: str, max_results: int = 50, days_ago: int = 60) -> List[Dict]:
+    def search_videos(self, topic: str, max_results: int = 50, days_ago: int = 60,
+                      min_views: int = 0, min_page_yield: float = 0.0) -> List[Dict]:
         """
         搜索 YouTube 视频
         
+        按 nextPageToken 分页，直到达到候选数量预算。每页 search.list 消耗 100 配额，
+        因此当某一页中播放量达标（≥ min_views）的视频比例低于 min_page_yield 时提前停止。
+        某一页请求失败时停止翻页，返回已获取的页。
+        配置了配额账本时，页数不超过剩余配额可负担的数量（见 plan_pages）。
+        
         Args:
             topic: 搜索主题
-            max_results: 最大结果数
+            max_results: 候选视频数量预算（超过 50 时分页获取）
             days_ago: 搜索最近N天内的视频
+            min_views: 判断分页收益时使用的播放量门槛（不在此处过滤）
+            min_page_yield: 每页达标比例下限，低于该值停止翻页（0 表示不提前停止）
             
         Returns:
             视频列表，每个视频包含标题、描述、播放量等信息
+            
+        Raises:
+            QuotaExhaustedError: 剩余配额连一页搜索都不够时抛出
         """
+        max_pages = self.plan_pages(max_results)
+        if max_pages == 0:
+            raise QuotaExhaustedError(f"YouTube 配额不足（剩余 {self.quota_ledger.remaining()}）")
+        
         try:
             # 计算时间范围
             published_after = (datetime.utcnow() - timedelta(days=days_ago)).isoformat() + 'Z'
             
             logger.info(f"正在搜索 YouTube: 主题='{topic}', 最大结果={max_results}")
             
-            # 第一步：搜索视频（包含长视频和Shorts）
-            search_request = self.youtube.search().list(
-                part='snippet',
-                q=topic,
-                type='video',
-                publishedAfter=published_after,
-                order='viewCount',  # 按播放量排序
-                maxResults=max_results,
-                regionCode='US',  # 美国区域
-                relevanceLanguage='en',  # 英语相关性
-                videoDuration='any'  # 包含所有长度（长视频和Shorts）
-            )
-            
-            search_response = search_request.execute()
-            
-            # 提取视频ID
-            video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
-            
-            if not video_ids:
-                logger.warning("未找到任何视频")
-                return []
-            
-            logger.info(f"找到 {len(video_ids)} 个视频，正在获取详细信息...")
-            
-            # 第二步：获取视频详细信息（包括播放量）
-            videos_request = self.youtube.videos().list(
-                part='snippet,statistics,contentDetails',
-                id=','.join(video_ids)
-            )
-            
-            videos_response = videos_request.execute()
-            
-            # 解析结果并过滤欧美英语视频
             videos = []
+            seen_ids = set()
             filtered_stats = {'non_western': 0, 'other_lang': 0, 'passed': 0}
+            page_token = None
+            page = 0
             
-            # 接受的欧美英语区域代码
-            western_english_regions = {
-                'en-us', 'en-gb', 'en-ca', 'en-au',  # 美国、英国、加拿大、澳大利亚
-                'en', 'en-nz', 'en-ie',               # 通用英语、新西兰、爱尔兰
-            }
-            
-            # 需要排除的非欧美区域
-            excluded_regions = {
-                'en-in',  # 印度
-                'en-ph',  # 菲律宾
-                'en-pk',  # 巴基斯坦
-                'en-sg',  # 新加坡
-                'en-za',  # 南非
-            }
-            
-            for item in videos_response.get('items', []):
+            while len(seen_ids) < max_results and page < max_pages:
+                page += 1
+                
+                # 第一步：搜索视频（包含长视频和Shorts）
+                search_request = self.youtube.search().list(
+                    part='snippet',
+                    q=topic,
+                    type='video',
+                    publishedAfter=published_after,
+                    order='viewCount',  # 按播放量排序
+                    maxResults=min(SEARCH_PAGE_SIZE, max_results - len(seen_ids)),
+                    regionCode='US',  # 美国区域
+                    relevanceLanguage='en',  # 英语相关性
+                    videoDuration='any',  # 包含所有长度（长视频和Shorts）
+                    pageToken=page_token
+                )
+                
                 try:
-                    video = self._parse_video(item)
+                    search_response = self._execute(search_request, 'search.list')
                     
-                    # 获取语言信息
-                    audio_lang = video.get('audio_language', '').lower()
-                    lang = video.get('language', '').lower()
+                    # 提取视频ID（跨页去重）
+                    video_ids = [
+                        item['id']['videoId'] for item in search_response.get('items', [])
+                        if item['id']['videoId'] not in seen_ids
+                    ]
+                    seen_ids.update(video_ids)
                     
-                    # 检查主要语言标识
-                    primary_lang = audio_lang or lang or ''
+                    if not video_ids:
+                        break
                     
-                    # 判断是否是欧美英语视频
-                    is_western_english = False
+                    logger.info(f"第 {page} 页找到 {len(video_ids)} 个视频，正在获取详细信息...")
                     
-                    if primary_lang:
-                        # 如果明确是排除的区域，直接过滤
-                        if primary_lang in excluded_regions:
-                            filtered_stats['non_western'] += 1
-                            logger.debug(f"❌ 过滤非欧美区域: {video['title'][:50]} ({primary_lang})")
-                            continue
-                        
-                        # 检查是否是接受的欧美英语
-                        if primary_lang in western_english_regions or primary_lang.startswith('en-us') or primary_lang.startswith('en-gb'):
-                            is_western_english = True
-                        elif primary_lang.startswith('en'):
-                            # 如果是其他 en- 开头但不在白名单中，也过滤
-                            filtered_stats['non_western'] += 1
-                            logger.debug(f"❌ 过滤非欧美英语: {video['title'][:50]} ({primary_lang})")
-                            continue
-                        else:
-                            # 非英语
-                            filtered_stats['other_lang'] += 1
-                            logger.debug(f"❌ 过滤非英语: {video['title'][:50]} ({primary_lang})")
-                            continue
-                    else:
-                        # 没有语言标记，通过美国区域搜索，默认接受
-                        is_western_english = True
-                    
-                    if is_western_english:
-                        filtered_stats['passed'] += 1
-                        videos.append(video)
-                        
+                    # 第二步：获取视频详细信息（包括播放量）
+                    page_videos = self._filter_western_english(self.get_video_details(video_ids), filtered_stats)
+                    videos.extend(page_videos)
+                except QuotaExhaustedError:
+                    # 翻页途中配额耗尽：保留已获取的页
+                    if not videos:
+                        raise
+                    logger.warning(f"第 {page} 页配额耗尽，停止翻页")
+                    break
                 except Exception as e:
-                    logger.error(f"解析视频失败: {e}")
-                    continue
+                    # 单页失败（网络、5xx 等）：保留已获取的页，停止翻页
+                    logger.error(f"YouTube 第 {page} 页获取失败，停止翻页: {e}")
+                    break
+                
+                page_token = search_response.get('nextPageToken')
+                if not page_token:
+                    break
+                
+                # 边际收益太低时停止翻页，避免浪费配额
+                if min_page_yield > 0:
+                    passing = sum(1 for v in page_videos if v['views'] >= min_views)
+                    page_yield = passing / len(video_ids)
+                    if page_yield < min_page_yield:
+                        logger.info(f"第 {page} 页达标比例 {page_yield:.0%} < {min_page_yield:.0%}，停止翻页")
+                        break
+            
+            if not videos:
+                logger.warning("未找到任何视频")
+                return []
             
             # 日志统计
             total_filtered = filtered_stats['non_western'] + filtered_stats['other_lang']
             if total_filtered > 0:
                 logger.info(f"📊 过滤统计: 非欧美区域={filtered_stats['non_western']}, 其他语言={filtered_stats['other_lang']}")
             
-            logger.info(f"✅ 成功获取 {len(videos)} 个欧美英语视频（包含长视频和Shorts）")
+            logger.info(f"✅ 成功获取 {len(videos)} 个欧美英语视频（包含长视频和Shorts，共 {page} 页）")
             return videos
             
+        except QuotaExhaustedError:
+            raise
         except Exception as e:
             logger.error(f"YouTube 搜索失败: {e}")
             return []
     
-    def _parse_video(self, item: Dict) -> Dict:
+    def get_video_details(self, video_ids: List[str]) -> List[Dict]:
+        """
+        批量获取视频详细信息
+        
+        videos.list 每次最多 50 个ID（每次消耗 1 配额），超过时拆分成多批并发请求。
+        
+        Args:
+            video_ids: 视频ID列表
+            
+        Returns:
+            标准化的视频字典列表（保持输入顺序，解析失败的视频跳过）
+        """
+        chunks = [video_ids[i:i + DETAILS_CHUNK_SIZE] for i in range(0, len(video_ids), DETAILS_CHUNK_SIZE)]
+        
+        def fetch_chunk(chunk: List[str]) -> List[Dict]:
+            videos_request = self.youtube.videos().list(
+                part='snippet,statistics,contentDetails',
+                id=','.join(chunk)
+            )
+            return self._execute(videos_request, 'videos.list').get('items', [])
+        
+        if len(chunks) == 1:
+            responses = [fetch_chunk(chunks[0])]
+        else:
+            responses = list(self._detail_executor.map(fetch_chunk, chunks))
+        
+        videos = []
+        for items in responses:
+            for item in items:
+                try:
+                    videos.append(self._parse_video(item))
+                except Exception as e:
+                    logger.error(f"解析视频失败: {e}")
+        return videos
+    
+    def refresh_videos(self, video_ids: List[str], days_ago: int = 60) -> List[Dict]:
+        """
+        只刷新已知视频的统计数据（不调用 search.list）
+        
+        每 50 个ID消耗 1 配额，150 个候选约 3 配额，而完整搜索约 303 配额。
+        已删除/私有的视频不会返回，超出时间范围的视频被丢弃。
+        
+        Args:
+            video_ids: 已知视频ID列表
+            days_ago: 只保留最近N天内发布的视频
+            
+        Returns:
+            标准化的视频列表（保持输入顺序）
+        """
+        videos = [v for v in self.get_video_details(video_ids) if v['days_ago'] <= days_ago]
+        logger.info(f"✅ 刷新 {len(video_ids)} 个已知视频的统计数据，保留 {len(videos)} 个")
+        return videos
+    
+    def plan_pages(self, max_results: int) -> int:
+        """
+        根据剩余配额决定本次搜索最多翻几页
+        
+        - 配额充足：按候选预算翻页
+        - 剩余配额低于 quota_low_watermark：只取一页（更省配额的计划）
+        - 连一页都负担不起：返回 0，由调用方改用缓存
+        
+        Args:
+            max_results: 候选视频数量预算
+            
+        Returns:
+            最多页数
+        """
+        wanted = max(1, math.ceil(max_results / SEARCH_PAGE_SIZE))
+        if self.quota_ledger is None:
+            return wanted
+        
+        remaining = self.quota_ledger.remaining()
+        affordable = remaining // PAGE_QUOTA_COST
+        if remaining < self.quota_low_watermark and wanted > 1:
+            logger.info(f"YouTube 剩余配额 {remaining} 低于 {self.quota_low_watermark}，本次只取一页")
+            wanted = 1
+        
+        return min(wanted, affordable)
+    
+    def _execute(self, request, operation: str) -> Dict:
+        """
+        执行 API 请求并记录配额消耗
+        
+        httplib2.Http 不是线程安全的，每个线程使用自己的 keep-alive 连接。
+        配额按调用计费（失败的请求同样计费），因此在发出请求前记账。
+        
+        Args:
+            request: googleapiclient HttpRequest
+            operation: 调用类型（QUOTA_COSTS 的键）
+            
+        Raises:
+            QuotaExhaustedError: 上游返回配额耗尽错误
+        """
+        if self.quota_ledger is not None:
+            self.quota_ledger.record(operation, QUOTA_COSTS[operation])
+        
+        try:
+            return youtube_client.execute(request)
+        except HttpError as e:
+            if e.resp.status == 403 and any(reason in e.content for reason in QUOTA_ERROR_REASONS):
+                if self.quota_ledger is not None:
+                    self.quota_ledger.mark_exhausted()
+                raise QuotaExhaustedError(f"YouTube 配额已耗尽: {operation}") from e
+            raise
+    
+    def _filter_western_english(self, videos: List[Dict], filtered_stats: Dict) -> List[Dict]:
+        """
+        过滤出欧美英语视频
+        
+        Args:
+            videos: 标准化的视频列表
+            filtered_stats: 过滤统计（原地累加）
+            
+        Returns:
+            欧美英语视频
+        """
+        passed = []
+        
+        # 接受的欧美英语区域代码
+        western_english_regions = {
+            'en-us', 'en-gb', 'en-ca', 'en-au',  # 美国、英国、加拿大、澳大利亚
+            'en', 'en-nz', 'en-ie',               # 通用英语、新西兰、爱尔兰
+        }
+        
+        # 需要排除的非欧美区域
+        excluded_regions = {
+            'en-in',  # 印度
+            'en-ph',  # 菲律宾
+            'en-pk',  # 巴基斯坦
+            'en-sg',  # 新加坡
+            'en-za',  # 南非
+        }
+        
+        for video in videos:
+            # 获取语言信息
+            audio_lang = video.get('audio_language', '').lower()
+            lang = video.get('language', '').lower()
+            
+            # 检查主要语言标识
+            primary_lang = audio_lang or lang or ''
+            
+            # 判断是否是欧美英语视频
+            is_western_english = False
+            
+            if primary_lang:
+                # 如果明确是排除的区域，直接过滤
+                if primary_lang in excluded_regions:
+                    filtered_stats['non_western'] += 1
+                    logger.debug(f"❌ 过滤非欧美区域: {video['title'][:50]} ({primary_lang})")
+                    continue
+                
+                # 检查是否是接受的欧美英语
+                if primary_lang in western_english_regions or primary_lang.startswith('en-us') or primary_lang.startswith('en-gb'):
+                    is_western_english = True
+                elif primary_lang.startswith('en'):
+                    # 如果是其他 en- 开头但不在白名单中，也过滤
+                    filtered_stats['non_western'] += 1
+                    logger.debug(f"❌ 过滤非欧美英语: {video['title'][:50]} ({primary_lang})")
+                    continue
+                else:
+                    # 非英语
+                    filtered_stats['other_lang'] += 1
+                    logger.debug(f"❌ 过滤非英语: {video['title'][:50]} ({primary_lang})")
+                    continue
+            else:
+                # 没有语言标记，通过美国区域搜索，默认接受
+                is_western_english = True
+            
+            if is_western_english:
+                filtered_stats['passed'] += 1
+                passed.append(video)
+        
+        return passed
+    
+    def _parse_video(self, item: Dict) -> Video:
         """
         解析单个视频数据
         
@@ -156,7 +358,7 @@ class YouTubeFetcher:
             item: YouTube API 返回的视频项
             
         Returns:
-            标准化的视频字典
+            标准化的视频记录
         """
         snippet = item['snippet']
         statistics = item.get('statistics', {})
@@ -188,25 +390,25 @@ class YouTubeFetcher:
         default_audio_language = snippet.get('defaultAudioLanguage', '')
         default_language = snippet.get('defaultLanguage', '')
         
-        return {
-            'platform': 'YouTube',
-            'video_id': video_id,
-            'title': snippet.get('title', ''),
-            'description': snippet.get('description', ''),
-            'url': video_url,
-            'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-            'views': view_count,
-            'likes': int(statistics.get('likeCount', 0)),
-            'comments': int(statistics.get('commentCount', 0)),
-            'author': channel_title,
-            'author_url': channel_url,
-            'published_at': published_at.isoformat(),
-            'days_ago': days_ago,
-            'tags': snippet.get('tags', []),
-            'duration': duration,
-            'audio_language': default_audio_language,
-            'language': default_language
-        }
+        return Video(
+            platform='YouTube',
+            video_id=video_id,
+            title=snippet.get('title', ''),
+            description=snippet.get('description', ''),
+            url=video_url,
+            thumbnail=snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+            views=view_count,
+            likes=int(statistics.get('likeCount', 0)),
+            comments=int(statistics.get('commentCount', 0)),
+            author=channel_title,
+            author_url=channel_url,
+            published_at=published_at.isoformat(),
+            days_ago=days_ago,
+            tags=snippet.get('tags', []),
+            duration=duration,
+            audio_language=default_audio_language,
+            language=default_language
+        )
 
 
 def test_youtube_fetcher():
@@ -0,0 +1,141 @@
+"""
+YouTube API 客户端工厂 - 进程内共享、线程安全的客户端
+"""
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document, DISCOVERY_URI
+from googleapiclient.http import build_http
+from typing import Dict, Optional
+import httplib2
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_clients = {}  # (api_key, api_endpoint) -> service
+_documents = {}  # (service, version) -> 解析后的发现文档
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_youtube_client(api_key: str, api_endpoint: Optional[str] = None,
+                       cache_dir: Optional[str] = None):
+    """
+    获取共享的 YouTube API 客户端（同一进程内按 API key 复用）
+
+    客户端对象只负责构造请求，可以跨线程共享；请求通过 execute() 在
+    每个线程自己的 HTTP 连接上执行。
+
+    Args:
+        api_key: YouTube Data API v3 密钥
+        api_endpoint: 自定义 API 地址（如本地测试服务器），None 使用官方地址
+        cache_dir: 发现文档的本地缓存目录（库内没有静态文档时使用）
+
+    Returns:
+        googleapiclient Resource 对象
+    """
+    key = (api_key, api_endpoint)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            start = time.perf_counter()
+            document = _load_discovery_document('youtube', 'v3', cache_dir)
+            client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+            client = build_from_document(
+                document,
+                developerKey=api_key,
+                client_options=client_options
+            )
+            _clients[key] = client
+            logger.info(f"✅ YouTube 客户端已创建 ({(time.perf_counter() - start) * 1000:.0f}ms)")
+    return client
+
+
+def thread_http(timeout: Optional[float] = 30) -> httplib2.Http:
+    """
+    获取当前线程的 HTTP 连接（keep-alive，线程内复用）
+
+    httplib2.Http 不是线程安全的，但同一个实例会复用到同一主机的连接，
+    因此每个线程保留一个实例，避免每次请求重新握手。
+
+    Args:
+        timeout: 请求超时（秒），仅在首次创建时生效
+    """
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = build_http()
+        http.timeout = timeout
+        _local.http = http
+    return http
+
+
+def execute(request) -> Dict:
+    """
+    在当前线程的 HTTP 连接上执行 API 请求
+
+    Args:
+        request: googleapiclient HttpRequest
+
+    Returns:
+        响应 JSON
+    """
+    return request.execute(http=thread_http())
+
+
+def _load_discovery_document(service: str, version: str, cache_dir: Optional[str] = None) -> Dict:
+    """
+    加载发现文档：内存 → 库自带的静态文档 → 本地磁盘缓存 → 网络
+
+    Args:
+        service: API 名称
+        version: API 版本
+        cache_dir: 本地磁盘缓存目录
+
+    Returns:
+        解析后的发现文档
+    """
+    key = (service, version)
+    if key in _documents:
+        return _documents[key]
+
+    content = discovery_cache.get_static_doc(service, version)
+
+    cache_path = os.path.join(cache_dir, f'{service}.{version}.json') if cache_dir else None
+    if content is None and cache_path and os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            content = f.read()
+
+    if content is None:
+        url = DISCOVERY_URI.format(api=service, apiVersion=version)
+        logger.info(f"正在下载发现文档: {url}")
+        response, content = build_http().request(url)
+        if response.status >= 400:
+            raise RuntimeError(f"下载发现文档失败: HTTP {response.status}")
+        content = content.decode('utf-8')
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    document = json.loads(content)
+    _documents[key] = document
+    return document
+
+
+def test_youtube_client():
+    """测试客户端复用（第二次获取应几乎零耗时）"""
+    for i in range(2):
+        start = time.perf_counter()
+        client = get_youtube_client('test-key')
+        print(f"第 {i + 1} 次获取客户端: {(time.perf_counter() - start) * 1000:.2f}ms ({id(client)})")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    test_youtube_client()
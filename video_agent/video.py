@@ -0,0 +1,179 @@
+"""
+视频记录 - 各获取器产出的紧凑视频对象（__slots__，兼容字典访问）
+"""
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List
+import json
+
+# 稳定的字段结构（获取器产出的字段），每个字段占一个 slot
+VIDEO_FIELDS = (
+    'platform', 'video_id', 'title', 'description', 'url', 'thumbnail',
+    'views', 'likes', 'comments', 'author', 'author_url',
+    'published_at', 'days_ago', 'tags',
+    'duration', 'audio_language', 'language'
+)
+_FIELD_SET = frozenset(VIDEO_FIELDS)
+
+
+class Video(MutableMapping):
+    """
+    视频记录
+    
+    用 __slots__ 保存固定字段，每个视频比同样内容的字典小得多；
+    流水线后续阶段追加的字段（ai_score、final_rank 等）存入按需创建的 extra 字典。
+    
+    实现了完整的字典接口（video['views']、video.get()、update()、in、
+    dict(video)），现有按字典访问的代码无需修改。未设置的字段与字典中
+    不存在的键行为一致。
+    """
+    
+    __slots__ = VIDEO_FIELDS + ('extra',)
+    
+    def __init__(self, **fields):
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+    
+    # --- 字典接口 ---
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+    
+    def __delitem__(self, key: str):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        for name in VIDEO_FIELDS:
+            if hasattr(self, name):
+                yield name
+        if self.extra:
+            yield from self.extra
+    
+    def __len__(self) -> int:
+        count = sum(1 for name in VIDEO_FIELDS if hasattr(self, name))
+        return count + (len(self.extra) if self.extra else 0)
+    
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __repr__(self) -> str:
+        return f"Video({self.to_dict()!r})"
+    
+    def copy(self) -> 'Video':
+        """浅拷贝（与 dict.copy() 相同语义）"""
+        clone = Video.__new__(Video)
+        for name in VIDEO_FIELDS:
+            try:
+                setattr(clone, name, getattr(self, name))
+            except AttributeError:
+                pass
+        clone.extra = dict(self.extra) if self.extra else None
+        return clone
+    
+    # --- 转换 ---
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（缓存和返回结果时使用）"""
+        data = {}
+        for name in VIDEO_FIELDS:
+            try:
+                data[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Video':
+        """从字典创建"""
+        return cls(**data)
+    
+    def to_json(self) -> str:
+        """序列化为 JSON 字符串"""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+    
+    @classmethod
+    def from_json(cls, text: str) -> 'Video':
+        """从 JSON 字符串创建"""
+        return cls(**json.loads(text))
+
+
+def to_videos(items: Iterable[Dict[str, Any]]) -> List[Video]:
+    """字典列表 → Video 列表（已经是 Video 的保持不变）"""
+    return [item if isinstance(item, Video) else Video.from_dict(item) for item in items]
+
+
+def to_dicts(items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Video 列表 → 普通字典列表（已经是字典的保持不变）"""
+    return [item.to_dict() if isinstance(item, Video) else item for item in items]
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps 的 default 钩子：把 Video 序列化为字典"""
+    if isinstance(obj, Video):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def test_video():
+    """测试视频记录"""
+    import sys
+    
+    data = {
+        'platform': 'YouTube', 'video_id': 'abc', 'title': 'AI coding', 'description': 'desc',
+        'url': 'https://www.youtube.com/watch?v=abc', 'thumbnail': '', 'views': 500000,
+        'likes': 100, 'comments': 10, 'author': 'alice', 'author_url': '',
+        'published_at': '2024-01-01T00:00:00', 'days_ago': 5, 'tags': ['ai'],
+    }
+    video = Video.from_dict(data)
+    
+    print("\n=== 测试视频记录 ===")
+    print(f"1. 字典访问: {video['title']}, {video.get('duration', '无')}, {'duration' in video}")
+    video['ai_score'] = 90
+    video.update({'ai_reason': '相关'})
+    print(f"2. 追加字段: {video['ai_score']}, {video['ai_reason']}")
+    print(f"3. 与字典相等: {video == dict(data, ai_score=90, ai_reason='相关')}")
+    print(f"4. JSON 往返: {Video.from_json(video.to_json()) == video}")
+    clone = video.copy()
+    clone['views'] = 1
+    print(f"5. 拷贝独立: {video['views']} != {clone['views']}")
+    print(f"6. 无 __dict__: {not hasattr(video, '__dict__')}, 对象大小 {sys.getsizeof(video)} 字节 "
+          f"(字典 {sys.getsizeof(dict(data))} 字节)")
+    
+    print("\n✅ 视频记录测试完成")
+
+
+if __name__ == '__main__':
+    test_video()